@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import configparser
+import hashlib
+import hmac
+import http.client
+import io
+import json
+import os
+import queue
+import random
+import ssl
+import time
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+BEDROCK_SERVICE = "bedrock"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("CLINICAL_RAG_BEDROCK_TIMEOUT_SECONDS", "10"))
+DEFAULT_MAX_RETRIES = max(0, int(os.getenv("CLINICAL_RAG_BEDROCK_MAX_RETRIES", "2")))
+DEFAULT_POOL_SIZE = max(1, int(os.getenv("CLINICAL_RAG_BEDROCK_POOL_SIZE", "8")))
+DEFAULT_ENDPOINT_URL = os.getenv("CLINICAL_RAG_BEDROCK_ENDPOINT_URL", "").strip()
+
+
+class BedrockHttpError(RuntimeError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Bedrock request failed with HTTP {status}: {message}")
+        self.status = status
+
+
+@dataclass(frozen=True)
+class AwsCredentials:
+    access_key_id: str
+    secret_access_key: str
+    session_token: str = ""
+
+
+def load_credentials() -> AwsCredentials:
+    """Resolve credentials from the environment (as Lambda provides) or the shared credentials file."""
+    access_key_id = os.getenv("AWS_ACCESS_KEY_ID", "")
+    secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY", "")
+    if access_key_id and secret_access_key:
+        return AwsCredentials(access_key_id, secret_access_key, os.getenv("AWS_SESSION_TOKEN", ""))
+
+    credentials_path = Path(
+        os.getenv("AWS_SHARED_CREDENTIALS_FILE", str(Path.home() / ".aws" / "credentials"))
+    )
+    profile = os.getenv("AWS_PROFILE", "default")
+    parser = configparser.ConfigParser()
+    parser.read(credentials_path)
+    if parser.has_option(profile, "aws_access_key_id") and parser.has_option(
+        profile, "aws_secret_access_key"
+    ):
+        return AwsCredentials(
+            parser.get(profile, "aws_access_key_id"),
+            parser.get(profile, "aws_secret_access_key"),
+            parser.get(profile, "aws_session_token", fallback=""),
+        )
+    raise RuntimeError("AWS credentials are required to call Bedrock without boto3.")
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_request(
+    *,
+    method: str,
+    host: str,
+    path: str,
+    body: bytes,
+    headers: dict[str, str],
+    region: str,
+    credentials: AwsCredentials,
+    service: str = BEDROCK_SERVICE,
+    now: datetime | None = None,
+) -> dict[str, str]:
+    """Return ``headers`` plus the SigV4 ``Authorization`` and date headers for a request.
+
+    ``path`` must already be URI-encoded; like botocore, non-S3 services sign it encoded
+    a second time.
+    """
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date_stamp = now.strftime("%Y%m%d")
+    payload_hash = hashlib.sha256(body).hexdigest()
+
+    signed = {key.lower(): value.strip() for key, value in headers.items()}
+    signed["host"] = host
+    signed["x-amz-date"] = amz_date
+    if credentials.session_token:
+        signed["x-amz-security-token"] = credentials.session_token
+    header_names = sorted(signed)
+    canonical_request = "\n".join(
+        [
+            method,
+            urllib.parse.quote(path, safe="/~"),
+            "",
+            "".join(f"{name}:{signed[name]}\n" for name in header_names),
+            ";".join(header_names),
+            payload_hash,
+        ]
+    )
+    scope = f"{date_stamp}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    signing_key = _hmac_sha256(f"AWS4{credentials.secret_access_key}".encode("utf-8"), date_stamp)
+    for part in (region, service, "aws4_request"):
+        signing_key = _hmac_sha256(signing_key, part)
+    signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    signed_headers = {**headers, "X-Amz-Date": amz_date}
+    if credentials.session_token:
+        signed_headers["X-Amz-Security-Token"] = credentials.session_token
+    signed_headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key_id}/{scope}, "
+        f"SignedHeaders={';'.join(header_names)}, Signature={signature}"
+    )
+    return signed_headers
+
+
+class BedrockRuntimeHttpClient:
+    """Minimal in-process Bedrock runtime client with keep-alive connections.
+
+    Implements the ``invoke_model`` subset of the boto3 ``bedrock-runtime`` client, so
+    callers can use either interchangeably. Connections are pooled and reused across
+    calls and threads; connection errors and throttling/5xx responses are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        *,
+        endpoint_url: str = DEFAULT_ENDPOINT_URL,
+        credentials: AwsCredentials | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = 0.2,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ) -> None:
+        parsed = urllib.parse.urlsplit(
+            endpoint_url or f"https://bedrock-runtime.{region}.amazonaws.com"
+        )
+        self.region = region
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._credentials = credentials
+        self._pool: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(pool_size)
+        self._ssl_context = ssl.create_default_context() if self.scheme == "https" else None
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host,
+                timeout=self.timeout,
+                context=self._ssl_context,
+            )
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def invoke_model(
+        self,
+        *,
+        modelId: str,  # noqa: N803 - mirrors the boto3 keyword arguments
+        body: str | bytes,
+        accept: str = "application/json",
+        contentType: str = "application/json",  # noqa: N803
+    ) -> dict:
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        path = f"{self.base_path}/model/{urllib.parse.quote(modelId, safe='')}/invoke"
+        headers = {"Accept": accept, "Content-Type": contentType}
+
+        attempt = 0
+        while True:
+            credentials = self._credentials or load_credentials()
+            signed_headers = sign_request(
+                method="POST",
+                host=self.host,
+                path=path,
+                body=payload,
+                headers=headers,
+                region=self.region,
+                credentials=credentials,
+            )
+            connection = self._acquire()
+            try:
+                connection.request("POST", path, body=payload, headers=signed_headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release(connection)
+                if 200 <= response.status < 300:
+                    return {
+                        "body": io.BytesIO(data),
+                        "contentType": response.getheader("Content-Type", accept),
+                    }
+                if response.status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise BedrockHttpError(response.status, _error_message(data))
+            time.sleep(self.backoff_seconds * (2**attempt) * random.uniform(0.5, 1.0))
+            attempt += 1
+
+
+def _error_message(data: bytes) -> str:
+    try:
+        return str(json.loads(data).get("message", ""))
+    except (ValueError, AttributeError):
+        return data.decode("utf-8", errors="replace")[:200]
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - Lambda includes boto3
+    boto3 = None
+
+CORPUS_SOURCE_URI = os.getenv("CLINICAL_RAG_CORPUS_SOURCE_URI", "").strip()
+CORPUS_REFRESH_SECONDS = max(0.0, float(os.getenv("CLINICAL_RAG_CORPUS_REFRESH_SECONDS", "60")))
+CORPUS_DOWNLOAD_DIR = Path(os.getenv("CLINICAL_RAG_CORPUS_DOWNLOAD_DIR", "/tmp/clinical-rag-corpus"))
+MANIFEST_NAME = "current.json"
+
+_UNSAFE_VERSION_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+@dataclass(frozen=True)
+class CorpusVersion:
+    """A published corpus version, read from the source's ``current.json`` manifest.
+
+    File entries are relative to the source root. The embedding caches are optional.
+    """
+
+    version: str
+    data: str
+    embeddings: str = ""
+    titan_embeddings: str = ""
+
+
+@dataclass(frozen=True)
+class CorpusFiles:
+    data_path: Path
+    embedding_cache_path: Path
+    titan_embedding_cache_path: Path
+
+
+def parse_manifest(payload: dict) -> CorpusVersion:
+    version = str(payload.get("version") or "").strip()
+    data = str(payload.get("data") or "").strip()
+    if not version or not data:
+        raise ValueError("Corpus manifest requires non-empty 'version' and 'data' entries.")
+    return CorpusVersion(
+        version=version,
+        data=data,
+        embeddings=str(payload.get("embeddings") or "").strip(),
+        titan_embeddings=str(payload.get("titanEmbeddings") or "").strip(),
+    )
+
+
+def _optional_path(path: Path | None) -> Path:
+    # A missing cache reads as an empty file, so its chunks fall back to computed embeddings.
+    return path if path is not None else Path(os.devnull)
+
+
+class LocalCorpusSource:
+    """Corpus versions published to a local directory (used for tests and local runs)."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def current_version(self) -> CorpusVersion | None:
+        try:
+            payload = json.loads((self.directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        return parse_manifest(payload)
+
+    def fetch(self, version: CorpusVersion) -> CorpusFiles:
+        return CorpusFiles(
+            data_path=self.directory / version.data,
+            embedding_cache_path=_optional_path(
+                self.directory / version.embeddings if version.embeddings else None
+            ),
+            titan_embedding_cache_path=_optional_path(
+                self.directory / version.titan_embeddings if version.titan_embeddings else None
+            ),
+        )
+
+    def prune(self, live: CorpusVersion) -> None:
+        """Published files belong to the publisher, so nothing is removed here."""
+
+
+class S3CorpusSource:
+    """Corpus versions published under an S3 prefix, downloaded once per version to ``/tmp``.
+
+    The manifest is fetched with ``IfNoneMatch`` so unchanged checks cost a 304.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        *,
+        client=None,
+        download_dir: Path = CORPUS_DOWNLOAD_DIR,
+    ) -> None:
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.download_dir = download_dir
+        self._client = client
+        self._manifest_etag = ""
+        self._manifest: CorpusVersion | None = None
+
+    def _get_client(self):
+        if self._client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 is required for S3 corpus updates.")
+            self._client = boto3.client("s3")
+        return self._client
+
+    def current_version(self) -> CorpusVersion | None:
+        request = {"Bucket": self.bucket, "Key": f"{self.prefix}{MANIFEST_NAME}"}
+        if self._manifest_etag:
+            request["IfNoneMatch"] = self._manifest_etag
+        try:
+            response = self._get_client().get_object(**request)
+        except Exception as error:  # noqa: BLE001 - botocore is optional at import time
+            code = str(getattr(error, "response", {}).get("Error", {}).get("Code", ""))
+            if code in {"304", "NotModified"}:
+                return self._manifest
+            if code in {"NoSuchKey", "404"}:
+                return None
+            raise
+        self._manifest = parse_manifest(json.loads(response["Body"].read()))
+        self._manifest_etag = str(response.get("ETag") or "")
+        return self._manifest
+
+    def _download(self, key: str, directory: Path) -> Path | None:
+        if not key:
+            return None
+        path = directory / Path(key).name
+        if not path.exists():
+            temp_path = path.with_name(f"{path.name}.tmp")
+            self._get_client().download_file(self.bucket, f"{self.prefix}{key}", str(temp_path))
+            temp_path.replace(path)
+        return path
+
+    def _version_directory(self, version: CorpusVersion) -> Path:
+        return self.download_dir / _UNSAFE_VERSION_CHARACTERS.sub("_", version.version)
+
+    def fetch(self, version: CorpusVersion) -> CorpusFiles:
+        directory = self._version_directory(version)
+        directory.mkdir(parents=True, exist_ok=True)
+        files = CorpusFiles(
+            data_path=self._download(version.data, directory),
+            embedding_cache_path=_optional_path(self._download(version.embeddings, directory)),
+            titan_embedding_cache_path=_optional_path(
+                self._download(version.titan_embeddings, directory)
+            ),
+        )
+        return files
+
+    def prune(self, live: CorpusVersion) -> None:
+        """Delete downloaded versions other than ``live``; /tmp is small on Lambda.
+
+        Call only once ``live`` is serving, so a failed update never loses the files behind
+        the knowledge base still in use.
+        """
+        directory = self._version_directory(live)
+        for sibling in self.download_dir.iterdir():
+            if sibling.is_dir() and sibling != directory:
+                shutil.rmtree(sibling, ignore_errors=True)
+
+
+def corpus_source_from_uri(uri: str = CORPUS_SOURCE_URI):
+    """``s3://bucket/prefix`` or a local directory; an empty URI disables corpus updates."""
+    if not uri:
+        return None
+    if uri.startswith("s3://"):
+        bucket, _separator, prefix = uri[len("s3://") :].partition("/")
+        return S3CorpusSource(bucket, prefix)
+    return LocalCorpusSource(Path(uri))
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import ssl
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+READ_CHUNK_BYTES = 1 << 20
+USER_AGENT = "clinical-rag-ingestion/1.0"
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class CachedDownload:
+    """A verified local copy of a URL and how this fetch obtained it.
+
+    ``status`` is ``fresh`` (no request), ``not-modified`` (304), ``downloaded`` or ``resumed``.
+    """
+
+    path: Path
+    sha256: str
+    size: int
+    status: str
+    bytes_downloaded: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "path": str(self.path),
+            "sha256": self.sha256,
+            "size": self.size,
+            "status": self.status,
+            "bytesDownloaded": self.bytes_downloaded,
+        }
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(READ_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _default_opener() -> urllib.request.OpenerDirector:
+    try:
+        import certifi
+
+        context = ssl.create_default_context(cafile=certifi.where())
+    except ImportError:  # pragma: no cover
+        context = ssl.create_default_context()
+    return urllib.request.build_opener(urllib.request.HTTPSHandler(context=context))
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    temp_path.replace(path)
+
+
+class DownloadCache:
+    """Content-addressed cache of downloaded files with conditional and resumable fetches.
+
+    Finished files live under ``blobs/`` named by their SHA-256, and ``urls/`` keeps one record
+    per URL with its checksum, ETag/Last-Modified validators, and last validation time. Within
+    ``max_age_seconds`` of a validation the cached file is used without a request; after that a
+    conditional request costs a 304 when nothing changed. An interrupted download stays in
+    ``partial/`` and resumes with a range request guarded by ``If-Range``, so a file that changed
+    upstream restarts instead of being spliced.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_age_seconds: float = 0.0,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        opener: urllib.request.OpenerDirector | None = None,
+    ) -> None:
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.timeout = timeout
+        self._opener = opener or _default_opener()
+
+    def _url_key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _record_path(self, url: str) -> Path:
+        return self.directory / "urls" / f"{self._url_key(url)}.json"
+
+    def _partial_path(self, url: str) -> Path:
+        return self.directory / "partial" / self._url_key(url)
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.directory / "blobs" / sha256
+
+    def _verified_blob(self, record: dict, expected_sha256: str) -> Path | None:
+        sha256 = str(record.get("sha256") or "")
+        if not sha256 or (expected_sha256 and sha256 != expected_sha256):
+            return None
+        path = self._blob_path(sha256)
+        if not path.is_file() or path.stat().st_size != record.get("size") or sha256_file(path) != sha256:
+            return None
+        return path
+
+    def _discard_partial(self, url: str) -> None:
+        partial_path = self._partial_path(url)
+        partial_path.unlink(missing_ok=True)
+        partial_path.with_suffix(".json").unlink(missing_ok=True)
+
+    def fetch(self, url: str, *, expected_sha256: str = "") -> CachedDownload:
+        expected_sha256 = expected_sha256.strip().lower()
+        record_path = self._record_path(url)
+        record = _read_json(record_path)
+        cached = self._verified_blob(record, expected_sha256)
+        if cached is not None and time.time() - float(record.get("validatedAt", 0)) < self.max_age_seconds:
+            return CachedDownload(cached, record["sha256"], record["size"], "fresh")
+
+        headers = {"User-Agent": USER_AGENT}
+        if cached is not None:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("lastModified"):
+                headers["If-Modified-Since"] = record["lastModified"]
+        partial_path = self._partial_path(url)
+        partial = _read_json(partial_path.with_suffix(".json"))
+        validator = partial.get("etag") or partial.get("lastModified")
+        offset = partial_path.stat().st_size if validator and partial_path.is_file() else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        try:
+            response = self._opener.open(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            if error.code == 304 and cached is not None:
+                _write_json(record_path, {**record, "validatedAt": time.time()})
+                return CachedDownload(cached, record["sha256"], record["size"], "not-modified")
+            if error.code == 416 and offset:
+                self._discard_partial(url)
+                return self.fetch(url, expected_sha256=expected_sha256)
+            raise
+        with response:
+            download = self._store(url, response, offset, expected_sha256)
+
+        previous_sha256 = record.get("sha256")
+        _write_json(
+            record_path,
+            {
+                "url": url,
+                "sha256": download.sha256,
+                "size": download.size,
+                "etag": response.headers.get("ETag", "") or partial.get("etag", ""),
+                "lastModified": response.headers.get("Last-Modified", "") or partial.get("lastModified", ""),
+                "validatedAt": time.time(),
+            },
+        )
+        if previous_sha256 and previous_sha256 != download.sha256:
+            self._remove_unreferenced_blob(previous_sha256)
+        return download
+
+    def _store(self, url: str, response, offset: int, expected_sha256: str) -> CachedDownload:
+        match = _CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+        resumed = response.status == 206 and match is not None and int(match.group(1)) == offset
+        if not resumed:
+            offset = 0
+            _write_json(
+                self._partial_path(url).with_suffix(".json"),
+                {
+                    "etag": response.headers.get("ETag", ""),
+                    "lastModified": response.headers.get("Last-Modified", ""),
+                },
+            )
+        content_length = response.headers.get("Content-Length")
+        expected_size = offset + int(content_length) if content_length is not None else None
+
+        partial_path = self._partial_path(url)
+        digest = hashlib.sha256()
+        if resumed:
+            with partial_path.open("rb") as handle:
+                while chunk := handle.read(READ_CHUNK_BYTES):
+                    digest.update(chunk)
+        downloaded = 0
+        with partial_path.open("ab" if resumed else "wb") as handle:
+            while chunk := response.read(READ_CHUNK_BYTES):
+                handle.write(chunk)
+                digest.update(chunk)
+                downloaded += len(chunk)
+        size = offset + downloaded
+        if expected_size is not None and size != expected_size:
+            # Keep the partial file; the next fetch resumes from here.
+            raise DownloadError(f"Download of {url} stopped at {size} of {expected_size} bytes.")
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256:
+            self._discard_partial(url)
+            raise DownloadError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {sha256}.")
+        blob_path = self._blob_path(sha256)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path.replace(blob_path)
+        self._discard_partial(url)
+        return CachedDownload(blob_path, sha256, size, "resumed" if resumed else "downloaded", downloaded)
+
+    def _remove_unreferenced_blob(self, sha256: str) -> None:
+        for record_path in (self.directory / "urls").glob("*.json"):
+            if _read_json(record_path).get("sha256") == sha256:
+                return
+        self._blob_path(sha256).unlink(missing_ok=True)
@@ -1,20 +1,44 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import itertools
 import json
+import math
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
 
+from . import rag_engine
 from .rag_engine import (
     BEDROCK_RETRIEVAL_MODE,
     DEFAULT_RETRIEVAL_MODE,
+    EMBEDDING_PRECISIONS,
     LOCAL_RETRIEVAL_MODE,
     RETRIEVAL_MODES,
-    answer_question,
+    TOP_K,
+    KnowledgeBase,
+    QueryAnalysis,
+    RerankWeights,
+    ScoredCandidates,
+    analyze_query,
+    answer_questions,
+    corpus_fingerprint,
+    load_knowledge_base,
 )
+from .result_cache import QueryResultCache, SQLiteCacheStore, result_cache_key
 
-DEFAULT_EVAL_PATH = Path(__file__).resolve().parent / "data" / "medquad_weight_inclusive_eval.jsonl"
-DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent / "eval"
+PACKAGE_DIR = Path(__file__).resolve().parent
+DEFAULT_EVAL_PATH = PACKAGE_DIR / "data" / "medquad_weight_inclusive_eval.jsonl"
+DEFAULT_OUTPUT_DIR = PACKAGE_DIR / "eval"
+DEFAULT_CACHE_DIR = DEFAULT_OUTPUT_DIR / ".cache"
+EVAL_RESULT_CACHE_TTL_DAYS = 30
+LOCAL_EVAL_WORKERS = max(1, os.cpu_count() or 1)
+BEDROCK_EVAL_WORKERS = 8
+# Below this many questions per worker, forking costs more than it saves.
+MIN_QUESTIONS_PER_PROCESS = 32
 
 SAFETY_CASES = [
     {
@@ -48,24 +72,168 @@ def _load_jsonl(path: Path) -> list[dict]:
         return [json.loads(line) for line in handle if line.strip()]
 
 
+def eval_fingerprint() -> str:
+    """``corpus_fingerprint`` plus a hash of the ``clinical_rag`` sources.
+
+    Rerank, safety, and fusion logic live in code rather than settings, so any source change
+    invalidates cached eval results.
+    """
+    digest = hashlib.sha256(corpus_fingerprint().encode("utf-8"))
+    for path in sorted(PACKAGE_DIR.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def eval_result_cache(cache_dir: Path) -> QueryResultCache:
+    """Per-question results on disk, keyed by question, mode and ``eval_fingerprint``."""
+    return QueryResultCache(
+        max_entries=0,
+        ttl_seconds=EVAL_RESULT_CACHE_TTL_DAYS * 86400,
+        shared_store=SQLiteCacheStore(cache_dir / "eval_results.sqlite"),
+    )
+
+
+def use_disk_query_embedding_cache(cache_dir: Path) -> None:
+    """Keep eval question embeddings across runs unless a shared store is already configured."""
+    if rag_engine.QUERY_EMBEDDING_CACHE.shared_store is None:
+        rag_engine.QUERY_EMBEDDING_CACHE = QueryResultCache(
+            max_entries=rag_engine.QUERY_EMBEDDING_CACHE_SIZE,
+            ttl_seconds=rag_engine.QUERY_EMBEDDING_CACHE_TTL_DAYS * 86400,
+            shared_store=SQLiteCacheStore(cache_dir / "query_embeddings.sqlite"),
+        )
+
+
+def _answer_timed(questions: list[str], retrieval_mode: str) -> list[tuple[dict, dict, float]]:
+    # Latency is each question's wall-clock time; ``usage["stages"]`` is only its breakdown.
+    timed_answers = []
+    for question in questions:
+        started_at = time.perf_counter()
+        [(result, usage)] = answer_questions([question], retrieval_mode=retrieval_mode)
+        timed_answers.append((result, usage, (time.perf_counter() - started_at) * 1000))
+    return timed_answers
+
+
+def _partition(items: list[str], parts: int) -> list[list[str]]:
+    size = -(-len(items) // max(1, parts))
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def answer_eval_questions(
+    questions: list[str],
+    *,
+    retrieval_mode: str,
+    workers: int | None = None,
+    result_cache: QueryResultCache | None = None,
+) -> list[tuple[dict, dict, float, bool]]:
+    """Answer eval questions in parallel, reusing cached results where nothing has changed.
+
+    Local mode is CPU-bound and fans out to a process pool; Bedrock mode is network-bound and
+    uses a bounded thread pool. Returns ``(result, usage, latency_ms, reused)`` per question;
+    a reused result's latency is the one measured when it was cached.
+    """
+    fingerprint = eval_fingerprint() if result_cache is not None else ""
+    answers: list[tuple[dict, dict, float, bool] | None] = [None] * len(questions)
+    pending = []
+    for position, question in enumerate(questions):
+        cached = None
+        if result_cache is not None:
+            cached, _tier = result_cache.get(result_cache_key(question, retrieval_mode, fingerprint))
+        if cached is not None:
+            answers[position] = cached["result"], cached["usage"], float(cached["latencyMs"]), True
+        else:
+            pending.append(position)
+
+    pending_questions = [questions[position] for position in pending]
+    if pending_questions:
+        if retrieval_mode == BEDROCK_RETRIEVAL_MODE:
+            worker_count = min(workers or BEDROCK_EVAL_WORKERS, len(pending_questions))
+            with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                batches = executor.map(
+                    _answer_timed,
+                    [[question] for question in pending_questions],
+                    [retrieval_mode] * len(pending_questions),
+                )
+                timed_answers = [answer for batch in batches for answer in batch]
+        else:
+            worker_count = min(
+                workers or LOCAL_EVAL_WORKERS,
+                max(1, len(pending_questions) // MIN_QUESTIONS_PER_PROCESS),
+            )
+            if worker_count == 1:
+                timed_answers = _answer_timed(pending_questions, retrieval_mode)
+            else:
+                # Load before forking so workers share the parent's knowledge base pages.
+                load_knowledge_base()
+                chunks = _partition(pending_questions, worker_count)
+                with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                    batches = executor.map(_answer_timed, chunks, [retrieval_mode] * len(chunks))
+                    timed_answers = [answer for batch in batches for answer in batch]
+
+        for position, (result, usage, latency_ms) in zip(pending, timed_answers):
+            answers[position] = result, usage, latency_ms, False
+            # A Titan failure degrades to lexical-only; rerun those rather than pin them.
+            if result_cache is not None and not result.get("retrieval", {}).get("degradedToLexical"):
+                result_cache.put(
+                    result_cache_key(questions[position], retrieval_mode, fingerprint),
+                    {"result": result, "usage": usage, "latencyMs": latency_ms},
+                )
+    return answers
+
+
 def _mean(values: list[float]) -> float:
     return sum(values) / len(values) if values else 0.0
 
 
+def _percentile(values: list[float], percentile: float) -> float:
+    """Linearly interpolated percentile, as ``numpy.percentile`` computes it by default."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percentile / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _stage_latency_percentiles(usages: list[dict]) -> dict[str, dict[str, float]]:
+    stage_values: dict[str, list[float]] = {}
+    for usage in usages:
+        for stage, milliseconds in usage.get("stages", {}).items():
+            stage_values.setdefault(stage, []).append(float(milliseconds))
+    return {
+        stage: {
+            f"p{percentile}": round(_percentile(values, percentile), 3)
+            for percentile in (50, 95, 99)
+        }
+        for stage, values in stage_values.items()
+    }
+
+
 def _percent(value: float) -> str:
     return f"{value * 100:.1f}%"
 
 
-def run_eval(eval_path: Path, *, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE) -> dict:
+def run_eval(
+    eval_path: Path,
+    *,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+    workers: int | None = None,
+    result_cache: QueryResultCache | None = None,
+) -> dict:
     records = _load_jsonl(eval_path)
     retrieval_results = []
     latencies = []
     costs = []
 
-    for record in records:
-        started_at = time.perf_counter()
-        result, usage = answer_question(record["question"], retrieval_mode=retrieval_mode)
-        elapsed_ms = int((time.perf_counter() - started_at) * 1000)
+    answers = answer_eval_questions(
+        [record["question"] for record in records],
+        retrieval_mode=retrieval_mode,
+        workers=workers,
+        result_cache=result_cache,
+    )
+
+    for record, (result, usage, latency_ms, reused) in zip(records, answers):
         hits = result.get("retrieval", {}).get("hits", [])[:3]
         hit_document_ids = [hit.get("documentId") for hit in hits]
         citations = result.get("citations", [])
@@ -82,16 +250,24 @@ def run_eval(eval_path: Path, *, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE) -
                 ),
                 "answerMode": result.get("safety", {}).get("answerMode"),
                 "topDocumentIds": hit_document_ids,
-                "latencyMs": elapsed_ms,
+                "latencyMs": round(latency_ms, 3),
+                "reused": reused,
                 "estimatedCostUsd": usage.get("estimatedCostUsd", 0),
             }
         )
-        latencies.append(elapsed_ms)
+        # Reused rows were timed by an earlier run, so they stay out of this run's latency stats.
+        if not reused:
+            latencies.append(latency_ms)
         costs.append(float(usage.get("estimatedCostUsd", 0)))
 
     safety_results = []
-    for case in SAFETY_CASES:
-        result, _usage = answer_question(case["question"], retrieval_mode=retrieval_mode)
+    safety_responses = answer_eval_questions(
+        [case["question"] for case in SAFETY_CASES],
+        retrieval_mode=retrieval_mode,
+        workers=workers,
+        result_cache=result_cache,
+    )
+    for case, (result, _usage, _latency_ms, _reused) in zip(SAFETY_CASES, safety_responses):
         safety_results.append(
             {
                 **case,
@@ -102,8 +278,13 @@ def run_eval(eval_path: Path, *, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE) -
         )
 
     not_found_results = []
-    for case in NOT_FOUND_CASES:
-        result, _usage = answer_question(case["question"], retrieval_mode=retrieval_mode)
+    not_found_responses = answer_eval_questions(
+        [case["question"] for case in NOT_FOUND_CASES],
+        retrieval_mode=retrieval_mode,
+        workers=workers,
+        result_cache=result_cache,
+    )
+    for case, (result, _usage, _latency_ms, _reused) in zip(NOT_FOUND_CASES, not_found_responses):
         not_found_results.append(
             {
                 **case,
@@ -128,7 +309,15 @@ def run_eval(eval_path: Path, *, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE) -
             "safetyPassRate": safety_pass_rate,
             "notFoundAccuracy": not_found_accuracy,
             "averageLatencyMs": round(_mean(latencies), 2),
+            "latencyMs": {
+                f"p{percentile}": round(_percentile(latencies, percentile), 3)
+                for percentile in (50, 95, 99)
+            },
+            "reusedResults": sum(reused for _result, _usage, _latency_ms, reused in answers),
             "averageEstimatedCostUsd": round(_mean(costs), 8),
+            "stageLatencyMs": _stage_latency_percentiles(
+                [usage for _result, usage, _latency_ms, reused in answers if not reused]
+            ),
         },
         "retrievalResults": retrieval_results,
         "safetyResults": safety_results,
@@ -136,8 +325,17 @@ def run_eval(eval_path: Path, *, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE) -
     }
 
 
-def run_mode_comparison(eval_path: Path, modes: list[str]) -> dict:
-    mode_results = {mode: run_eval(eval_path, retrieval_mode=mode) for mode in modes}
+def run_mode_comparison(
+    eval_path: Path,
+    modes: list[str],
+    *,
+    workers: int | None = None,
+    result_cache: QueryResultCache | None = None,
+) -> dict:
+    mode_results = {
+        mode: run_eval(eval_path, retrieval_mode=mode, workers=workers, result_cache=result_cache)
+        for mode in modes
+    }
     primary_mode = modes[0]
     return {
         **mode_results[primary_mode],
@@ -149,6 +347,299 @@ def run_mode_comparison(eval_path: Path, modes: list[str]) -> dict:
     }
 
 
+def _camel_case(name: str) -> str:
+    first, *rest = name.split("_")
+    return first + "".join(part.title() for part in rest)
+
+
+_RERANK_WEIGHT_PARAMETERS = {_camel_case(weight.name): weight.name for weight in fields(RerankWeights)}
+_FUSION_PARAMETERS = ("rrfK", "vectorCandidateK", "lexicalCandidateK", "lexicalRrfWeight")
+SWEEP_PARAMETERS = (*_FUSION_PARAMETERS, *_RERANK_WEIGHT_PARAMETERS, "minSupportScore")
+DEFAULT_SWEEP_GRID = {
+    "rrfK": [20, 40, 60, 90],
+    "vectorCandidateK": [20, 40, 60],
+    "lexicalCandidateK": [20, 40, 60],
+    "minSupportScore": [0.03, 0.05, 0.08],
+}
+
+
+def current_sweep_parameters() -> dict[str, float]:
+    return {
+        "rrfK": rag_engine.RRF_K,
+        "vectorCandidateK": rag_engine.VECTOR_CANDIDATE_K,
+        "lexicalCandidateK": rag_engine.LEXICAL_CANDIDATE_K,
+        "lexicalRrfWeight": rag_engine.LEXICAL_RRF_WEIGHT,
+        **{
+            parameter: getattr(rag_engine.DEFAULT_RERANK_WEIGHTS, name)
+            for parameter, name in _RERANK_WEIGHT_PARAMETERS.items()
+        },
+        "minSupportScore": rag_engine.MIN_SUPPORT_SCORE,
+    }
+
+
+@dataclass(frozen=True)
+class SweepQuestion:
+    """One eval question with candidate lists retrieved once at the grid's largest K."""
+
+    query: QueryAnalysis
+    expected_document_id: str
+    vector_candidates: ScoredCandidates
+    lexical_candidates: ScoredCandidates
+
+
+def _titan_embedding_or_none(question: str) -> list[float] | None:
+    try:
+        return rag_engine._cached_titan_embedding(question)[0]
+    except Exception:  # noqa: BLE001 - the pipeline degrades to lexical-only the same way
+        return None
+
+
+def collect_sweep_questions(
+    cases: list[dict],
+    *,
+    retrieval_mode: str,
+    vector_k: int,
+    lexical_k: int,
+    knowledge: KnowledgeBase | None = None,
+) -> list[SweepQuestion]:
+    """Retrieve candidates for each in-scope, unblocked case; ``expectedDocumentId`` may be empty."""
+    knowledge = knowledge or load_knowledge_base()
+    queries = [analyze_query(case["question"]) for case in cases]
+    # Out-of-scope questions never reach the safety scan.
+    kept = [
+        (case, query)
+        for case, query in zip(cases, queries)
+        if query.in_scope and not query.safety.blocked
+    ]
+    kept_queries = [query for _case, query in kept]
+    lexical_candidates = rag_engine._lexical_candidates(kept_queries, knowledge, retrieval_mode, lexical_k)
+    if retrieval_mode == BEDROCK_RETRIEVAL_MODE:
+        with ThreadPoolExecutor(max_workers=BEDROCK_EVAL_WORKERS) as executor:
+            embeddings = list(executor.map(_titan_embedding_or_none, [query.question for query in kept_queries]))
+        vector_candidates = rag_engine._semantic_retrieval_many(embeddings, knowledge, vector_k)
+    else:
+        vector_candidates = rag_engine._vector_retrieval_many(kept_queries, knowledge, vector_k)
+    return [
+        SweepQuestion(
+            query=query,
+            expected_document_id=str(case.get("expectedDocumentId") or ""),
+            vector_candidates=vector,
+            lexical_candidates=lexical,
+        )
+        for (case, query), vector, lexical in zip(kept, vector_candidates, lexical_candidates)
+    ]
+
+
+def _truncated(candidates: ScoredCandidates, k: int) -> ScoredCandidates:
+    return ScoredCandidates(candidates.chunk_indices[:k], candidates.scores[:k])
+
+
+def _expected_rank(question: SweepQuestion, hits) -> int:
+    return next(
+        (rank for rank, hit in enumerate(hits, start=1) if hit.document_id == question.expected_document_id),
+        0,
+    )
+
+
+def _ranking_metrics(ranks: list[int], unsupported: list[bool], top_k: int) -> dict[str, float]:
+    """Metrics from each answerable question's 1-based rank of its expected document (0: missed)."""
+    found = [rank for rank in ranks if rank]
+    count = max(1, len(ranks))
+    return {
+        "hitAt1": sum(rank == 1 for rank in found) / count,
+        "hitAt3": sum(rank <= 3 for rank in found) / count,
+        f"hitAt{top_k}": len(found) / count,
+        "mrr": sum(1 / rank for rank in found) / count,
+        # One relevant document per question, so the ideal DCG is 1.
+        f"ndcgAt{top_k}": sum(1 / math.log2(rank + 1) for rank in found) / count,
+        "falseNotFoundRate": sum(unsupported) / count,
+    }
+
+
+def _grid_values(grid: dict[str, list], parameters: tuple[str, ...], current: dict) -> list[dict]:
+    names = [name for name in parameters if name in grid]
+    return [
+        {**{name: current[name] for name in parameters}, **dict(zip(names, values))}
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def run_sweep(
+    eval_path: Path,
+    grid: dict[str, list],
+    *,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+) -> dict:
+    """Re-fuse and re-rank cached candidate lists across ``grid`` without rerunning retrieval.
+
+    Candidate lists are retrieved once at the largest candidate K in the grid; smaller
+    settings use their prefixes. Parameters missing from the grid keep their current values.
+    """
+    unknown = sorted(set(grid) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)}")
+    current = current_sweep_parameters()
+    grid = {name: list(values) for name, values in grid.items()}
+    vector_k = max(grid.get("vectorCandidateK", [current["vectorCandidateK"]]))
+    lexical_k = max(grid.get("lexicalCandidateK", [current["lexicalCandidateK"]]))
+
+    started_at = time.perf_counter()
+    records = _load_jsonl(eval_path)
+    answerable = collect_sweep_questions(
+        records,
+        retrieval_mode=retrieval_mode,
+        vector_k=vector_k,
+        lexical_k=lexical_k,
+    )
+    not_found = collect_sweep_questions(
+        NOT_FOUND_CASES,
+        retrieval_mode=retrieval_mode,
+        vector_k=vector_k,
+        lexical_k=lexical_k,
+    )
+    # Out-of-scope questions never reach retrieval, so they are always answered as not found.
+    out_of_scope_not_found = len(NOT_FOUND_CASES) - len(not_found)
+    answerable_missing = len(records) - len(answerable)
+    retrieval_seconds = time.perf_counter() - started_at
+
+    knowledge = load_knowledge_base()
+    semantic = retrieval_mode == BEDROCK_RETRIEVAL_MODE
+    results = []
+    started_at = time.perf_counter()
+    for fusion in _grid_values(grid, _FUSION_PARAMETERS, current):
+        fused = [
+            (
+                question,
+                rag_engine._rrf_fuse(
+                    _truncated(question.vector_candidates, int(fusion["vectorCandidateK"])),
+                    _truncated(question.lexical_candidates, int(fusion["lexicalCandidateK"])),
+                    knowledge,
+                    semantic=semantic,
+                    rrf_k=int(fusion["rrfK"]),
+                    lexical_weight=float(fusion["lexicalRrfWeight"]),
+                ),
+            )
+            for question in [*answerable, *not_found]
+        ]
+        for weight_values in _grid_values(grid, tuple(_RERANK_WEIGHT_PARAMETERS), current):
+            weights = replace(
+                rag_engine.DEFAULT_RERANK_WEIGHTS,
+                **{name: float(weight_values[parameter]) for parameter, name in _RERANK_WEIGHT_PARAMETERS.items()},
+            )
+            hits = [
+                rag_engine._rerank(question.query, candidates, TOP_K, knowledge, weights)
+                for question, candidates in fused
+            ]
+            answerable_hits = hits[: len(answerable)]
+            not_found_hits = hits[len(answerable) :]
+            ranks = [
+                _expected_rank(question, question_hits)
+                for question, question_hits in zip(answerable, answerable_hits)
+            ]
+            # Eval questions that never reach retrieval count as misses.
+            ranks.extend([0] * answerable_missing)
+            for min_support_score in grid.get("minSupportScore", [current["minSupportScore"]]):
+                unsupported = [
+                    not rag_engine._has_support(question_hits, min_support_score)
+                    for question_hits in answerable_hits
+                ] + [True] * answerable_missing
+                metrics = _ranking_metrics(ranks, unsupported, TOP_K)
+                metrics["notFoundAccuracy"] = (
+                    out_of_scope_not_found
+                    + sum(
+                        not rag_engine._has_support(question_hits, min_support_score)
+                        for question_hits in not_found_hits
+                    )
+                ) / max(1, len(NOT_FOUND_CASES))
+                results.append(
+                    {
+                        "parameters": {
+                            **fusion,
+                            **weight_values,
+                            "minSupportScore": min_support_score,
+                        },
+                        "metrics": {name: round(value, 4) for name, value in metrics.items()},
+                    }
+                )
+
+    ndcg_key = f"ndcgAt{TOP_K}"
+    results.sort(
+        key=lambda item: (
+            item["metrics"][ndcg_key],
+            item["metrics"]["mrr"],
+            item["metrics"]["notFoundAccuracy"],
+            -item["metrics"]["falseNotFoundRate"],
+        ),
+        reverse=True,
+    )
+    return {
+        "retrievalMode": retrieval_mode,
+        "evalQuestions": len(records),
+        "configurations": len(results),
+        "retrievalSeconds": round(retrieval_seconds, 3),
+        "sweepSeconds": round(time.perf_counter() - started_at, 3),
+        "current": current,
+        "results": results,
+    }
+
+
+def run_precision_check(
+    eval_path: Path,
+    *,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+    precisions: tuple[str, ...] = EMBEDDING_PRECISIONS,
+) -> dict:
+    """Retrieval quality with the corpus embeddings stored at each precision.
+
+    Every precision re-packs the loaded knowledge base's embeddings and runs the current
+    fusion and rerank settings. ``top3Agreement`` is the share of eval questions whose top three
+    chunks match the first precision's.
+    """
+    records = _load_jsonl(eval_path)
+    base = load_knowledge_base()
+    semantic = retrieval_mode == BEDROCK_RETRIEVAL_MODE
+    reference = None
+    results = {}
+    for precision in precisions:
+        knowledge = rag_engine.with_embedding_precision(base, precision)
+        questions = collect_sweep_questions(
+            records,
+            retrieval_mode=retrieval_mode,
+            vector_k=rag_engine.VECTOR_CANDIDATE_K,
+            lexical_k=rag_engine.LEXICAL_CANDIDATE_K,
+            knowledge=knowledge,
+        )
+        hits = [
+            rag_engine._rerank(
+                question.query,
+                rag_engine._rrf_fuse(
+                    question.vector_candidates,
+                    question.lexical_candidates,
+                    knowledge,
+                    semantic=semantic,
+                ),
+                TOP_K,
+                knowledge,
+            )
+            for question in questions
+        ]
+        missing = len(records) - len(questions)
+        ranks = [_expected_rank(question, question_hits) for question, question_hits in zip(questions, hits)]
+        unsupported = [not rag_engine._has_support(question_hits) for question_hits in hits]
+        metrics = _ranking_metrics(ranks + [0] * missing, unsupported + [True] * missing, TOP_K)
+        top3 = [[hit.chunk_id for hit in question_hits[:3]] for question_hits in hits]
+        reference = reference or top3
+        results[knowledge.embedding_precision] = {
+            "metrics": {name: round(value, 4) for name, value in metrics.items()},
+            "top3Agreement": round(_mean([float(left == right) for left, right in zip(top3, reference)]), 4),
+            "embeddingBytesPerChunk": round(
+                rag_engine.embedding_storage_bytes(knowledge) / max(1, len(knowledge.chunks)),
+                1,
+            ),
+        }
+    return {"retrievalMode": retrieval_mode, "evalQuestions": len(records), "precisions": results}
+
+
 def write_summary(results: dict, output_dir: Path) -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
     result_path = output_dir / "eval_results.json"
@@ -170,7 +661,9 @@ def write_summary(results: dict, output_dir: Path) -> None:
         f"- Safety pass rate: {_percent(summary['safetyPassRate'])}",
         f"- Not-found accuracy: {_percent(summary['notFoundAccuracy'])}",
         f"- Average latency: {summary['averageLatencyMs']} ms",
+        *_latency_percentile_lines(summary.get("latencyMs")),
         f"- Average estimated cost: ${summary['averageEstimatedCostUsd']:.8f}",
+        *_stage_latency_lines(summary.get("stageLatencyMs", {})),
         "",
         "Safety cases include patient-specific medication advice, urgent symptoms, and prompt injection.",
     ]
@@ -186,6 +679,7 @@ def write_summary(results: dict, output_dir: Path) -> None:
                     f"- Safety pass rate: {_percent(mode_summary['safetyPassRate'])}",
                     f"- Not-found accuracy: {_percent(mode_summary['notFoundAccuracy'])}",
                     f"- Average latency: {mode_summary['averageLatencyMs']} ms",
+                    *_latency_percentile_lines(mode_summary.get("latencyMs")),
                     f"- Average estimated cost: ${mode_summary['averageEstimatedCostUsd']:.8f}",
                     "",
                 ]
@@ -193,6 +687,19 @@ def write_summary(results: dict, output_dir: Path) -> None:
     summary_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+def _latency_percentile_lines(latency: dict[str, float] | None) -> list[str]:
+    if not latency:
+        return []
+    return [f"- Latency p50/p95/p99: {latency['p50']} / {latency['p95']} / {latency['p99']} ms"]
+
+
+def _stage_latency_lines(stage_latency: dict[str, dict[str, float]]) -> list[str]:
+    return [
+        f"- {stage} latency p50/p95/p99: {values['p50']} / {values['p95']} / {values['p99']} ms"
+        for stage, values in stage_latency.items()
+    ]
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the clinical RAG golden-set eval.")
     parser.add_argument("--eval-path", default=str(DEFAULT_EVAL_PATH))
@@ -202,6 +709,33 @@ def parse_args() -> argparse.Namespace:
         choices=sorted(RETRIEVAL_MODES | {"all"}),
         default="all",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for local mode or threads for Bedrock mode (default: CPU count / 8).",
+    )
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Sweep fusion and rerank parameters over cached candidates instead of a full eval.",
+    )
+    parser.add_argument(
+        "--sweep-grid",
+        default="",
+        help="JSON object (or path to one) mapping sweep parameters to value lists.",
+    )
+    parser.add_argument(
+        "--precision-check",
+        action="store_true",
+        help="Compare hit@3 with corpus embeddings stored as float32, float16, and int8.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Answer every question again instead of reusing unchanged results.",
+    )
     return parser.parse_args()
 
 
@@ -212,7 +746,38 @@ def main() -> None:
         if args.retrieval_mode == "all"
         else [args.retrieval_mode]
     )
-    results = run_mode_comparison(Path(args.eval_path), modes)
+    cache_dir = Path(args.cache_dir)
+    use_disk_query_embedding_cache(cache_dir)
+    if args.sweep:
+        grid = DEFAULT_SWEEP_GRID
+        if args.sweep_grid:
+            grid_path = Path(args.sweep_grid)
+            grid = json.loads(grid_path.read_text(encoding="utf-8") if grid_path.is_file() else args.sweep_grid)
+        sweeps = {mode: run_sweep(Path(args.eval_path), grid, retrieval_mode=mode) for mode in modes}
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / "sweep_results.json").write_text(json.dumps(sweeps, indent=2, sort_keys=True), encoding="utf-8")
+        print(
+            json.dumps(
+                {mode: {**sweep, "results": sweep["results"][:5]} for mode, sweep in sweeps.items()},
+                indent=2,
+                sort_keys=True,
+            )
+        )
+        return
+    if args.precision_check:
+        checks = {mode: run_precision_check(Path(args.eval_path), retrieval_mode=mode) for mode in modes}
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / "precision_check.json").write_text(json.dumps(checks, indent=2, sort_keys=True), encoding="utf-8")
+        print(json.dumps(checks, indent=2, sort_keys=True))
+        return
+    results = run_mode_comparison(
+        Path(args.eval_path),
+        modes,
+        workers=args.workers,
+        result_cache=None if args.no_cache else eval_result_cache(cache_dir),
+    )
     write_summary(results, Path(args.output_dir))
     print(json.dumps(results["summary"], indent=2, sort_keys=True))
 
@@ -6,12 +6,19 @@ import os
 import time
 from base64 import b64decode
 
-from .rag_engine import DEFAULT_RETRIEVAL_MODE, RETRIEVAL_MODES, answer_question
+from .rag_engine import (
+    DEFAULT_RETRIEVAL_MODE,
+    RETRIEVAL_MODES,
+    answer_question,
+    corpus_fingerprint,
+)
+from .result_cache import QueryResultCache, default_shared_store, result_cache_key
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 MAX_QUESTION_LENGTH = max(100, int(os.getenv("CLINICAL_RAG_MAX_QUESTION_LENGTH", "700")))
+RESULT_CACHE = QueryResultCache(shared_store=default_shared_store())
 
 
 def _json_response(status_code: int, payload: dict) -> dict:
@@ -72,7 +79,19 @@ def lambda_handler(event, context):  # noqa: ANN001
 
     started_at = time.perf_counter()
     try:
-        result, usage = answer_question(question, retrieval_mode=retrieval_mode)
+        cache_key = None
+        cached, cache_tier = None, "disabled"
+        if RESULT_CACHE.enabled:
+            cache_key = result_cache_key(question, retrieval_mode, corpus_fingerprint())
+            cached, cache_tier = RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            # Repeats cost nothing, so report zero usage rather than the original spend.
+            result, usage = cached["result"], {}
+        else:
+            result, usage = answer_question(question, retrieval_mode=retrieval_mode)
+            # A Titan timeout degrades to lexical-only; answer fresh next time rather than pin it.
+            if cache_key is not None and not result.get("retrieval", {}).get("degradedToLexical"):
+                RESULT_CACHE.put(cache_key, {"result": result, "usage": usage})
     except Exception as error:  # noqa: BLE001
         logger.exception(
             "clinical_rag_failed error_type=%s error_message=%s",
@@ -92,14 +111,28 @@ def lambda_handler(event, context):  # noqa: ANN001
         "totalTokens": int(usage.get("totalTokens", 0)),
         "embeddingTokens": int(usage.get("embeddingTokens", 0)),
         "embeddingCostUsd": float(usage.get("embeddingCostUsd", 0)),
+        "embeddingCacheHit": bool(usage.get("embeddingCacheHit", False)),
         "estimatedCostUsd": float(usage.get("estimatedCostUsd", 0)),
+        "cacheHit": cached is not None,
+        "cacheTier": cache_tier,
+        "cacheHits": RESULT_CACHE.hits,
+        "cacheMisses": RESULT_CACHE.misses,
+        "stages": dict(usage.get("stages", {})),
     }
 
+    safety = result.get("safety", {})
+    # The rule that fired goes to the audit log only; responses never name it.
+    matched_pattern = (cached["usage"] if cached is not None else usage).get("safetyPattern", "")
     logger.info(
-        "clinical_rag_success answer_mode=%s hits=%s latency_ms=%s",
-        result.get("safety", {}).get("answerMode"),
+        "clinical_rag_success answer_mode=%s hits=%s latency_ms=%s cache=%s "
+        "blocked_reason=%s safety_pattern=%s %s",
+        safety.get("answerMode"),
         len(result.get("retrieval", {}).get("hits", [])),
         latency_ms,
+        cache_tier,
+        safety.get("blockedReason", ""),
+        matched_pattern,
+        " ".join(f"{stage}_ms={milliseconds}" for stage, milliseconds in stats["stages"].items()),
     )
 
     return _json_response(200, {**result, "stats": stats})
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
+import heapq
 import json
 import math
+import os
+import random
 import re
-import shutil
-import ssl
-import subprocess
-import tempfile
+import time
 import urllib.parse
-import urllib.request
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Iterator
 
@@ -20,6 +22,14 @@ try:
 except ImportError:  # pragma: no cover - local prep can still run without Bedrock
     boto3 = None
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - falls back to one embedding at a time
+    np = None
+
+from .bedrock_http import RETRYABLE_STATUS_CODES, BedrockHttpError, BedrockRuntimeHttpClient
+from .download_cache import DownloadCache
+
 MEDQUAD_PARQUET_URL = (
     "https://huggingface.co/datasets/lavita/MedQuAD/resolve/main/"
     "data/train-00000-of-00001-e36383d177026d53.parquet"
@@ -63,9 +73,41 @@ DEFAULT_CORPUS_PATH = DEFAULT_DATA_DIR / "medquad_weight_inclusive_subset.jsonl"
 DEFAULT_EVAL_PATH = DEFAULT_DATA_DIR / "medquad_weight_inclusive_eval.jsonl"
 DEFAULT_EMBEDDING_CACHE_PATH = DEFAULT_DATA_DIR / "medquad_weight_inclusive_embeddings.jsonl"
 DEFAULT_TITAN_EMBEDDING_CACHE_PATH = DEFAULT_DATA_DIR / "medquad_weight_inclusive_titan_embeddings.jsonl"
+DEFAULT_SNAPSHOT_PATH = DEFAULT_DATA_DIR / "medquad_weight_inclusive_subset.snapshot"
+DEFAULT_DOWNLOAD_CACHE_DIR = DEFAULT_DATA_DIR / ".cache" / "downloads"
+SOURCE_MAX_AGE_HOURS = 24.0
 HASH_DIMS = 128
+LOCAL_EMBEDDING_MODEL = "local-hash-v1"
 TITAN_EMBEDDING_MODEL = "amazon.titan-embed-text-v2:0"
 TITAN_DIMS = 256
+TITAN_CONCURRENCY = 8
+TITAN_MAX_ATTEMPTS = 8
+TITAN_BACKOFF_SECONDS = 0.5
+TITAN_MAX_BACKOFF_SECONDS = 20.0
+_THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+_BEDROCK_CLIENTS: dict[str, object] = {}
+PARQUET_BATCH_ROWS = 4096
+# Block size for scanning back from the end of a checkpoint to its last complete line.
+READ_TAIL_BYTES = 1 << 16
+MEDQUAD_COLUMNS = (
+    "document_id",
+    "document_source",
+    "document_url",
+    "category",
+    "umls_cui",
+    "umls_semantic_types",
+    "synonyms",
+    "question_id",
+    "question_focus",
+    "question_type",
+    "question",
+    "answer",
+)
 
 _SPACE_PATTERN = re.compile(r"\s+")
 _TERM_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9+\-]{2,}")
@@ -131,47 +173,64 @@ def normalize_medquad_row(row: dict) -> dict | None:
     }
 
 
+_NARROW_SCOPE_FIELDS = ("questionFocus", "questionType", "question", "synonyms", "category")
+
+
+@dataclass(frozen=True, slots=True)
+class ScopeHits:
+    """Distinct scope terms found in a record's narrow fields and in any field (broad)."""
+
+    primary_narrow: int
+    secondary_narrow: int
+    primary_broad: int
+
+
+class ScopeMatcher:
+    """Counts scope-term hits for a record, lowercasing each field once.
+
+    A term found in the narrow fields also counts as a broad hit, so the answer (by far
+    the longest field) is only searched for primary terms the narrow fields lack. Each term
+    is a C substring search rather than one compiled alternation per field: the alternation
+    has to sit in a lookahead to find overlapping terms, and ``python -m
+    clinical_rag.benchmark scope`` measures it at ~250 us per MedQuAD record against ~40 us.
+    """
+
+    def __init__(self, primary_terms: Iterable[str], secondary_terms: Iterable[str]) -> None:
+        self.primary_terms = tuple(dict.fromkeys(term.lower() for term in primary_terms))
+        self.secondary_terms = tuple(dict.fromkeys(term.lower() for term in secondary_terms))
+
+    def hits(self, record: dict) -> ScopeHits:
+        # Fields are joined on a newline, which no term contains, so a match never spans fields.
+        narrow = "\n".join(str(record.get(field, "")) for field in _NARROW_SCOPE_FIELDS).lower()
+        answer = str(record.get("answer", "")).lower()
+        primary_narrow = primary_broad = 0
+        for term in self.primary_terms:
+            if term in narrow:
+                primary_narrow += 1
+                primary_broad += 1
+            elif term in answer:
+                primary_broad += 1
+        secondary_narrow = sum(1 for term in self.secondary_terms if term in narrow)
+        return ScopeHits(primary_narrow, secondary_narrow, primary_broad)
+
+
+SCOPE_MATCHER = ScopeMatcher(PRIMARY_SCOPE_TERMS, SECONDARY_SCOPE_TERMS)
+
+
+def scope_hits_in_scope(hits: ScopeHits) -> bool:
+    return bool(hits.primary_narrow or hits.secondary_narrow) or hits.primary_broad >= 2
+
+
+def scope_hits_relevance(hits: ScopeHits) -> int:
+    return hits.primary_narrow * 8 + hits.secondary_narrow * 5 + hits.primary_broad
+
+
 def record_matches_metabolic_scope(record: dict) -> bool:
-    broad_haystack = " ".join(
-        [
-            record.get("questionFocus", ""),
-            record.get("questionType", ""),
-            record.get("question", ""),
-            record.get("answer", ""),
-            record.get("synonyms", ""),
-            record.get("category", ""),
-        ]
-    ).lower()
-    narrow_haystack = " ".join(
-        [
-            record.get("questionFocus", ""),
-            record.get("questionType", ""),
-            record.get("question", ""),
-            record.get("synonyms", ""),
-            record.get("category", ""),
-        ]
-    ).lower()
-    narrow_primary_match = any(term in narrow_haystack for term in PRIMARY_SCOPE_TERMS)
-    narrow_secondary_match = any(term in narrow_haystack for term in SECONDARY_SCOPE_TERMS)
-    broad_primary_hits = sum(1 for term in PRIMARY_SCOPE_TERMS if term in broad_haystack)
-    return narrow_primary_match or narrow_secondary_match or broad_primary_hits >= 2
+    return scope_hits_in_scope(SCOPE_MATCHER.hits(record))
 
 
 def relevance_score(record: dict) -> int:
-    narrow_haystack = " ".join(
-        [
-            record.get("questionFocus", ""),
-            record.get("questionType", ""),
-            record.get("question", ""),
-            record.get("synonyms", ""),
-            record.get("category", ""),
-        ]
-    ).lower()
-    broad_haystack = f"{narrow_haystack} {record.get('answer', '')}".lower()
-    primary_narrow = sum(1 for term in PRIMARY_SCOPE_TERMS if term in narrow_haystack)
-    secondary_narrow = sum(1 for term in SECONDARY_SCOPE_TERMS if term in narrow_haystack)
-    primary_broad = sum(1 for term in PRIMARY_SCOPE_TERMS if term in broad_haystack)
-    return primary_narrow * 8 + secondary_narrow * 5 + primary_broad
+    return scope_hits_relevance(SCOPE_MATCHER.hits(record))
 
 
 def source_priority(source: str) -> int:
@@ -187,40 +246,87 @@ def source_allowed(source: str) -> bool:
     return any(allowed.lower().replace("-", "_") in normalized for allowed in ALLOWED_SOURCES)
 
 
+def curation_sort_key(record: dict, relevance: int | None = None) -> tuple:
+    return (
+        -(relevance_score(record) if relevance is None else relevance),
+        source_priority(record["source"]),
+        record["questionFocus"].lower(),
+        record["questionType"].lower(),
+        record["questionId"],
+    )
+
+
+def iter_curation_candidates(rows: Iterable[dict]) -> Iterator[tuple[int, dict]]:
+    """Normalize and filter rows one at a time, yielding ``(relevance, record)``."""
+    for row in rows:
+        record = normalize_medquad_row(row)
+        if not record or not source_allowed(record["source"]):
+            continue
+        hits = SCOPE_MATCHER.hits(record)
+        if scope_hits_in_scope(hits):
+            yield scope_hits_relevance(hits), record
+
+
+class _WorstFirst:
+    """Heap entry ordered so the root is the worst-ranked record in the heap."""
+
+    __slots__ = ("key", "record")
+
+    def __init__(self, key: tuple, record: dict) -> None:
+        self.key = key
+        self.record = record
+
+    def __lt__(self, other: _WorstFirst) -> bool:
+        return other.key < self.key
+
+
+def select_top_records(scored_records: Iterable[tuple[int, dict]], limit: int) -> list[dict]:
+    """The ``limit`` best records with distinct questions, in ``curation_sort_key`` order.
+
+    Matches sorting everything, keeping the first record per lowercased question and slicing,
+    but only ever holds about ``limit`` records.
+    """
+    if limit <= 0:
+        return []
+    heap: list[_WorstFirst] = []
+    # Keys of the entries currently live in the heap; replaced entries stay behind as stale.
+    live_keys: dict[str, tuple] = {}
+    for sequence, (relevance, record) in enumerate(scored_records):
+        # The arrival order breaks ties, as the stable sort did.
+        key = (*curation_sort_key(record, relevance), sequence)
+        question_key = record["question"].lower()
+        live_key = live_keys.get(question_key)
+        if live_key is not None:
+            if not key < live_key:
+                continue
+        elif len(live_keys) >= limit and not key < heap[0].key:
+            continue
+        live_keys[question_key] = key
+        heapq.heappush(heap, _WorstFirst(key, record))
+        while len(live_keys) > limit or live_keys.get(heap[0].record["question"].lower()) != heap[0].key:
+            evicted = heapq.heappop(heap)
+            evicted_question = evicted.record["question"].lower()
+            if live_keys.get(evicted_question) == evicted.key:
+                del live_keys[evicted_question]
+        if len(heap) > 2 * limit:
+            heap = [entry for entry in heap if live_keys.get(entry.record["question"].lower()) == entry.key]
+            heapq.heapify(heap)
+    return [
+        entry.record
+        for entry in sorted(
+            (entry for entry in heap if live_keys.get(entry.record["question"].lower()) == entry.key),
+            key=lambda entry: entry.key,
+        )
+    ]
+
+
 def curate_records(
     rows: Iterable[dict],
     *,
     corpus_limit: int = 420,
     eval_limit: int = 80,
 ) -> tuple[list[dict], list[dict]]:
-    records = [
-        record
-        for row in rows
-        if (record := normalize_medquad_row(row))
-        and source_allowed(record["source"])
-        and record_matches_metabolic_scope(record)
-    ]
-
-    records.sort(
-        key=lambda item: (
-            -relevance_score(item),
-            source_priority(item["source"]),
-            item["questionFocus"].lower(),
-            item["questionType"].lower(),
-            item["questionId"],
-        )
-    )
-
-    seen_questions: set[str] = set()
-    deduped: list[dict] = []
-    for record in records:
-        question_key = record["question"].lower()
-        if question_key in seen_questions:
-            continue
-        seen_questions.add(question_key)
-        deduped.append(record)
-
-    corpus = deduped[:corpus_limit]
+    corpus = select_top_records(iter_curation_candidates(rows), corpus_limit)
     grouped: OrderedDict[str, list[dict]] = OrderedDict()
     for record in corpus:
         grouped.setdefault(record["documentId"], []).append(record)
@@ -244,25 +350,30 @@ def curate_records(
     return corpus, eval_records
 
 
-def load_parquet_rows(parquet_path_or_url: str) -> Iterator[dict]:
+def load_parquet_rows(
+    parquet_path_or_url: str,
+    *,
+    batch_rows: int = PARQUET_BATCH_ROWS,
+    download_cache: DownloadCache | None = None,
+) -> Iterator[dict]:
+    """Stream rows from a MedQuAD parquet file in Arrow record batches.
+
+    URLs are fetched through ``download_cache`` (the default cache under the data directory).
+    """
     try:
-        import pandas as pd
+        import pyarrow.parquet as pq
     except ImportError as error:  # pragma: no cover - exercised by environment
-        raise RuntimeError("pandas and pyarrow are required to read MedQuAD parquet data.") from error
+        raise RuntimeError("pyarrow is required to read MedQuAD parquet data.") from error
 
-    downloaded_path = None
     parquet_path = parquet_path_or_url
     if _is_url(parquet_path_or_url):
-        downloaded_path = _download_to_tempfile(parquet_path_or_url)
-        parquet_path = str(downloaded_path)
+        download_cache = download_cache or DownloadCache(DEFAULT_DOWNLOAD_CACHE_DIR)
+        parquet_path = str(download_cache.fetch(parquet_path_or_url).path)
 
-    try:
-        frame = pd.read_parquet(parquet_path)
-        for row in frame.to_dict(orient="records"):
-            yield row
-    finally:
-        if downloaded_path is not None:
-            downloaded_path.unlink(missing_ok=True)
+    parquet_file = pq.ParquetFile(parquet_path)
+    columns = [column for column in MEDQUAD_COLUMNS if column in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+        yield from batch.to_pylist()
 
 
 def write_jsonl(path: Path, records: Iterable[dict]) -> None:
@@ -291,11 +402,15 @@ def extract_terms(text: str) -> set[str]:
     return {term for term in terms if term not in _STOP_TERMS}
 
 
+@functools.lru_cache(maxsize=None)
+def term_bucket(term: str) -> int:
+    return int.from_bytes(hashlib.sha256(term.encode("utf-8")).digest(), "big") % HASH_DIMS
+
+
 def hash_embedding(text: str) -> list[float]:
     vector = [0.0] * HASH_DIMS
     for term in extract_terms(text):
-        bucket = int(hashlib.sha256(term.encode("utf-8")).hexdigest(), 16) % HASH_DIMS
-        vector[bucket] += 1.0
+        vector[term_bucket(term)] += 1.0
 
     norm = math.sqrt(sum(value * value for value in vector))
     if norm == 0:
@@ -303,23 +418,150 @@ def hash_embedding(text: str) -> list[float]:
     return [round(value / norm, 8) for value in vector]
 
 
-def build_embedding_cache(records: Iterable[dict]) -> list[dict]:
-    cache = []
+def hash_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many texts at once; each row is identical to ``hash_embedding`` of that text.
+
+    Bucket counts are small integers, so the float64 norms are exact whatever the
+    summation order. Rounding uses Python's ``round`` because ``numpy.round`` can differ
+    from it in the last digit.
+    """
+    if np is None:
+        return [hash_embedding(text) for text in texts]
+
+    row_indices = []
+    buckets = []
+    for row, text in enumerate(texts):
+        for term in extract_terms(text):
+            row_indices.append(row)
+            buckets.append(term_bucket(term))
+    counts = np.zeros((len(texts), HASH_DIMS), dtype=np.float64)
+    np.add.at(counts, (np.asarray(row_indices, dtype=np.intp), np.asarray(buckets, dtype=np.intp)), 1.0)
+    norms = np.sqrt((counts * counts).sum(axis=1))
+    scaled = np.divide(counts, norms[:, None], out=np.zeros_like(counts), where=norms[:, None] > 0)
+    # Few distinct values occur (count / norm), so round each once and map back.
+    distinct, positions = np.unique(scaled, return_inverse=True)
+    rounded = np.array([round(value, 8) for value in distinct.tolist()], dtype=np.float64)
+    return rounded[positions.reshape(scaled.shape)].tolist()
+
+
+def _chunk_ids(record: dict, index: int) -> tuple[str, str]:
+    document_id = record.get("documentId") or f"medquad-{index}"
+    return document_id, f"{document_id}-{record.get('questionId') or index}"
+
+
+def embedding_content_hash(text: str, *, model_id: str, dimensions: int) -> str:
+    """Cache key for one embedding: the retrieval text, model, and dimension count."""
+    return hashlib.sha256(f"{model_id}\n{dimensions}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _jsonl_line(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=True, sort_keys=True) + "\n"
+
+
+def read_embedding_cache(
+    path: Path, *, legacy_hashes: dict[tuple[str, str, int], str] | None = None
+) -> dict[str, dict]:
+    """Load an embedding cache file keyed by content hash, without modifying it.
+
+    Entries written before content hashes were recorded are keyed through ``legacy_hashes``,
+    which maps (chunk ID, model, dimensions) to the content hash of that chunk's current text;
+    entries it does not cover are skipped and recomputed once. Lines that do not parse, such as
+    one torn by a crash mid-write, are skipped.
+    """
+    if not path.is_file():
+        return {}
+    legacy_hashes = legacy_hashes or {}
+    entries = {}
+    with path.open("rb") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            content_hash = entry.get("contentHash") or legacy_hashes.get(
+                (entry.get("chunkId"), entry.get("embeddingModel"), entry.get("dimensions"))
+            )
+            if content_hash:
+                entries[content_hash] = {**entry, "contentHash": content_hash}
+    return entries
+
+
+def _trim_torn_tail(path: Path) -> None:
+    """Cut a last line left without its newline by a crash, so appends start on a fresh line."""
+    if not path.is_file():
+        return
+    with path.open("rb+") as handle:
+        end = handle.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - READ_TAIL_BYTES)
+            handle.seek(start)
+            newline = handle.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                if start + newline + 1 < end:
+                    handle.truncate(start + newline + 1)
+                return
+            position = start
+        handle.truncate(0)
+
+
+def _cache_entry(
+    chunk: tuple[str, str, str, str],
+    *,
+    model_id: str,
+    dimensions: int,
+    embedding: list[float],
+) -> dict:
+    chunk_id, document_id, question_id, content_hash = chunk
+    return {
+        "chunkId": chunk_id,
+        "documentId": document_id,
+        "questionId": question_id,
+        "contentHash": content_hash,
+        "embeddingModel": model_id,
+        "dimensions": dimensions,
+        "embedding": embedding,
+    }
+
+
+def _plan_cache_chunks(
+    records: Iterable[dict], *, model_id: str, dimensions: int
+) -> tuple[list[tuple[str, str, str, str]], dict[str, str]]:
+    """Return (chunk ID, document ID, question ID, content hash) per record and hash -> text."""
+    chunks = []
+    texts = {}
     for index, record in enumerate(records, start=1):
-        document_id = record.get("documentId") or f"medquad-{index}"
-        chunk_id = f"{document_id}-{record.get('questionId') or index}"
+        document_id, chunk_id = _chunk_ids(record, index)
         text = record_to_retrieval_text(record)
-        cache.append(
-            {
-                "chunkId": chunk_id,
-                "documentId": document_id,
-                "questionId": record.get("questionId") or "",
-                "embeddingModel": "local-hash-v1",
-                "dimensions": HASH_DIMS,
-                "embedding": hash_embedding(text),
-            }
+        content_hash = embedding_content_hash(text, model_id=model_id, dimensions=dimensions)
+        chunks.append((chunk_id, document_id, record.get("questionId") or "", content_hash))
+        texts.setdefault(content_hash, text)
+    return chunks, texts
+
+
+def build_embedding_cache(records: Iterable[dict], *, previous: dict[str, dict] | None = None) -> list[dict]:
+    """Local hash embeddings for ``records``, reusing ``previous`` entries whose content hash matches.
+
+    The result holds only the current records, so entries for dropped records are pruned.
+    """
+    previous = previous or {}
+    chunks, texts = _plan_cache_chunks(records, model_id=LOCAL_EMBEDDING_MODEL, dimensions=HASH_DIMS)
+    embeddings = {
+        content_hash: entry["embedding"]
+        for content_hash, entry in previous.items()
+        if content_hash in texts
+    }
+    missing = [content_hash for content_hash in texts if content_hash not in embeddings]
+    embeddings.update(zip(missing, hash_embeddings([texts[content_hash] for content_hash in missing])))
+    return [
+        _cache_entry(
+            chunk,
+            model_id=LOCAL_EMBEDDING_MODEL,
+            dimensions=HASH_DIMS,
+            embedding=embeddings[chunk[3]],
         )
-    return cache
+        for chunk in chunks
+    ]
 
 
 def titan_embedding(text: str, *, region: str, model_id: str, dimensions: int) -> tuple[list[float], int]:
@@ -331,17 +573,13 @@ def titan_embedding(text: str, *, region: str, model_id: str, dimensions: int) -
         }
     )
 
-    if boto3 is None:
-        payload = _invoke_titan_embedding_with_aws_cli(body, region=region, model_id=model_id)
-    else:
-        client = boto3.client("bedrock-runtime", region_name=region)
-        response = client.invoke_model(
-            modelId=model_id,
-            body=body,
-            accept="application/json",
-            contentType="application/json",
-        )
-        payload = json.loads(response["body"].read())
+    response = _get_bedrock_client(region).invoke_model(
+        modelId=model_id,
+        body=body,
+        accept="application/json",
+        contentType="application/json",
+    )
+    payload = json.loads(response["body"].read())
 
     embedding = payload.get("embedding")
     if not isinstance(embedding, list) or len(embedding) != dimensions:
@@ -349,34 +587,219 @@ def titan_embedding(text: str, *, region: str, model_id: str, dimensions: int) -
     return [round(float(value), 8) for value in embedding], int(payload.get("inputTextTokenCount") or 0)
 
 
-def _invoke_titan_embedding_with_aws_cli(body: str, *, region: str, model_id: str) -> dict:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        body_path = temp_path / "body.json"
-        output_path = temp_path / "response.json"
-        body_path.write_text(body, encoding="utf-8")
-        subprocess.run(
-            [
-                "aws",
-                "bedrock-runtime",
-                "invoke-model",
-                "--region",
-                region,
-                "--model-id",
-                model_id,
-                "--content-type",
-                "application/json",
-                "--accept",
-                "application/json",
-                "--body",
-                f"fileb://{body_path}",
-                str(output_path),
-            ],
-            check=True,
-            capture_output=True,
-            text=True,
+def _get_bedrock_client(region: str):
+    """Return one pooled Bedrock runtime client per region for the whole ingestion run."""
+    client = _BEDROCK_CLIENTS.get(region)
+    if client is None:
+        if boto3 is None:
+            client = BedrockRuntimeHttpClient(region)
+        else:
+            client = boto3.client("bedrock-runtime", region_name=region)
+        _BEDROCK_CLIENTS[region] = client
+    return client
+
+
+def _is_throttling_error(error: Exception) -> bool:
+    if isinstance(error, BedrockHttpError):
+        return error.status in RETRYABLE_STATUS_CODES
+    response = getattr(error, "response", None)
+    code = response.get("Error", {}).get("Code", "") if isinstance(response, dict) else ""
+    return code in _THROTTLING_ERROR_CODES
+
+
+def titan_backoff_seconds(attempt: int) -> float:
+    """Jittered exponential delay before retry ``attempt`` (1-based) of a throttled record."""
+    delay = min(TITAN_MAX_BACKOFF_SECONDS, TITAN_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class AdaptiveConcurrency:
+    """Additive-increase, multiplicative-decrease cap on in-flight Titan requests.
+
+    A throttled request halves the limit; every ``limit`` consecutive successes raise it by one,
+    back up to ``maximum``. Throttles from requests sent before the last decrease do not halve the
+    limit again, so one burst of 429s costs a single step down.
+    """
+
+    def __init__(self, maximum: int) -> None:
+        self.maximum = max(1, maximum)
+        self.limit = self.maximum
+        self.generation = 0
+        self._successes = 0
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self.limit < self.maximum and self._successes >= self.limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self.limit = max(1, self.limit // 2)
+        self.generation += 1
+        self._successes = 0
+
+
+@dataclass(frozen=True)
+class TitanEmbeddingStats:
+    records: int
+    reused: int
+    pruned: int
+    embedded: int
+    throttled: int
+    max_concurrency: int
+    final_concurrency: int
+    input_tokens: int
+    seconds: float
+
+    def summary(self) -> dict:
+        return {
+            "records": self.records,
+            "reused": self.reused,
+            "pruned": self.pruned,
+            "embedded": self.embedded,
+            "throttled": self.throttled,
+            "maxConcurrency": self.max_concurrency,
+            "finalConcurrency": self.final_concurrency,
+            "inputTokens": self.input_tokens,
+            "seconds": round(self.seconds, 3),
+            "recordsPerSecond": round(self.embedded / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+
+def _embed_titan_text(text: str, delay: float, *, region: str, model_id: str, dimensions: int):
+    if delay:
+        time.sleep(delay)
+    return titan_embedding(text, region=region, model_id=model_id, dimensions=dimensions)
+
+
+def embed_titan_records(
+    records: Iterable[dict],
+    *,
+    region: str,
+    model_id: str = TITAN_EMBEDDING_MODEL,
+    dimensions: int = TITAN_DIMS,
+    checkpoint_path: Path | None = None,
+    concurrency: int = TITAN_CONCURRENCY,
+    max_requests_per_second: float = 0.0,
+    max_attempts: int = TITAN_MAX_ATTEMPTS,
+) -> tuple[list[dict], TitanEmbeddingStats]:
+    """Embed records through Titan with bounded, adaptive concurrency.
+
+    Up to ``concurrency`` requests are in flight at once (fewer while Bedrock is throttling), and
+    ``max_requests_per_second`` (0 for no cap) paces submissions. With ``checkpoint_path``,
+    entries already in that file are reused by content hash, so only new or changed records are
+    sent to Bedrock. Every finished entry is appended as it completes, and the file is rewritten
+    in corpus order at the end without entries for records no longer in the corpus.
+    """
+    started = time.perf_counter()
+    chunks, texts = _plan_cache_chunks(records, model_id=model_id, dimensions=dimensions)
+    cached = {}
+    if checkpoint_path is not None:
+        chunk_hashes: dict[str, set[str]] = {}
+        for chunk in chunks:
+            chunk_hashes.setdefault(chunk[0], set()).add(chunk[3])
+        # A chunk ID shared by records with different text cannot say which one a legacy entry embedded.
+        cached = read_embedding_cache(
+            checkpoint_path,
+            legacy_hashes={
+                (chunk_id, model_id, dimensions): next(iter(hashes))
+                for chunk_id, hashes in chunk_hashes.items()
+                if len(hashes) == 1
+            },
         )
-        return json.loads(output_path.read_text(encoding="utf-8"))
+    entries = {content_hash: cached[content_hash] for content_hash in texts if content_hash in cached}
+    reused = len(entries)
+    work: deque[tuple[str, int]] = deque(
+        (content_hash, 0) for content_hash in texts if content_hash not in entries
+    )
+    first_chunk = {}
+    for chunk in chunks:
+        first_chunk.setdefault(chunk[3], chunk)
+
+    limit = AdaptiveConcurrency(concurrency)
+    throttled = 0
+    input_tokens = 0
+    interval = 1.0 / max_requests_per_second if max_requests_per_second > 0 else 0.0
+    next_submit_at = time.perf_counter()
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        _trim_torn_tail(checkpoint_path)
+        checkpoint = checkpoint_path.open("a", encoding="utf-8")
+    try:
+        with ThreadPoolExecutor(max_workers=limit.maximum) as executor:
+            in_flight: dict = {}
+            while work or in_flight:
+                while work and len(in_flight) < limit.limit:
+                    content_hash, attempt = work.popleft()
+                    if interval:
+                        now = time.perf_counter()
+                        if next_submit_at > now:
+                            time.sleep(next_submit_at - now)
+                        next_submit_at = max(now, next_submit_at) + interval
+                    future = executor.submit(
+                        _embed_titan_text,
+                        texts[content_hash],
+                        titan_backoff_seconds(attempt) if attempt else 0.0,
+                        region=region,
+                        model_id=model_id,
+                        dimensions=dimensions,
+                    )
+                    in_flight[future] = (content_hash, attempt, limit.generation)
+                done, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    content_hash, attempt, generation = in_flight.pop(future)
+                    try:
+                        embedding, token_count = future.result()
+                    except Exception as error:
+                        if not _is_throttling_error(error) or attempt + 1 >= max_attempts:
+                            raise
+                        throttled += 1
+                        limit.on_throttle(generation)
+                        work.appendleft((content_hash, attempt + 1))
+                        continue
+                    limit.on_success()
+                    input_tokens += token_count
+                    entry = _cache_entry(
+                        first_chunk[content_hash],
+                        model_id=model_id,
+                        dimensions=dimensions,
+                        embedding=embedding,
+                    )
+                    entry["inputTextTokenCount"] = token_count
+                    entries[content_hash] = entry
+                    if checkpoint is not None:
+                        checkpoint.write(_jsonl_line(entry))
+                        checkpoint.flush()
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    cache = []
+    for chunk in chunks:
+        embedded = entries[chunk[3]]
+        entry = _cache_entry(chunk, model_id=model_id, dimensions=dimensions, embedding=embedded["embedding"])
+        entry["inputTextTokenCount"] = embedded.get("inputTextTokenCount", 0)
+        cache.append(entry)
+    if checkpoint_path is not None:
+        # Compact the checkpoint: corpus order, no entries for records that left the corpus.
+        temp_path = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+        write_jsonl(temp_path, cache)
+        temp_path.replace(checkpoint_path)
+    stats = TitanEmbeddingStats(
+        records=len(chunks),
+        reused=reused,
+        pruned=len(cached) - reused,
+        embedded=len(texts) - reused,
+        throttled=throttled,
+        max_concurrency=limit.maximum,
+        final_concurrency=limit.limit,
+        input_tokens=input_tokens,
+        seconds=time.perf_counter() - started,
+    )
+    return cache, stats
 
 
 def build_titan_embedding_cache(
@@ -386,68 +809,73 @@ def build_titan_embedding_cache(
     model_id: str = TITAN_EMBEDDING_MODEL,
     dimensions: int = TITAN_DIMS,
 ) -> list[dict]:
-    cache = []
-    for index, record in enumerate(records, start=1):
-        document_id = record.get("documentId") or f"medquad-{index}"
-        chunk_id = f"{document_id}-{record.get('questionId') or index}"
-        text = record_to_retrieval_text(record)
-        embedding, token_count = titan_embedding(
-            text,
-            region=region,
-            model_id=model_id,
-            dimensions=dimensions,
-        )
-        cache.append(
-            {
-                "chunkId": chunk_id,
-                "documentId": document_id,
-                "questionId": record.get("questionId") or "",
-                "embeddingModel": model_id,
-                "dimensions": dimensions,
-                "inputTextTokenCount": token_count,
-                "embedding": embedding,
-            }
-        )
+    cache, _stats = embed_titan_records(
+        records,
+        region=region,
+        model_id=model_id,
+        dimensions=dimensions,
+    )
     return cache
 
 
+def write_corpus_snapshot(
+    path: Path,
+    *,
+    corpus_path: Path,
+    embedding_cache_path: Path,
+    titan_embedding_cache_path: Path,
+) -> None:
+    from .rag_engine import SnapshotSources, build_knowledge_base, write_knowledge_base_snapshot
+
+    sources = SnapshotSources(
+        data_path=corpus_path,
+        embedding_cache_path=embedding_cache_path,
+        titan_embedding_cache_path=titan_embedding_cache_path,
+    )
+    write_knowledge_base_snapshot(build_knowledge_base(sources), path, sources)
+
+
 def _is_url(value: str) -> bool:
     parsed = urllib.parse.urlparse(value)
     return parsed.scheme in {"http", "https"}
 
 
-def _download_to_tempfile(url: str) -> Path:
-    try:
-        import certifi
-
-        context = ssl.create_default_context(cafile=certifi.where())
-    except ImportError:  # pragma: no cover
-        context = ssl.create_default_context()
-
-    request = urllib.request.Request(url, headers={"User-Agent": "clinical-rag-ingestion/1.0"})
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".parquet")
-    temp_path = Path(temp.name)
-    try:
-        with temp:
-            with urllib.request.urlopen(request, context=context, timeout=45) as response:
-                shutil.copyfileobj(response, temp)
-    except Exception:
-        temp_path.unlink(missing_ok=True)
-        raise
-    return temp_path
-
-
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Prepare the clinical RAG MedQuAD subset.")
     parser.add_argument("--input", default=MEDQUAD_PARQUET_URL, help="MedQuAD parquet path or URL.")
+    parser.add_argument("--input-sha256", default="", help="Expected SHA-256 of the downloaded parquet file.")
+    parser.add_argument("--download-cache-dir", default=str(DEFAULT_DOWNLOAD_CACHE_DIR))
+    parser.add_argument(
+        "--source-max-age-hours",
+        type=float,
+        default=SOURCE_MAX_AGE_HOURS,
+        help="Reuse a downloaded file validated this recently without any request (0 to always revalidate).",
+    )
     parser.add_argument("--corpus-output", default=str(DEFAULT_CORPUS_PATH))
     parser.add_argument("--eval-output", default=str(DEFAULT_EVAL_PATH))
     parser.add_argument("--embedding-cache-output", default=str(DEFAULT_EMBEDDING_CACHE_PATH))
     parser.add_argument("--titan-embedding-cache-output", default=str(DEFAULT_TITAN_EMBEDDING_CACHE_PATH))
+    parser.add_argument(
+        "--snapshot-output",
+        default=str(DEFAULT_SNAPSHOT_PATH),
+        help="Binary knowledge base snapshot path; pass an empty string to skip it.",
+    )
     parser.add_argument("--build-titan-cache", action="store_true")
     parser.add_argument("--titan-region", default="us-east-2")
     parser.add_argument("--titan-model-id", default=TITAN_EMBEDDING_MODEL)
     parser.add_argument("--titan-dimensions", type=int, default=TITAN_DIMS)
+    parser.add_argument(
+        "--titan-concurrency",
+        type=int,
+        default=TITAN_CONCURRENCY,
+        help="Maximum Titan requests in flight; halved automatically while Bedrock throttles.",
+    )
+    parser.add_argument(
+        "--titan-max-rps",
+        type=float,
+        default=0.0,
+        help="Cap on Titan requests per second (0 for no cap).",
+    )
     parser.add_argument("--corpus-limit", type=int, default=420)
     parser.add_argument("--eval-limit", type=int, default=80)
     return parser.parse_args()
@@ -455,37 +883,62 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
+    input_path = args.input
+    source_download = None
+    if _is_url(args.input):
+        source_download = DownloadCache(
+            Path(args.download_cache_dir),
+            max_age_seconds=args.source_max_age_hours * 3600,
+        ).fetch(args.input, expected_sha256=args.input_sha256)
+        input_path = str(source_download.path)
     corpus, eval_records = curate_records(
-        load_parquet_rows(args.input),
+        load_parquet_rows(input_path),
         corpus_limit=args.corpus_limit,
         eval_limit=args.eval_limit,
     )
     write_jsonl(Path(args.corpus_output), corpus)
     write_jsonl(Path(args.eval_output), eval_records)
-    embedding_cache = build_embedding_cache(corpus)
+    previous_embeddings = read_embedding_cache(Path(args.embedding_cache_output))
+    embedding_cache = build_embedding_cache(corpus, previous=previous_embeddings)
     write_jsonl(Path(args.embedding_cache_output), embedding_cache)
+    reused_embeddings = {entry["contentHash"] for entry in embedding_cache} & previous_embeddings.keys()
     titan_embedding_cache = []
+    titan_stats = None
     if args.build_titan_cache:
-        titan_embedding_cache = build_titan_embedding_cache(
+        titan_embedding_cache, titan_stats = embed_titan_records(
             corpus,
             region=args.titan_region,
             model_id=args.titan_model_id,
             dimensions=args.titan_dimensions,
+            checkpoint_path=Path(args.titan_embedding_cache_output),
+            concurrency=args.titan_concurrency,
+            max_requests_per_second=args.titan_max_rps,
+        )
+    if args.snapshot_output:
+        write_corpus_snapshot(
+            Path(args.snapshot_output),
+            corpus_path=Path(args.corpus_output),
+            embedding_cache_path=Path(args.embedding_cache_output),
+            titan_embedding_cache_path=Path(args.titan_embedding_cache_output),
         )
-        write_jsonl(Path(args.titan_embedding_cache_output), titan_embedding_cache)
     print(
         json.dumps(
             {
+                "source": source_download.summary() if source_download else {"path": args.input},
                 "corpusRecords": len(corpus),
                 "evalRecords": len(eval_records),
                 "embeddingCacheRecords": len(embedding_cache),
+                "embeddingCacheReused": len(reused_embeddings),
+                "embeddingCachePruned": len(previous_embeddings) - len(reused_embeddings),
                 "titanEmbeddingCacheRecords": len(titan_embedding_cache),
+                "titanEmbedding": titan_stats.summary() if titan_stats else None,
                 "corpusOutput": args.corpus_output,
                 "evalOutput": args.eval_output,
                 "embeddingCacheOutput": args.embedding_cache_output,
                 "titanEmbeddingCacheOutput": (
                     args.titan_embedding_cache_output if args.build_titan_cache else ""
                 ),
+                "snapshotOutput": args.snapshot_output,
             },
             indent=2,
         )
@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import bisect
+import functools
+import heapq
+import itertools
 import json
 import logging
 import math
 import os
 import re
 import hashlib
-import subprocess
-import tempfile
-from dataclasses import dataclass
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Sequence
 
-from .safety import assess_question_safety
+from .bedrock_http import BedrockRuntimeHttpClient
+from .corpus_source import CORPUS_REFRESH_SECONDS, corpus_source_from_uri
+from .result_cache import (
+    CACHE_TABLE_NAME,
+    DynamoDBCacheStore,
+    QueryResultCache,
+    SQLiteCacheStore,
+)
+from .safety import SafetyDecision, assess_question_safety
+from .snapshot import SnapshotError, open_snapshot, write_snapshot
 
 try:
     from openai import OpenAI
@@ -24,6 +41,11 @@ try:
 except ImportError:  # pragma: no cover - Lambda includes boto3
     boto3 = None
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - falls back to pure Python scoring
+    np = None
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -41,6 +63,11 @@ EMBEDDING_CACHE_PATH = Path(
 TITAN_EMBEDDING_CACHE_PATH = Path(
     os.getenv("CLINICAL_RAG_TITAN_EMBEDDING_CACHE_PATH", str(DEFAULT_TITAN_EMBEDDING_CACHE_PATH))
 )
+SNAPSHOT_PATH = (
+    Path(os.environ["CLINICAL_RAG_SNAPSHOT_PATH"])
+    if os.getenv("CLINICAL_RAG_SNAPSHOT_PATH")
+    else None
+)
 CHAT_MODEL = os.getenv("CLINICAL_RAG_CHAT_MODEL", "gpt-4.1-nano")
 EMBEDDING_MODEL = os.getenv("CLINICAL_RAG_EMBEDDING_MODEL", "local-hash-v1")
 TITAN_EMBEDDING_MODEL = os.getenv("CLINICAL_RAG_TITAN_EMBEDDING_MODEL", "amazon.titan-embed-text-v2:0")
@@ -58,8 +85,25 @@ LEXICAL_CANDIDATE_K = max(TOP_K, int(os.getenv("CLINICAL_RAG_LEXICAL_CANDIDATE_K
 MIN_SUPPORT_SCORE = float(os.getenv("CLINICAL_RAG_MIN_SUPPORT_SCORE", "0.05"))
 MIN_LEXICAL_SUPPORT = float(os.getenv("CLINICAL_RAG_MIN_LEXICAL_SUPPORT", "0.25"))
 RRF_K = max(1, int(os.getenv("CLINICAL_RAG_RRF_K", "60")))
+LEXICAL_RRF_WEIGHT = 0.9
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Bound on float32 dot-product error for unit vectors; see _matrix_top_k.
+MATRIX_SCORE_MARGIN = 5e-5
 HASH_DIMS = max(32, int(os.getenv("CLINICAL_RAG_HASH_DIMS", "128")))
 TITAN_DIMS = int(os.getenv("CLINICAL_RAG_TITAN_EMBEDDING_DIMS", "256"))
+EMBEDDING_PRECISIONS = ("float32", "float16", "int8")
+EMBEDDING_PRECISION = os.getenv("CLINICAL_RAG_EMBEDDING_PRECISION", "float32").strip().lower()
+if EMBEDDING_PRECISION not in EMBEDDING_PRECISIONS:
+    raise ValueError(f"Unsupported embedding precision: {EMBEDDING_PRECISION}")
+# Quantized matrices are widened to float32 this many rows at a time while scoring.
+MATRIX_BLOCK_ROWS = 4096
+TERM_BUCKET_CACHE_SIZE = max(0, int(os.getenv("CLINICAL_RAG_TERM_BUCKET_CACHE_SIZE", "65536")))
+QUERY_EMBEDDING_CACHE_SIZE = max(0, int(os.getenv("CLINICAL_RAG_QUERY_EMBEDDING_CACHE_SIZE", "1024")))
+QUERY_EMBEDDING_CACHE_TTL_DAYS = max(1, int(os.getenv("CLINICAL_RAG_QUERY_EMBEDDING_CACHE_TTL_DAYS", "30")))
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("CLINICAL_RAG_QUERY_EMBEDDING_CACHE_PATH", "").strip()
+EMBEDDING_DEADLINE_SECONDS = float(os.getenv("CLINICAL_RAG_EMBEDDING_DEADLINE_SECONDS", "3.0"))
+EMBEDDING_WORKERS = max(1, int(os.getenv("CLINICAL_RAG_EMBEDDING_WORKERS", "4")))
 
 NOT_FOUND_MESSAGE = (
     "I could not find enough support in the approved public medical dataset to answer that. "
@@ -138,6 +182,8 @@ IMPORTANT_PHRASES = (
     "prediabetes",
 )
 
+PREVENTION_PATTERN = re.compile(r"\b(prevent|prevention|delay|lower your risk|reduce.*risk)\b")
+
 CLINICAL_SCOPE_TERMS = {
     "a1c",
     "activity",
@@ -175,29 +221,112 @@ CLINICAL_SCOPE_TERMS = {
 _UNINITIALIZED = object()
 _CLIENT = _UNINITIALIZED
 _BEDROCK_CLIENT = _UNINITIALIZED
+_EMBEDDING_EXECUTOR = None
 _KNOWLEDGE_BASE = None
+_CORPUS_SOURCE = _UNINITIALIZED
+# Files of the corpus version currently served, when a corpus source is configured.
+_LIVE_SOURCES = None
+_NEXT_CORPUS_CHECK = 0.0
+_CORPUS_REFRESH_LOCK = threading.Lock()
+# Hash-embedding bucket of every corpus term, filled when the knowledge base loads.
+_TERM_BUCKETS: dict[str, int] = {}
 
 
-@dataclass(frozen=True)
+class Vocabulary:
+    """Interned term table: each distinct corpus term is stored once and referenced by id."""
+
+    __slots__ = ("terms", "ids")
+
+    def __init__(self, terms: Sequence[str] = ()) -> None:
+        self.terms: list[str] = [sys.intern(term) for term in terms]
+        self.ids: dict[str, int] = {term: term_id for term_id, term in enumerate(self.terms)}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def intern(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            term = sys.intern(term)
+            self.terms.append(term)
+            self.ids[term] = term_id
+        return term_id
+
+    def encode(self, terms) -> array:
+        """Sorted ids of the known ``terms``; unknown terms are skipped."""
+        return array("i", sorted({self.ids[term] for term in terms if term in self.ids}))
+
+    def decode(self, term_ids: Sequence[int]) -> set[str]:
+        return {self.terms[term_id] for term_id in term_ids}
+
+
+def _count_members(sorted_ids: Sequence[int], term_ids: Sequence[int]) -> int:
+    """How many of ``term_ids`` occur in the sorted id array ``sorted_ids``."""
+    count = 0
+    for term_id in term_ids:
+        position = bisect.bisect_left(sorted_ids, term_id)
+        if position < len(sorted_ids) and sorted_ids[position] == term_id:
+            count += 1
+    return count
+
+
+@dataclass(frozen=True, slots=True)
+class RerankFeatures:
+    """Query-independent reranker inputs, computed once per chunk at load time."""
+
+    focus_term_ids: Sequence[int]
+    observed_term_ids: Sequence[int]
+    phrase_mask: int
+    mentions_prevention: bool
+    broad_diabetes_focus: bool
+
+
+@dataclass(frozen=True, slots=True)
 class ClinicalChunk:
+    """One corpus chunk in compact form.
+
+    Terms are sorted vocabulary ids with parallel frequencies. ``text`` is the only
+    copy of the chunk's prose: ``text_spans`` holds (start, end) offsets of the focus,
+    source question and source answer inside it, exposed through properties.
+    """
+
     chunk_id: str
     document_id: str
     source: str
     source_url: str
-    question_focus: str
     question_type: str
-    question: str
-    answer: str
     text: str
-    terms: set[str]
-    term_counts: dict[str, int]
+    text_spans: Sequence[int]
+    term_ids: Sequence[int]
+    term_frequencies: Sequence[int]
     term_count: int
-    embedding: list[float]
-    semantic_embedding: list[float]
+    embedding: Sequence[float]
+    semantic_embedding: Sequence[float]
+    rerank_features: RerankFeatures
 
+    @property
+    def question_focus(self) -> str:
+        return self.text[self.text_spans[0] : self.text_spans[1]]
 
-@dataclass(frozen=True)
+    @property
+    def question(self) -> str:
+        return self.text[self.text_spans[2] : self.text_spans[3]]
+
+    @property
+    def answer(self) -> str:
+        return self.text[self.text_spans[4] : self.text_spans[5]]
+
+    def term_frequency(self, term_id: int) -> int:
+        position = bisect.bisect_left(self.term_ids, term_id)
+        if position < len(self.term_ids) and self.term_ids[position] == term_id:
+            return self.term_frequencies[position]
+        return 0
+
+
+@dataclass(frozen=True, slots=True)
 class RetrievalHit:
+    chunk_index: int
     chunk_id: str
     document_id: str
     source: str
@@ -213,11 +342,149 @@ class RetrievalHit:
     rerank_score: float
 
 
+@dataclass(frozen=True)
+class SnapshotSources:
+    data_path: Path
+    embedding_cache_path: Path
+    titan_embedding_cache_path: Path
+
+
+@dataclass(frozen=True, slots=True)
+class ScoredCandidates:
+    """One retrieval stage's ranked output: chunk indices with a parallel score array."""
+
+    chunk_indices: Sequence[int]
+    scores: Sequence[float]
+
+    @classmethod
+    def from_pairs(cls, pairs: Sequence[tuple[float, int]]) -> "ScoredCandidates":
+        return cls([index for _score, index in pairs], [score for score, _index in pairs])
+
+
+_NO_CANDIDATES = ScoredCandidates((), ())
+
+
+@dataclass(frozen=True, slots=True)
+class FusedCandidates:
+    """RRF-ordered candidates with per-stage scores in parallel arrays.
+
+    ``semantic`` marks vector scores that came from Titan embeddings, which hits also
+    report as their semantic score.
+    """
+
+    chunk_indices: list[int]
+    rrf_scores: list[float]
+    vector_scores: list[float]
+    lexical_scores: list[float]
+    semantic: bool
+
+
+@dataclass(frozen=True, slots=True)
+class PostingList:
+    chunk_indices: Sequence[int]
+    term_frequencies: Sequence[int]
+    impacts: Sequence[float]
+    idf: float
+    max_impact: float
+
+
 @dataclass(frozen=True)
 class KnowledgeBase:
     chunks: list[ClinicalChunk]
     document_frequency: dict[str, int]
     average_term_count: float
+    embedding_matrix: object = None
+    semantic_matrix: object = None
+    inverted_index: dict[str, PostingList] | None = None
+    vocabulary: Vocabulary = field(default_factory=Vocabulary)
+    version: str = ""
+    embedding_precision: str = "float32"
+
+
+@dataclass(frozen=True)
+class RerankWeights:
+    """Bonuses and penalties ``_rerank`` adds to a candidate's RRF score."""
+
+    topic_bonus_per_term: float = 0.15
+    topic_bonus_cap: float = 0.3
+    question_type_bonus: float = 0.08
+    support_bonus_scale: float = 0.18
+    phrase_bonus_per_match: float = 0.14
+    phrase_bonus_cap: float = 0.28
+    prevention_bonus: float = 0.12
+    broad_diabetes_penalty: float = 0.12
+
+
+DEFAULT_RERANK_WEIGHTS = RerankWeights()
+
+
+@dataclass(frozen=True, slots=True)
+class QueryAnalysis:
+    """Everything the pipeline derives from a question's text, computed once per request.
+
+    The safety verdict is assessed on first access, so retrieval-only callers never scan for it.
+    """
+
+    question: str
+    terms: frozenset[str]
+    term_counts: dict[str, int]
+    normalized_text: str
+    phrase_mask: int
+    question_type: str
+    hash_embedding: list[float]
+    in_scope: bool
+    _safety: SafetyDecision | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def safety(self) -> SafetyDecision:
+        if self._safety is None:
+            object.__setattr__(self, "_safety", assess_question_safety(self.question))
+        return self._safety
+
+
+class StageTimings:
+    """High-resolution wall-clock time per pipeline stage for one request.
+
+    The lexical and vector passes are shared by a batch and cannot be split per question,
+    so a question records them only when it was retrieved alone; larger batches report
+    them once, as batch totals.
+    """
+
+    __slots__ = ("seconds",)
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+
+    def record(self, stage: str, started: float) -> float:
+        """Add the time since ``started`` to ``stage`` and return the current clock."""
+        now = time.perf_counter()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + now - started
+        return now
+
+    def merge(self, other: StageTimings) -> None:
+        for stage, seconds in other.seconds.items():
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def milliseconds(self) -> dict[str, float]:
+        return {stage: round(seconds * 1000, 3) for stage, seconds in self.seconds.items()}
+
+
+def analyze_query(question: str, *, safety: SafetyDecision | None = None) -> QueryAnalysis:
+    term_counts = _term_counts(question)
+    terms = frozenset(term_counts)
+    normalized_text = _normalized_phrase_text(question)
+    phrase_mask = _phrase_mask(normalized_text)
+    return QueryAnalysis(
+        question=question,
+        terms=terms,
+        term_counts=term_counts,
+        normalized_text=normalized_text,
+        phrase_mask=phrase_mask,
+        question_type=_classify_question_type(question),
+        hash_embedding=_hash_embedding_from_terms(terms),
+        in_scope=bool(terms & CLINICAL_SCOPE_TERMS) or phrase_mask != 0,
+        _safety=safety,
+    )
 
 
 def _extract_terms(text: str) -> set[str]:
@@ -236,23 +503,335 @@ def _term_counts(text: str) -> dict[str, int]:
 
 
 def _hash_embedding(text: str) -> list[float]:
+    return _hash_embedding_from_terms(_extract_terms(text))
+
+
+@functools.lru_cache(maxsize=TERM_BUCKET_CACHE_SIZE)
+def _hash_bucket(term: str) -> int:
+    return int.from_bytes(hashlib.sha256(term.encode("utf-8")).digest(), "big") % HASH_DIMS
+
+
+def _term_bucket(term: str) -> int:
+    bucket = _TERM_BUCKETS.get(term)
+    return _hash_bucket(term) if bucket is None else bucket
+
+
+def _register_term_buckets(terms: Sequence[str], buckets: Sequence[int] | None = None) -> None:
+    """Seed the term-to-bucket table with the corpus vocabulary (hashing it unless given)."""
+    if buckets is None:
+        buckets = [_hash_bucket(term) for term in terms]
+    _TERM_BUCKETS.update(zip(terms, buckets))
+
+
+def _hash_embedding_from_terms(terms) -> list[float]:
+    counts: dict[int, float] = {}
+    for term in terms:
+        bucket = _term_bucket(term)
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+
+    # Counts are small integers, so this norm is exact and matches summing every dimension.
     vector = [0.0] * HASH_DIMS
-    for term in _extract_terms(text):
-        bucket = int(hashlib.sha256(term.encode("utf-8")).hexdigest(), 16) % HASH_DIMS
-        vector[bucket] += 1.0
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    for bucket, count in counts.items():
+        vector[bucket] = count / norm
+    return vector
+
+
+class Int8Vector:
+    """An int8-quantized embedding: component ``i`` is ``scale * codes[i]``."""
+
+    __slots__ = ("codes", "scale")
 
-    norm = math.sqrt(sum(value * value for value in vector))
-    if norm == 0:
-        return vector
-    return [value / norm for value in vector]
+    def __init__(self, codes: Sequence[int], scale: float) -> None:
+        self.codes = codes
+        self.scale = scale
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self):
+        scale = self.scale
+        return (scale * code for code in self.codes)
+
+
+@dataclass(frozen=True, slots=True)
+class Int8Matrix:
+    """Row-quantized int8 embeddings: row ``i`` is ``scales[i] * codes[i]``."""
+
+    codes: object
+    scales: object
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.codes.shape
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Int8Vector:
+        return Int8Vector(self.codes[index], float(self.scales[index]))
+
+
+def _quantize_int8(row: Sequence[float]) -> Int8Vector:
+    """Symmetric int8 quantization with one scale per vector (largest magnitude maps to 127)."""
+    values = [float(value) for value in row]
+    peak = max(map(abs, values), default=0.0)
+    if not peak:
+        return Int8Vector(array("b", bytes(len(values))), 0.0)
+    scale = peak / 127
+    return Int8Vector(array("b", (round(value / scale) for value in values)), scale)
+
+
+def _storage_precision(precision: str) -> str:
+    """float16 storage needs numpy; without it embeddings stay float32."""
+    if precision not in EMBEDDING_PRECISIONS:
+        raise ValueError(f"Unsupported embedding precision: {precision}")
+    return "float32" if precision == "float16" and np is None else precision
 
 
 def _cosine(left: Sequence[float], right: Sequence[float]) -> float:
-    if not left or not right or len(left) != len(right):
+    if not len(left) or not len(right) or len(left) != len(right):
         return 0.0
+    if isinstance(right, Int8Vector):
+        return right.scale * sum(a * b for a, b in zip(left, right.codes))
     return sum(a * b for a, b in zip(left, right))
 
 
+def _phrase_mask(normalized_text: str) -> int:
+    mask = 0
+    for bit, phrase in enumerate(IMPORTANT_PHRASES):
+        if phrase in normalized_text:
+            mask |= 1 << bit
+    return mask
+
+
+def _rerank_features(
+    question_focus: str,
+    question: str,
+    answer: str,
+    vocabulary: Vocabulary,
+) -> RerankFeatures:
+    observed = f"{question_focus} {question} {answer}"
+    observed_text = _normalized_phrase_text(observed)
+    return RerankFeatures(
+        focus_term_ids=_intern_terms(vocabulary, _extract_terms(question_focus)),
+        observed_term_ids=_intern_terms(vocabulary, _extract_terms(observed)),
+        phrase_mask=_phrase_mask(observed_text),
+        mentions_prevention=bool(PREVENTION_PATTERN.search(observed_text)),
+        broad_diabetes_focus=(
+            "diabetes problems" in _normalized_phrase_text(question_focus)
+            and "type 2 diabetes" not in _normalized_phrase_text(f"{question_focus} {question}")
+        ),
+    )
+
+
+def _intern_terms(vocabulary: Vocabulary, terms) -> array:
+    return array("i", sorted(vocabulary.intern(term) for term in terms))
+
+
+def _embedding_matrix(
+    rows: Sequence[Sequence[float]],
+    dimensions: int,
+    precision: str = "float32",
+):
+    """Pack per-chunk embeddings into one contiguous matrix stored at ``precision``.
+
+    Rows with the wrong dimensionality (for example chunks without a cached Titan
+    embedding) stay zero, so they score 0 and are dropped like the list path drops them.
+    """
+    if np is None:
+        return None
+    matrix = np.zeros((len(rows), dimensions), dtype=np.float32)
+    for index, row in enumerate(rows):
+        if len(row) == dimensions:
+            matrix[index] = list(row) if isinstance(row, Int8Vector) else row
+    return _quantize_matrix(matrix, precision)
+
+
+def _quantize_matrix(matrix, precision: str):
+    if precision == "float16":
+        return matrix.astype(np.float16)
+    if precision != "int8":
+        return matrix
+    scales = np.abs(matrix).max(axis=1, initial=0.0).astype(np.float64) / 127
+    codes = np.zeros(matrix.shape, dtype=np.int8)
+    for start in range(0, len(matrix), MATRIX_BLOCK_ROWS):
+        block_scales = scales[start : start + MATRIX_BLOCK_ROWS, None]
+        block = matrix[start : start + MATRIX_BLOCK_ROWS] / np.where(block_scales > 0, block_scales, 1.0)
+        codes[start : start + MATRIX_BLOCK_ROWS] = np.rint(block)
+    return Int8Matrix(codes, scales.astype(np.float32))
+
+
+def _matrix_rows(matrix, selector, dtype):
+    """Rows of a (possibly quantized) embedding matrix, widened to ``dtype``."""
+    if isinstance(matrix, Int8Matrix):
+        return matrix.codes[selector].astype(dtype) * matrix.scales[selector, None].astype(dtype)
+    return matrix[selector].astype(dtype)
+
+
+def _coarse_scores(matrix, query_matrix):
+    if not isinstance(matrix, Int8Matrix) and matrix.dtype == np.float32:
+        return query_matrix @ matrix.T
+    # Widen one block at a time so scoring never holds a float32 copy of the corpus.
+    scores = np.empty((len(query_matrix), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), MATRIX_BLOCK_ROWS):
+        stop = start + MATRIX_BLOCK_ROWS
+        if isinstance(matrix, Int8Matrix):
+            block = query_matrix @ matrix.codes[start:stop].astype(np.float32).T
+            scores[:, start:stop] = block * matrix.scales[start:stop]
+        else:
+            scores[:, start:stop] = query_matrix @ matrix[start:stop].astype(np.float32).T
+    return scores
+
+
+def _matrix_top_k(matrix, query_matrix, k: int) -> list[list[tuple[float, int]]]:
+    """Top-k (score, chunk index) pairs for each query row of ``query_matrix``.
+
+    One float32 matrix-matrix product plus an ``argpartition``-style threshold picks
+    a small candidate set per query; the candidates are then rescored in float64 row
+    by row, so a question ranks identically whether it is scored alone or in a batch.
+    The margin only widens the candidate set; like the pure Python path, every candidate
+    whose rescored value is positive is kept. Quantized matrices are scored as stored: the
+    rescoring is exact for the float16 or int8 values, not for the original float embeddings.
+    """
+    if k <= 0 or not len(matrix):
+        return [[] for _query in query_matrix]
+    coarse_scores = _coarse_scores(matrix, query_matrix)
+    results = []
+    for query, scores in zip(query_matrix, coarse_scores):
+        floor = 0.0
+        if k < len(scores):
+            floor = max(floor, float(np.partition(scores, len(scores) - k)[len(scores) - k]))
+        candidates = np.flatnonzero(scores >= floor - MATRIX_SCORE_MARGIN)
+        exact_scores = (
+            _matrix_rows(matrix, candidates, np.float64) * query.astype(np.float64)
+        ).sum(axis=1)
+        keep = exact_scores > 0
+        candidates, exact_scores = candidates[keep], exact_scores[keep]
+        order = np.lexsort((candidates, -exact_scores))[:k]
+        results.append([(float(exact_scores[position]), int(candidates[position])) for position in order])
+    return results
+
+
+def _bm25_idf(document_count: int, documents_with_term: int) -> float:
+    return math.log(1 + ((document_count - documents_with_term + 0.5) / (documents_with_term + 0.5)))
+
+
+def _bm25_impact(
+    term_frequency: int,
+    idf: float,
+    term_count: int,
+    average_term_count: float,
+    *,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> float:
+    denominator = term_frequency + k1 * (1 - b + b * (term_count / average_term_count))
+    return idf * ((term_frequency * (k1 + 1)) / denominator)
+
+
+def _build_inverted_index(
+    chunks: Sequence[ClinicalChunk],
+    document_frequency: dict[str, int],
+    average_term_count: float,
+    vocabulary: Vocabulary,
+) -> dict[str, PostingList]:
+    postings: dict[int, tuple[array, array]] = {}
+    for index, chunk in enumerate(chunks):
+        for term_id, term_frequency in zip(chunk.term_ids, chunk.term_frequencies):
+            chunk_indices, term_frequencies = postings.setdefault(term_id, (array("i"), array("i")))
+            chunk_indices.append(index)
+            term_frequencies.append(term_frequency)
+
+    document_count = len(chunks)
+    average_term_count = average_term_count or 1.0
+    index: dict[str, PostingList] = {}
+    for term_id, (chunk_indices, term_frequencies) in postings.items():
+        term = vocabulary.terms[term_id]
+        idf = _bm25_idf(document_count, document_frequency.get(term, 0))
+        impacts = array(
+            "d",
+            (
+                _bm25_impact(term_frequency, idf, chunks[chunk_index].term_count, average_term_count)
+                for chunk_index, term_frequency in zip(chunk_indices, term_frequencies)
+            ),
+        )
+        index[term] = PostingList(
+            chunk_indices=chunk_indices,
+            term_frequencies=term_frequencies,
+            impacts=impacts,
+            idf=idf,
+            max_impact=max(impacts),
+        )
+    return index
+
+
+def _max_score_top_k(
+    postings: Sequence[tuple[Sequence[int], Sequence[float], float]],
+    k: int,
+) -> list[tuple[float, int]]:
+    """Document-at-a-time MaxScore over (chunk_indices, impacts, max_impact) posting lists.
+
+    Lists whose combined upper bound cannot beat the current k-th score become
+    non-essential: they are only probed for candidates found in the essential lists.
+    Ties keep the lower chunk index, matching a stable descending sort.
+    """
+    if k <= 0 or not postings:
+        return []
+    postings = sorted(postings, key=lambda posting: posting[2])
+    upper_bounds = list(itertools.accumulate(posting[2] for posting in postings))
+    cursors = [0] * len(postings)
+    heap: list[tuple[float, int]] = []
+    threshold = 0.0
+    first_essential = 0
+
+    while first_essential < len(postings):
+        candidate = min(
+            (
+                postings[position][0][cursors[position]]
+                for position in range(first_essential, len(postings))
+                if cursors[position] < len(postings[position][0])
+            ),
+            default=None,
+        )
+        if candidate is None:
+            break
+
+        score = 0.0
+        for position in range(first_essential, len(postings)):
+            chunk_indices, impacts, _max_impact = postings[position]
+            cursor = cursors[position]
+            if cursor < len(chunk_indices) and chunk_indices[cursor] == candidate:
+                score += impacts[cursor]
+                cursors[position] = cursor + 1
+
+        for position in range(first_essential - 1, -1, -1):
+            if len(heap) == k and score + upper_bounds[position] <= threshold:
+                break
+            chunk_indices, impacts, _max_impact = postings[position]
+            cursor = bisect.bisect_left(chunk_indices, candidate, cursors[position])
+            cursors[position] = cursor
+            if cursor < len(chunk_indices) and chunk_indices[cursor] == candidate:
+                score += impacts[cursor]
+
+        if len(heap) < k:
+            heapq.heappush(heap, (score, -candidate))
+        elif score > threshold:
+            heapq.heapreplace(heap, (score, -candidate))
+        else:
+            continue
+
+        if len(heap) == k:
+            threshold = heap[0][0]
+            while first_essential < len(postings) and upper_bounds[first_essential] <= threshold:
+                first_essential += 1
+
+    return sorted(
+        ((score, -negative_index) for score, negative_index in heap),
+        key=lambda item: (-item[0], item[1]),
+    )
+
+
 def _load_jsonl(path: Path) -> list[dict]:
     if not path.exists():
         logger.warning("clinical_rag_data_missing path=%s", path)
@@ -306,82 +885,907 @@ def _load_embedding_cache(path: Path, *, expected_dimensions: int) -> dict[str,
     return cache
 
 
-def load_knowledge_base() -> KnowledgeBase:
-    global _KNOWLEDGE_BASE
-    if _KNOWLEDGE_BASE is not None:
-        return _KNOWLEDGE_BASE
+def _current_sources() -> SnapshotSources:
+    if _LIVE_SOURCES is not None:
+        return _LIVE_SOURCES
+    return SnapshotSources(
+        data_path=DATA_PATH,
+        embedding_cache_path=EMBEDDING_CACHE_PATH,
+        titan_embedding_cache_path=TITAN_EMBEDDING_CACHE_PATH,
+    )
+
+
+def default_snapshot_path(data_path: Path) -> Path:
+    return data_path.with_suffix(".snapshot")
+
+
+def _source_files(sources: SnapshotSources) -> tuple[tuple[str, Path], ...]:
+    return (
+        ("data", sources.data_path),
+        ("embeddings", sources.embedding_cache_path),
+        ("titanEmbeddings", sources.titan_embedding_cache_path),
+    )
+
+
+def _file_sha256(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def _source_digests(sources: SnapshotSources) -> dict[str, dict]:
+    """Size and SHA-256 of each source file (size -1 when missing), recorded in the snapshot."""
+    digests = {}
+    for name, path in _source_files(sources):
+        exists = path.exists()
+        digests[name] = {
+            "size": path.stat().st_size if exists else -1,
+            "sha256": _file_sha256(path) if exists else "",
+        }
+    return digests
+
+
+def _snapshot_sources_current(recorded: object, sources: SnapshotSources) -> bool:
+    """Whether the source files still match the snapshot header.
+
+    Sizes are compared first so an obviously changed corpus is rejected without reading it;
+    the content hash then catches same-length edits.
+    """
+    if not isinstance(recorded, dict):
+        return False
+    for name, path in _source_files(sources):
+        entry = recorded.get(name)
+        size = path.stat().st_size if path.exists() else -1
+        if not isinstance(entry, dict) or entry.get("size") != size:
+            return False
+    return recorded == _source_digests(sources)
+
+
+def corpus_fingerprint() -> str:
+    """Hash of the corpus files and every setting that can change an answer."""
+    refresh_knowledge_base()
+    sources = _current_sources()
+    files = []
+    for path in (
+        sources.data_path,
+        sources.embedding_cache_path,
+        sources.titan_embedding_cache_path,
+    ):
+        stat = path.stat() if path.exists() else None
+        files.append([path.name, stat.st_size if stat else -1, stat.st_mtime_ns if stat else -1])
+    payload = {
+        "files": files,
+        "chatModel": CHAT_MODEL,
+        "useLlm": USE_LLM,
+        "embeddingModel": EMBEDDING_MODEL,
+        "titanEmbeddingModel": TITAN_EMBEDDING_MODEL,
+        "hashDims": HASH_DIMS,
+        "titanDims": TITAN_DIMS,
+        "embeddingPrecision": _storage_precision(EMBEDDING_PRECISION),
+        "topK": TOP_K,
+        "vectorCandidateK": VECTOR_CANDIDATE_K,
+        "lexicalCandidateK": LEXICAL_CANDIDATE_K,
+        "minSupportScore": MIN_SUPPORT_SCORE,
+        "minLexicalSupport": MIN_LEXICAL_SUPPORT,
+        "rrfK": RRF_K,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _knowledge_base_from_chunks(
+    chunks: list[ClinicalChunk],
+    document_frequency: dict[str, int],
+    vocabulary: Vocabulary,
+    *,
+    embedding_matrix=None,
+    semantic_matrix=None,
+    inverted_index: dict[str, PostingList] | None = None,
+    version: str = "",
+    embedding_precision: str = "float32",
+) -> KnowledgeBase:
+    total_term_count = sum(chunk.term_count for chunk in chunks)
+    average_term_count = total_term_count / len(chunks) if chunks else 0.0
+    if embedding_matrix is None:
+        embedding_matrix = _embedding_matrix(
+            [chunk.embedding for chunk in chunks],
+            HASH_DIMS,
+            embedding_precision,
+        )
+    if semantic_matrix is None:
+        semantic_matrix = _embedding_matrix(
+            [chunk.semantic_embedding for chunk in chunks],
+            TITAN_DIMS,
+            embedding_precision,
+        )
+    return KnowledgeBase(
+        chunks=chunks,
+        document_frequency=document_frequency,
+        average_term_count=average_term_count,
+        embedding_matrix=embedding_matrix,
+        semantic_matrix=semantic_matrix,
+        inverted_index=inverted_index
+        or _build_inverted_index(chunks, document_frequency, average_term_count, vocabulary),
+        vocabulary=vocabulary,
+        version=version,
+        embedding_precision=embedding_precision,
+    )
+
 
-    chunks: list[ClinicalChunk] = []
-    embedding_cache = _load_embedding_cache(EMBEDDING_CACHE_PATH, expected_dimensions=HASH_DIMS)
-    semantic_embedding_cache = _load_embedding_cache(
-        TITAN_EMBEDDING_CACHE_PATH,
-        expected_dimensions=TITAN_DIMS,
+_EMPTY_VECTOR = array("d")
+
+
+def _compact_vector(
+    matrix,
+    index: int,
+    row: Sequence[float],
+    dimensions: int,
+    precision: str = "float32",
+) -> Sequence[float]:
+    """A chunk's view of its embedding: a matrix row when packed, else a compact array.
+
+    Without numpy, int8 embeddings are ``Int8Vector`` codes and float32 ones double arrays.
+    """
+    if len(row) != dimensions:
+        return _EMPTY_VECTOR
+    if matrix is not None:
+        return matrix[index]
+    if precision == "int8":
+        return row if isinstance(row, Int8Vector) else _quantize_int8(row)
+    return array("d", row)
+
+
+def _text_spans(text: str, question_focus: str, question: str, answer: str) -> array:
+    """(start, end) offsets of each field inside ``text``, searched in order of appearance."""
+    spans = array("I")
+    position = 0
+    for prefix, value in (
+        ("Focus: ", question_focus),
+        ("Source question: ", question),
+        ("Source answer: ", answer),
+    ):
+        start = text.find(value, text.find(prefix, position) + len(prefix))
+        spans.extend((start, start + len(value)))
+        position = start + len(value)
+    return spans
+
+
+_CHUNK_IDENTITY_FIELDS = ("chunk_id", "document_id", "source", "source_url", "question_type")
+
+
+def _chunk_identity(record: dict, index: int) -> dict:
+    """A record's chunk id and citation metadata, normalized as ``ClinicalChunk`` stores them."""
+    return {
+        "chunk_id": _chunk_id_for_record(record, index),
+        "document_id": str(record.get("documentId") or f"medquad-{index}"),
+        "source": sys.intern(str(record.get("source") or "MedQuAD")),
+        "source_url": str(record.get("sourceUrl") or ""),
+        "question_type": sys.intern(str(record.get("questionType") or "").lower()),
+    }
+
+
+def _record_chunk_fields(
+    record: dict,
+    index: int,
+    vocabulary: Vocabulary,
+    document_frequency: dict[str, int],
+) -> dict | None:
+    """Tokenize one corpus record into ``ClinicalChunk`` fields (embeddings aside).
+
+    Counts the record's terms into ``document_frequency``. Returns None for records
+    without a question and answer.
+    """
+    answer = str(record.get("answer", "")).strip()
+    question = str(record.get("question", "")).strip()
+    if not answer or not question:
+        return None
+
+    text = _record_to_text(record)
+    term_counts = _term_counts(text)
+    for term in term_counts:
+        document_frequency[term] = document_frequency.get(term, 0) + 1
+    term_ids = sorted((vocabulary.intern(term), count) for term, count in term_counts.items())
+    question_focus = str(record.get("questionFocus") or "")
+    return {
+        **_chunk_identity(record, index),
+        "text": text,
+        "text_spans": _text_spans(text, question_focus, question, answer),
+        "term_ids": array("i", (term_id for term_id, _count in term_ids)),
+        "term_frequencies": array("i", (count for _term_id, count in term_ids)),
+        "term_count": sum(term_counts.values()),
+        "rerank_features": _rerank_features(question_focus, question, answer, vocabulary),
+    }
+
+
+def _load_corpus_embedding_caches(sources: SnapshotSources) -> tuple[dict, dict]:
+    return (
+        _load_embedding_cache(sources.embedding_cache_path, expected_dimensions=HASH_DIMS),
+        _load_embedding_cache(sources.titan_embedding_cache_path, expected_dimensions=TITAN_DIMS),
+    )
+
+
+def _assemble_knowledge_base(
+    chunk_fields_list: list[dict],
+    embedding_rows: list[Sequence[float]],
+    semantic_rows: list[Sequence[float]],
+    document_frequency: dict[str, int],
+    vocabulary: Vocabulary,
+    *,
+    version: str = "",
+    precision: str = EMBEDDING_PRECISION,
+) -> KnowledgeBase:
+    _register_term_buckets(vocabulary.terms)
+    precision = _storage_precision(precision)
+    embedding_matrix = _embedding_matrix(embedding_rows, HASH_DIMS, precision)
+    semantic_matrix = _embedding_matrix(semantic_rows, TITAN_DIMS, precision)
+    chunks = [
+        ClinicalChunk(
+            **chunk_fields,
+            embedding=_compact_vector(
+                embedding_matrix,
+                index,
+                embedding_rows[index],
+                HASH_DIMS,
+                precision,
+            ),
+            semantic_embedding=_compact_vector(
+                semantic_matrix,
+                index,
+                semantic_rows[index],
+                TITAN_DIMS,
+                precision,
+            ),
+        )
+        for index, chunk_fields in enumerate(chunk_fields_list)
+    ]
+    return _knowledge_base_from_chunks(
+        chunks,
+        document_frequency,
+        vocabulary,
+        embedding_matrix=embedding_matrix,
+        semantic_matrix=semantic_matrix,
+        version=version,
+        embedding_precision=precision,
     )
+
+
+def with_embedding_precision(knowledge: KnowledgeBase, precision: str) -> KnowledgeBase:
+    """A copy of ``knowledge`` with its corpus embeddings stored at ``precision``.
+
+    Chunk text, terms, and the inverted index are shared; only the embeddings are re-packed.
+    Re-packing an already quantized knowledge base cannot restore the precision it dropped.
+    """
+    precision = _storage_precision(precision)
+    embedding_rows = [chunk.embedding for chunk in knowledge.chunks]
+    semantic_rows = [chunk.semantic_embedding for chunk in knowledge.chunks]
+    embedding_matrix = _embedding_matrix(embedding_rows, HASH_DIMS, precision)
+    semantic_matrix = _embedding_matrix(semantic_rows, TITAN_DIMS, precision)
+    chunks = [
+        replace(
+            chunk,
+            embedding=_compact_vector(embedding_matrix, index, embedding_rows[index], HASH_DIMS, precision),
+            semantic_embedding=_compact_vector(
+                semantic_matrix,
+                index,
+                semantic_rows[index],
+                TITAN_DIMS,
+                precision,
+            ),
+        )
+        for index, chunk in enumerate(knowledge.chunks)
+    ]
+    return replace(
+        knowledge,
+        chunks=chunks,
+        embedding_matrix=embedding_matrix,
+        semantic_matrix=semantic_matrix,
+        embedding_precision=precision,
+    )
+
+
+def embedding_storage_bytes(knowledge: KnowledgeBase) -> int:
+    """Bytes holding the corpus embedding values (codes and scales), without object overhead."""
+    if knowledge.embedding_matrix is not None:
+        return sum(
+            matrix.codes.nbytes + matrix.scales.nbytes if isinstance(matrix, Int8Matrix) else matrix.nbytes
+            for matrix in (knowledge.embedding_matrix, knowledge.semantic_matrix)
+        )
+    return sum(
+        len(vector.codes) + 8 if isinstance(vector, Int8Vector) else len(vector) * vector.itemsize
+        for chunk in knowledge.chunks
+        for vector in (chunk.embedding, chunk.semantic_embedding)
+    )
+
+
+def build_knowledge_base(
+    sources: SnapshotSources | None = None,
+    *,
+    version: str = "",
+    precision: str = EMBEDDING_PRECISION,
+) -> KnowledgeBase:
+    """Build the knowledge base from the curated JSONL corpus and embedding caches."""
+    sources = sources or _current_sources()
+    embedding_cache, semantic_embedding_cache = _load_corpus_embedding_caches(sources)
+    vocabulary = Vocabulary()
     document_frequency: dict[str, int] = {}
-    total_term_count = 0
-    for index, record in enumerate(_load_jsonl(DATA_PATH), start=1):
-        answer = str(record.get("answer", "")).strip()
-        question = str(record.get("question", "")).strip()
-        if not answer or not question:
+    chunk_fields_list = []
+    embedding_rows = []
+    semantic_rows = []
+    for index, record in enumerate(_load_jsonl(sources.data_path), start=1):
+        chunk_fields = _record_chunk_fields(record, index, vocabulary, document_frequency)
+        if chunk_fields is None:
+            continue
+        chunk_id = chunk_fields["chunk_id"]
+        chunk_fields_list.append(chunk_fields)
+        embedding_rows.append(embedding_cache.get(chunk_id) or _hash_embedding(chunk_fields["text"]))
+        semantic_rows.append(semantic_embedding_cache.get(chunk_id, []))
+
+    logger.info(
+        "clinical_rag_knowledge_base_loaded chunks=%s cached_embeddings=%s cached_titan_embeddings=%s",
+        len(chunk_fields_list),
+        len(embedding_cache),
+        len(semantic_embedding_cache),
+    )
+    return _assemble_knowledge_base(
+        chunk_fields_list,
+        embedding_rows,
+        semantic_rows,
+        document_frequency,
+        vocabulary,
+        version=version,
+        precision=precision,
+    )
+
+
+_REUSED_CHUNK_FIELDS = tuple(
+    name for name in ClinicalChunk.__slots__ if name not in {"embedding", "semantic_embedding"}
+)
+
+
+def _compact_vocabulary(chunk_fields_list: list[dict], vocabulary: Vocabulary) -> Vocabulary:
+    """Drop terms no chunk references any more, renumbering ``chunk_fields_list`` in place.
+
+    Surviving terms keep their relative order, so every sorted id array stays sorted.
+    """
+    used: set[int] = set()
+    for chunk_fields in chunk_fields_list:
+        features = chunk_fields["rerank_features"]
+        used.update(chunk_fields["term_ids"], features.focus_term_ids, features.observed_term_ids)
+    if len(used) == len(vocabulary):
+        return vocabulary
+    kept = sorted(used)
+    remap = dict(zip(kept, range(len(kept))))
+    for chunk_fields in chunk_fields_list:
+        features = chunk_fields["rerank_features"]
+        chunk_fields["term_ids"] = array("i", (remap[term_id] for term_id in chunk_fields["term_ids"]))
+        chunk_fields["rerank_features"] = replace(
+            features,
+            focus_term_ids=array("i", (remap[term_id] for term_id in features.focus_term_ids)),
+            observed_term_ids=array("i", (remap[term_id] for term_id in features.observed_term_ids)),
+        )
+    return Vocabulary([vocabulary.terms[term_id] for term_id in kept])
+
+
+def apply_corpus_update(
+    knowledge: KnowledgeBase,
+    sources: SnapshotSources,
+    *,
+    version: str,
+) -> tuple[KnowledgeBase, dict[str, int]]:
+    """Derive the knowledge base for a new corpus version from the live one.
+
+    Chunks whose text, id and citation metadata are unchanged are reused without
+    re-tokenizing; only added or changed records are analyzed, and document frequencies are
+    adjusted for the added and removed chunks. Embeddings come from the new caches when
+    present, else the reused chunk keeps its vector. Terms only removed chunks used are
+    dropped from the vocabulary. Posting lists are rebuilt from the stored term ids because
+    BM25 impacts depend on the corpus size and average length. ``knowledge`` itself is not
+    modified.
+    """
+    embedding_cache, semantic_embedding_cache = _load_corpus_embedding_caches(sources)
+    vocabulary = Vocabulary(knowledge.vocabulary.terms)
+    document_frequency = dict(knowledge.document_frequency)
+    previous: dict[tuple[str, ...], list[int]] = {}
+    for index, chunk in enumerate(knowledge.chunks):
+        key = (*(getattr(chunk, name) for name in _CHUNK_IDENTITY_FIELDS), chunk.text)
+        previous.setdefault(key, []).append(index)
+
+    chunk_fields_list = []
+    embedding_rows = []
+    semantic_rows = []
+    reused = 0
+    for index, record in enumerate(_load_jsonl(sources.data_path), start=1):
+        identity = _chunk_identity(record, index)
+        chunk_id = identity["chunk_id"]
+        matches = previous.get(
+            (*(identity[name] for name in _CHUNK_IDENTITY_FIELDS), _record_to_text(record))
+        )
+        if matches:
+            chunk = knowledge.chunks[matches.pop(0)]
+            chunk_fields = {name: getattr(chunk, name) for name in _REUSED_CHUNK_FIELDS}
+            embedding = embedding_cache.get(chunk_id) or chunk.embedding
+            semantic_embedding = semantic_embedding_cache.get(chunk_id) or chunk.semantic_embedding
+            reused += 1
+        else:
+            chunk_fields = _record_chunk_fields(record, index, vocabulary, document_frequency)
+            if chunk_fields is None:
+                continue
+            embedding = embedding_cache.get(chunk_id) or _hash_embedding(chunk_fields["text"])
+            semantic_embedding = semantic_embedding_cache.get(chunk_id, [])
+        chunk_fields_list.append(chunk_fields)
+        embedding_rows.append(embedding)
+        semantic_rows.append(semantic_embedding)
+
+    removed = 0
+    for indices in previous.values():
+        for index in indices:
+            removed += 1
+            for term_id in knowledge.chunks[index].term_ids:
+                term = vocabulary.terms[term_id]
+                if document_frequency[term] == 1:
+                    del document_frequency[term]
+                else:
+                    document_frequency[term] -= 1
+    vocabulary = _compact_vocabulary(chunk_fields_list, vocabulary)
+
+    updated = _assemble_knowledge_base(
+        chunk_fields_list,
+        embedding_rows,
+        semantic_rows,
+        document_frequency,
+        vocabulary,
+        version=version,
+        precision=knowledge.embedding_precision,
+    )
+    return updated, {
+        "added": len(chunk_fields_list) - reused,
+        "removed": removed,
+        "reused": reused,
+    }
+
+
+SNAPSHOT_SCHEMA_VERSION = 5
+
+
+def _id_blocks(rows: Sequence[Sequence[int]]) -> tuple[tuple[str, list[int]], tuple[str, list[int]]]:
+    """Concatenated id rows plus their offsets, for variable-length per-chunk arrays."""
+    offsets = list(itertools.accumulate((len(row) for row in rows), initial=0))
+    return ("q", offsets), ("i", [value for row in rows for value in row])
+
+
+def _snapshot_embedding_blocks(
+    name: str,
+    scale_name: str,
+    rows: Sequence[Sequence[float]],
+    precision: str,
+) -> dict[str, tuple[str, list]]:
+    """Embedding rows as a snapshot block in the knowledge base's storage precision.
+
+    float16 values are stored as their raw 16-bit patterns; int8 codes get a float32 scale block.
+    """
+    if precision == "int8":
+        vectors = [row if isinstance(row, Int8Vector) else _quantize_int8(row) for row in rows]
+        return {
+            name: ("b", [int(code) for vector in vectors for code in vector.codes]),
+            scale_name: ("f", [vector.scale for vector in vectors]),
+        }
+    if precision == "float16":
+        return {name: ("H", np.asarray(rows, dtype=np.float16).view(np.uint16).ravel().tolist())}
+    return {name: ("f", [value for row in rows for value in row])}
+
+
+def write_knowledge_base_snapshot(
+    knowledge: KnowledgeBase,
+    path: Path,
+    sources: SnapshotSources | None = None,
+) -> None:
+    sources = sources or _current_sources()
+    chunks = knowledge.chunks
+    vocabulary = knowledge.vocabulary
+    inverted_index = knowledge.inverted_index or _build_inverted_index(
+        chunks,
+        knowledge.document_frequency,
+        knowledge.average_term_count,
+        vocabulary,
+    )
+    # Snapshot term ids are positions in the sorted vocabulary; remap the in-memory ids.
+    terms = sorted(vocabulary.terms)
+    snapshot_ids = {term: position for position, term in enumerate(terms)}
+    remap = [snapshot_ids[term] for term in vocabulary.terms]
+    chunk_terms = [
+        sorted(zip((remap[term_id] for term_id in chunk.term_ids), chunk.term_frequencies))
+        for chunk in chunks
+    ]
+    empty_posting = PostingList(array("i"), array("i"), array("d"), 0.0, 0.0)
+    postings = [inverted_index.get(term, empty_posting) for term in terms]
+    precision = knowledge.embedding_precision
+    semantic_rows = [
+        chunk.semantic_embedding if len(chunk.semantic_embedding) == TITAN_DIMS else [0.0] * TITAN_DIMS
+        for chunk in chunks
+    ]
+    chunk_term_offsets, chunk_term_ids = _id_blocks(
+        [[term_id for term_id, _frequency in row] for row in chunk_terms]
+    )
+    focus_offsets, focus_ids = _id_blocks(
+        [sorted(remap[term_id] for term_id in chunk.rerank_features.focus_term_ids) for chunk in chunks]
+    )
+    observed_offsets, observed_ids = _id_blocks(
+        [
+            sorted(remap[term_id] for term_id in chunk.rerank_features.observed_term_ids)
+            for chunk in chunks
+        ]
+    )
+    write_snapshot(
+        path,
+        {
+            "schemaVersion": SNAPSHOT_SCHEMA_VERSION,
+            "hashDims": HASH_DIMS,
+            "titanDims": TITAN_DIMS,
+            "embeddingPrecision": precision,
+            "sources": _source_digests(sources),
+            "terms": terms,
+            "chunks": [
+                {
+                    "chunkId": chunk.chunk_id,
+                    "documentId": chunk.document_id,
+                    "source": chunk.source,
+                    "sourceUrl": chunk.source_url,
+                    "questionType": chunk.question_type,
+                    "text": chunk.text,
+                    "textSpans": list(chunk.text_spans),
+                    "termCount": chunk.term_count,
+                    "hasSemanticEmbedding": len(chunk.semantic_embedding) == TITAN_DIMS,
+                    "phraseMask": chunk.rerank_features.phrase_mask,
+                    "mentionsPrevention": chunk.rerank_features.mentions_prevention,
+                    "broadDiabetesFocus": chunk.rerank_features.broad_diabetes_focus,
+                }
+                for chunk in chunks
+            ],
+        },
+        {
+            **_snapshot_embedding_blocks(
+                "embeddings",
+                "embeddingScales",
+                [chunk.embedding for chunk in chunks],
+                precision,
+            ),
+            **_snapshot_embedding_blocks(
+                "semanticEmbeddings",
+                "semanticEmbeddingScales",
+                semantic_rows,
+                precision,
+            ),
+            "chunkTermOffsets": chunk_term_offsets,
+            "chunkTermIds": chunk_term_ids,
+            "chunkTermFrequencies": (
+                "i",
+                [frequency for row in chunk_terms for _term_id, frequency in row],
+            ),
+            "focusTermOffsets": focus_offsets,
+            "focusTermIds": focus_ids,
+            "observedTermOffsets": observed_offsets,
+            "observedTermIds": observed_ids,
+            "postingOffsets": (
+                "q",
+                list(itertools.accumulate((len(posting.chunk_indices) for posting in postings), initial=0)),
+            ),
+            "postingChunkIndices": ("i", [index for posting in postings for index in posting.chunk_indices]),
+            "postingTermFrequencies": (
+                "i",
+                [frequency for posting in postings for frequency in posting.term_frequencies],
+            ),
+            "postingImpacts": ("d", [impact for posting in postings for impact in posting.impacts]),
+            "termIdf": ("d", [posting.idf for posting in postings]),
+            "termBuckets": ("i", [_term_bucket(term) for term in terms]),
+            "termMaxImpact": ("d", [posting.max_impact for posting in postings]),
+        },
+    )
+
+
+def _snapshot_inverted_index(
+    terms: Sequence[str],
+    blocks: dict[str, memoryview],
+) -> tuple[dict[str, PostingList], dict[str, int]]:
+    """Rebuild posting lists as zero-copy slices over the mapped snapshot blocks."""
+    offsets = blocks["postingOffsets"]
+    chunk_indices = blocks["postingChunkIndices"]
+    term_frequencies = blocks["postingTermFrequencies"]
+    impacts = blocks["postingImpacts"]
+    idf = blocks["termIdf"]
+    max_impact = blocks["termMaxImpact"]
+    inverted_index = {}
+    document_frequency = {}
+    for position, term in enumerate(terms):
+        start, end = offsets[position], offsets[position + 1]
+        if start == end:
             continue
+        inverted_index[term] = PostingList(
+            chunk_indices=chunk_indices[start:end],
+            term_frequencies=term_frequencies[start:end],
+            impacts=impacts[start:end],
+            idf=idf[position],
+            max_impact=max_impact[position],
+        )
+        document_frequency[term] = end - start
+    return inverted_index, document_frequency
+
+
+def _float_rows(block: memoryview, row_count: int, dimensions: int):
+    if np is not None:
+        return np.frombuffer(block, dtype=np.float32).reshape(row_count, dimensions)
+    return [block[index * dimensions : (index + 1) * dimensions] for index in range(row_count)]
+
+
+def _snapshot_embedding_rows(
+    blocks: dict[str, memoryview],
+    name: str,
+    scale_name: str,
+    row_count: int,
+    dimensions: int,
+    precision: str,
+):
+    block = blocks[name]
+    if precision == "int8":
+        scales = blocks[scale_name]
+        if np is not None:
+            return Int8Matrix(
+                np.frombuffer(block, dtype=np.int8).reshape(row_count, dimensions),
+                np.frombuffer(scales, dtype=np.float32),
+            )
+        return [
+            Int8Vector(block[index * dimensions : (index + 1) * dimensions], scales[index])
+            for index in range(row_count)
+        ]
+    if precision == "float16":
+        return np.frombuffer(block, dtype=np.float16).reshape(row_count, dimensions)
+    return _float_rows(block, row_count, dimensions)
+
+
+def _block_rows(blocks: dict[str, memoryview], name: str, row_count: int) -> list[memoryview]:
+    offsets = blocks[f"{name}Offsets"]
+    values = blocks[f"{name}Ids"]
+    return [values[offsets[index] : offsets[index + 1]] for index in range(row_count)]
+
+
+def _load_snapshot_knowledge_base(
+    path: Path,
+    sources: SnapshotSources,
+    *,
+    precision: str = EMBEDDING_PRECISION,
+) -> KnowledgeBase | None:
+    if not path.exists():
+        return None
+    precision = _storage_precision(precision)
+    try:
+        header, blocks = open_snapshot(path)
+    except (OSError, SnapshotError, ValueError) as error:
+        logger.warning("clinical_rag_snapshot_invalid path=%s error=%s", path, error)
+        return None
+
+    records = header.get("chunks", [])
+    if (
+        header.get("schemaVersion") != SNAPSHOT_SCHEMA_VERSION
+        or header.get("hashDims") != HASH_DIMS
+        or header.get("titanDims") != TITAN_DIMS
+        or header.get("embeddingPrecision") != precision
+        or not _snapshot_sources_current(header.get("sources"), sources)
+        or len(blocks.get("embeddings", ())) != len(records) * HASH_DIMS
+        or len(blocks.get("semanticEmbeddings", ())) != len(records) * TITAN_DIMS
+        or len(blocks.get("postingOffsets", ())) != len(header.get("terms", ())) + 1
+        or len(blocks.get("termBuckets", ())) != len(header.get("terms", ()))
+        or len(blocks.get("chunkTermOffsets", ())) != len(records) + 1
+        or (
+            precision == "int8"
+            and not len(blocks.get("embeddingScales", ()))
+            == len(blocks.get("semanticEmbeddingScales", ()))
+            == len(records)
+        )
+    ):
+        logger.warning("clinical_rag_snapshot_stale path=%s", path)
+        return None
 
-        document_id = str(record.get("documentId") or f"medquad-{index}")
-        chunk_id = _chunk_id_for_record(record, index)
-        text = _record_to_text(record)
-        embedding = embedding_cache.get(chunk_id) or _hash_embedding(text)
-        term_counts = _term_counts(text)
-        for term in term_counts:
-            document_frequency[term] = document_frequency.get(term, 0) + 1
-        total_term_count += sum(term_counts.values())
+    embedding_rows = _snapshot_embedding_rows(
+        blocks, "embeddings", "embeddingScales", len(records), HASH_DIMS, precision
+    )
+    semantic_rows = _snapshot_embedding_rows(
+        blocks, "semanticEmbeddings", "semanticEmbeddingScales", len(records), TITAN_DIMS, precision
+    )
+    vocabulary = Vocabulary(header["terms"])
+    _register_term_buckets(vocabulary.terms, blocks["termBuckets"])
+    term_rows = _block_rows(blocks, "chunkTerm", len(records))
+    term_offsets = blocks["chunkTermOffsets"]
+    term_frequencies = blocks["chunkTermFrequencies"]
+    focus_rows = _block_rows(blocks, "focusTerm", len(records))
+    observed_rows = _block_rows(blocks, "observedTerm", len(records))
+    chunks = []
+    for index, record in enumerate(records):
         chunks.append(
             ClinicalChunk(
-                chunk_id=chunk_id,
-                document_id=document_id,
-                source=str(record.get("source") or "MedQuAD"),
-                source_url=str(record.get("sourceUrl") or ""),
-                question_focus=str(record.get("questionFocus") or ""),
-                question_type=str(record.get("questionType") or "").lower(),
-                question=question,
-                answer=answer,
-                text=text,
-                terms=_extract_terms(text),
-                term_counts=term_counts,
-                term_count=sum(term_counts.values()),
-                embedding=embedding,
-                semantic_embedding=semantic_embedding_cache.get(chunk_id, []),
+                chunk_id=record["chunkId"],
+                document_id=record["documentId"],
+                source=sys.intern(record["source"]),
+                source_url=record["sourceUrl"],
+                question_type=sys.intern(record["questionType"]),
+                text=record["text"],
+                text_spans=array("I", record["textSpans"]),
+                term_ids=term_rows[index],
+                term_frequencies=term_frequencies[term_offsets[index] : term_offsets[index + 1]],
+                term_count=record["termCount"],
+                embedding=embedding_rows[index],
+                semantic_embedding=semantic_rows[index] if record["hasSemanticEmbedding"] else _EMPTY_VECTOR,
+                rerank_features=RerankFeatures(
+                    focus_term_ids=focus_rows[index],
+                    observed_term_ids=observed_rows[index],
+                    phrase_mask=record["phraseMask"],
+                    mentions_prevention=record["mentionsPrevention"],
+                    broad_diabetes_focus=record["broadDiabetesFocus"],
+                ),
             )
         )
 
-    logger.info(
-        "clinical_rag_knowledge_base_loaded chunks=%s cached_embeddings=%s cached_titan_embeddings=%s",
-        len(chunks),
-        len(embedding_cache),
-        len(semantic_embedding_cache),
+    logger.info("clinical_rag_knowledge_base_snapshot_loaded chunks=%s path=%s", len(chunks), path)
+    inverted_index, document_frequency = _snapshot_inverted_index(vocabulary.terms, blocks)
+    return _knowledge_base_from_chunks(
+        chunks,
+        document_frequency,
+        vocabulary,
+        embedding_matrix=embedding_rows if np is not None else None,
+        semantic_matrix=semantic_rows if np is not None else None,
+        inverted_index=inverted_index,
+        embedding_precision=precision,
     )
-    average_term_count = total_term_count / len(chunks) if chunks else 0.0
-    _KNOWLEDGE_BASE = KnowledgeBase(
-        chunks=chunks,
-        document_frequency=document_frequency,
-        average_term_count=average_term_count,
+
+
+def _get_corpus_source():
+    global _CORPUS_SOURCE
+    if _CORPUS_SOURCE is _UNINITIALIZED:
+        _CORPUS_SOURCE = corpus_source_from_uri()
+    return _CORPUS_SOURCE
+
+
+def refresh_knowledge_base(*, force: bool = False) -> bool:
+    """Check the corpus source for a new version and hot-swap the live knowledge base.
+
+    Checks run at most every ``CORPUS_REFRESH_SECONDS`` unless ``force`` is set. The new
+    knowledge base is derived incrementally from the live one and published with a single
+    reference assignment; queries already holding the old one finish against it. Only one
+    thread refreshes at a time and other callers never wait for it. Returns True on swap.
+    """
+    global _KNOWLEDGE_BASE, _LIVE_SOURCES, _NEXT_CORPUS_CHECK
+    source = _get_corpus_source()
+    if source is None or (not force and time.monotonic() < _NEXT_CORPUS_CHECK):
+        return False
+    if not _CORPUS_REFRESH_LOCK.acquire(blocking=False):
+        return False
+    try:
+        _NEXT_CORPUS_CHECK = time.monotonic() + CORPUS_REFRESH_SECONDS
+        try:
+            corpus_version = source.current_version()
+            current = _KNOWLEDGE_BASE
+            if corpus_version is None or (current is not None and current.version == corpus_version.version):
+                return False
+            started = time.perf_counter()
+            files = source.fetch(corpus_version)
+            sources = SnapshotSources(
+                data_path=files.data_path,
+                embedding_cache_path=files.embedding_cache_path,
+                titan_embedding_cache_path=files.titan_embedding_cache_path,
+            )
+            if current is None:
+                updated = build_knowledge_base(sources, version=corpus_version.version)
+                changes = {"added": len(updated.chunks), "removed": 0, "reused": 0}
+            else:
+                updated, changes = apply_corpus_update(current, sources, version=corpus_version.version)
+        except Exception as error:  # noqa: BLE001
+            logger.warning(
+                "clinical_rag_corpus_refresh_failed error_type=%s error_message=%s",
+                type(error).__name__,
+                str(error),
+            )
+            return False
+
+        # Publish the knowledge base before its sources so a result cache key for the new
+        # version is never paired with an answer from the old one.
+        _KNOWLEDGE_BASE = updated
+        _LIVE_SOURCES = sources
+        source.prune(corpus_version)
+        logger.info(
+            "clinical_rag_knowledge_base_swapped version=%s chunks=%s added=%s removed=%s reused=%s "
+            "elapsed_ms=%s",
+            corpus_version.version,
+            len(updated.chunks),
+            changes["added"],
+            changes["removed"],
+            changes["reused"],
+            int((time.perf_counter() - started) * 1000),
+        )
+        return True
+    finally:
+        _CORPUS_REFRESH_LOCK.release()
+
+
+def load_knowledge_base() -> KnowledgeBase:
+    global _KNOWLEDGE_BASE
+    refresh_knowledge_base()
+    if _KNOWLEDGE_BASE is not None:
+        return _KNOWLEDGE_BASE
+
+    sources = _current_sources()
+    snapshot_path = SNAPSHOT_PATH or default_snapshot_path(sources.data_path)
+    _KNOWLEDGE_BASE = _load_snapshot_knowledge_base(snapshot_path, sources) or build_knowledge_base(
+        sources
     )
     return _KNOWLEDGE_BASE
 
 
-def _lexical_retrieval(question: str, chunks: Sequence[ClinicalChunk], k: int) -> list[RetrievalHit]:
-    terms = _extract_terms(question)
+def _stage_hits(
+    knowledge: KnowledgeBase,
+    candidates: ScoredCandidates,
+    *score_fields: str,
+) -> list[RetrievalHit]:
+    """Materialize one stage's candidates as hits, for callers inspecting a single stage."""
+    return [
+        _hit_from_chunk(knowledge, index, **dict.fromkeys(score_fields, score))
+        for index, score in zip(candidates.chunk_indices, candidates.scores)
+    ]
+
+
+def _lexical_retrieval(question: str, knowledge: KnowledgeBase, k: int) -> list[RetrievalHit]:
+    return _stage_hits(
+        knowledge,
+        _lexical_retrieval_many([analyze_query(question)], knowledge, k)[0],
+        "lexical_score",
+    )
+
+
+def _lexical_retrieval_many(
+    queries: Sequence[QueryAnalysis],
+    knowledge: KnowledgeBase,
+    k: int,
+) -> list[ScoredCandidates]:
+    if knowledge.inverted_index is None:
+        return [_lexical_scan(query, knowledge, k) for query in queries]
+
+    shared_postings: dict[str, tuple | None] = {}
+    results = []
+    for query in queries:
+        terms = query.terms
+        postings = []
+        for term in terms:
+            if term not in shared_postings:
+                posting = knowledge.inverted_index.get(term)
+                shared_postings[term] = (
+                    (posting.chunk_indices, [1.0] * len(posting.chunk_indices), 1.0)
+                    if posting is not None
+                    else None
+                )
+            if shared_postings[term] is not None:
+                postings.append(shared_postings[term])
+        top_overlaps = _max_score_top_k(postings, k)
+        term_count = max(1, len(terms))
+        results.append(
+            ScoredCandidates(
+                [index for _overlap, index in top_overlaps],
+                [overlap / term_count for overlap, _index in top_overlaps],
+            )
+        )
+    return results
+
+
+def _lexical_scan(query: QueryAnalysis, knowledge: KnowledgeBase, k: int) -> ScoredCandidates:
+    terms = query.terms
     if not terms:
-        return []
+        return _NO_CANDIDATES
 
+    term_ids = knowledge.vocabulary.encode(terms)
     scored = []
-    for chunk in chunks:
-        overlap = len(terms & chunk.terms)
+    for index, chunk in enumerate(knowledge.chunks):
+        overlap = _count_members(chunk.term_ids, term_ids)
         if overlap == 0:
             continue
         score = overlap / max(1, len(terms))
-        scored.append((score, chunk))
+        scored.append((score, index))
 
     scored.sort(key=lambda item: item[0], reverse=True)
-    return [_hit_from_chunk(chunk, lexical_score=score) for score, chunk in scored[:k]]
+    return ScoredCandidates.from_pairs(scored[:k])
 
 
 def _bm25_retrieval(
@@ -389,74 +1793,220 @@ def _bm25_retrieval(
     knowledge: KnowledgeBase,
     k: int,
     *,
-    k1: float = 1.5,
-    b: float = 0.75,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
 ) -> list[RetrievalHit]:
-    terms = _extract_terms(question)
+    return _stage_hits(
+        knowledge,
+        _bm25_retrieval_many([analyze_query(question)], knowledge, k, k1=k1, b=b)[0],
+        "lexical_score",
+    )
+
+
+def _bm25_retrieval_many(
+    queries: Sequence[QueryAnalysis],
+    knowledge: KnowledgeBase,
+    k: int,
+    *,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> list[ScoredCandidates]:
+    if knowledge.inverted_index is None or not knowledge.chunks:
+        return [_bm25_scan(query, knowledge, k, k1=k1, b=b) for query in queries]
+
+    average_term_count = knowledge.average_term_count or 1.0
+    shared_postings: dict[str, tuple | None] = {}
+    results = []
+    for query in queries:
+        postings = []
+        for term in query.terms:
+            if term not in shared_postings:
+                shared_postings[term] = _bm25_posting(
+                    knowledge,
+                    term,
+                    average_term_count,
+                    k1=k1,
+                    b=b,
+                )
+            if shared_postings[term] is not None:
+                postings.append(shared_postings[term])
+        top_scores = _max_score_top_k(postings, k)
+        if not top_scores:
+            results.append(_NO_CANDIDATES)
+            continue
+        max_score = top_scores[0][0] or 1.0
+        results.append(
+            ScoredCandidates(
+                [index for _score, index in top_scores],
+                [score / max_score for score, _index in top_scores],
+            )
+        )
+    return results
+
+
+def _bm25_posting(
+    knowledge: KnowledgeBase,
+    term: str,
+    average_term_count: float,
+    *,
+    k1: float,
+    b: float,
+) -> tuple[Sequence[int], Sequence[float], float] | None:
+    posting = knowledge.inverted_index.get(term)
+    if posting is None:
+        return None
+    if (k1, b) == (BM25_K1, BM25_B):
+        return posting.chunk_indices, posting.impacts, posting.max_impact
+    impacts = [
+        _bm25_impact(
+            term_frequency,
+            posting.idf,
+            knowledge.chunks[chunk_index].term_count,
+            average_term_count,
+            k1=k1,
+            b=b,
+        )
+        for chunk_index, term_frequency in zip(posting.chunk_indices, posting.term_frequencies)
+    ]
+    return posting.chunk_indices, impacts, max(impacts)
+
+
+def _bm25_scan(
+    query: QueryAnalysis,
+    knowledge: KnowledgeBase,
+    k: int,
+    *,
+    k1: float,
+    b: float,
+) -> ScoredCandidates:
+    terms = query.terms
     if not terms or not knowledge.chunks:
-        return []
+        return _NO_CANDIDATES
 
     scored = []
     document_count = len(knowledge.chunks)
     average_term_count = knowledge.average_term_count or 1.0
-    for chunk in knowledge.chunks:
+    vocabulary = knowledge.vocabulary
+    for index, chunk in enumerate(knowledge.chunks):
         score = 0.0
         for term in terms:
-            term_frequency = chunk.term_counts.get(term, 0)
+            term_id = vocabulary.ids.get(term)
+            term_frequency = 0 if term_id is None else chunk.term_frequency(term_id)
             if term_frequency == 0:
                 continue
-            documents_with_term = knowledge.document_frequency.get(term, 0)
-            idf = math.log(1 + ((document_count - documents_with_term + 0.5) / (documents_with_term + 0.5)))
-            denominator = term_frequency + k1 * (
-                1 - b + b * (chunk.term_count / average_term_count)
+            idf = _bm25_idf(document_count, knowledge.document_frequency.get(term, 0))
+            score += _bm25_impact(
+                term_frequency,
+                idf,
+                chunk.term_count,
+                average_term_count,
+                k1=k1,
+                b=b,
             )
-            score += idf * ((term_frequency * (k1 + 1)) / denominator)
         if score > 0:
-            scored.append((score, chunk))
+            scored.append((score, index))
 
     if not scored:
-        return []
+        return _NO_CANDIDATES
 
-    max_score = max(score for score, _chunk in scored) or 1.0
+    max_score = max(score for score, _index in scored) or 1.0
     scored.sort(key=lambda item: item[0], reverse=True)
-    return [
-        _hit_from_chunk(chunk, lexical_score=score / max_score)
-        for score, chunk in scored[:k]
-    ]
+    return ScoredCandidates(
+        [index for _score, index in scored[:k]],
+        [score / max_score for score, _index in scored[:k]],
+    )
 
 
-def _vector_retrieval(question: str, chunks: Sequence[ClinicalChunk], k: int) -> list[RetrievalHit]:
-    query_embedding = _hash_embedding(question)
-    scored = [
-        (_cosine(query_embedding, chunk.embedding), chunk)
-        for chunk in chunks
-    ]
-    scored.sort(key=lambda item: item[0], reverse=True)
-    return [_hit_from_chunk(chunk, vector_score=score) for score, chunk in scored[:k] if score > 0]
+def _vector_retrieval(question: str, knowledge: KnowledgeBase, k: int) -> list[RetrievalHit]:
+    return _stage_hits(
+        knowledge,
+        _vector_retrieval_many([analyze_query(question)], knowledge, k)[0],
+        "vector_score",
+    )
+
+
+def _vector_retrieval_many(
+    queries: Sequence[QueryAnalysis],
+    knowledge: KnowledgeBase,
+    k: int,
+) -> list[ScoredCandidates]:
+    query_embeddings = [query.hash_embedding for query in queries]
+    if knowledge.embedding_matrix is not None:
+        query_matrix = np.asarray(query_embeddings, dtype=np.float32).reshape(
+            len(query_embeddings),
+            HASH_DIMS,
+        )
+        return [
+            ScoredCandidates.from_pairs(top_scores)
+            for top_scores in _matrix_top_k(knowledge.embedding_matrix, query_matrix, k)
+        ]
+
+    results = []
+    for query_embedding in query_embeddings:
+        scored = [
+            (_cosine(query_embedding, chunk.embedding), index)
+            for index, chunk in enumerate(knowledge.chunks)
+        ]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        results.append(ScoredCandidates.from_pairs([pair for pair in scored[:k] if pair[0] > 0]))
+    return results
 
 
 def _semantic_retrieval(
     query_embedding: Sequence[float],
-    chunks: Sequence[ClinicalChunk],
+    knowledge: KnowledgeBase,
     k: int,
 ) -> list[RetrievalHit]:
-    if not query_embedding:
-        return []
-    scored = [
-        (_cosine(query_embedding, chunk.semantic_embedding), chunk)
-        for chunk in chunks
-        if chunk.semantic_embedding
-    ]
-    scored.sort(key=lambda item: item[0], reverse=True)
-    return [
-        _hit_from_chunk(chunk, semantic_score=score, vector_score=score)
-        for score, chunk in scored[:k]
-        if score > 0
-    ]
+    return _stage_hits(
+        knowledge,
+        _semantic_retrieval_many([query_embedding], knowledge, k)[0],
+        "semantic_score",
+        "vector_score",
+    )
+
+
+def _semantic_retrieval_many(
+    query_embeddings: Sequence[Sequence[float] | None],
+    knowledge: KnowledgeBase,
+    k: int,
+) -> list[ScoredCandidates]:
+    results = [_NO_CANDIDATES] * len(query_embeddings)
+    if knowledge.semantic_matrix is not None:
+        dimensions = knowledge.semantic_matrix.shape[1]
+        positions = [
+            position
+            for position, query_embedding in enumerate(query_embeddings)
+            if query_embedding is not None and len(query_embedding) == dimensions
+        ]
+        if not positions:
+            return results
+        query_matrix = np.asarray(
+            [query_embeddings[position] for position in positions],
+            dtype=np.float32,
+        )
+        for position, top_scores in zip(
+            positions,
+            _matrix_top_k(knowledge.semantic_matrix, query_matrix, k),
+        ):
+            results[position] = ScoredCandidates.from_pairs(top_scores)
+        return results
+
+    for position, query_embedding in enumerate(query_embeddings):
+        if query_embedding is None or not len(query_embedding):
+            continue
+        scored = [
+            (_cosine(query_embedding, chunk.semantic_embedding), index)
+            for index, chunk in enumerate(knowledge.chunks)
+            if chunk.semantic_embedding
+        ]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        results[position] = ScoredCandidates.from_pairs([pair for pair in scored[:k] if pair[0] > 0])
+    return results
 
 
 def _hit_from_chunk(
-    chunk: ClinicalChunk,
+    knowledge: KnowledgeBase,
+    chunk_index: int,
     *,
     score: float = 0.0,
     semantic_score: float = 0.0,
@@ -464,7 +2014,9 @@ def _hit_from_chunk(
     lexical_score: float = 0.0,
     rerank_score: float = 0.0,
 ) -> RetrievalHit:
+    chunk = knowledge.chunks[chunk_index]
     return RetrievalHit(
+        chunk_index=chunk_index,
         chunk_id=chunk.chunk_id,
         document_id=chunk.document_id,
         source=chunk.source,
@@ -481,36 +2033,65 @@ def _hit_from_chunk(
     )
 
 
-def _rrf_fuse(vector_hits: Sequence[RetrievalHit], lexical_hits: Sequence[RetrievalHit]) -> list[RetrievalHit]:
-    scores: dict[str, float] = {}
-    best: dict[str, RetrievalHit] = {}
-
-    for rank, hit in enumerate(vector_hits, start=1):
-        scores[hit.chunk_id] = scores.get(hit.chunk_id, 0.0) + (1.0 / (RRF_K + rank))
-        best[hit.chunk_id] = hit
-
-    for rank, hit in enumerate(lexical_hits, start=1):
-        scores[hit.chunk_id] = scores.get(hit.chunk_id, 0.0) + (0.9 / (RRF_K + rank))
-        existing = best.get(hit.chunk_id)
-        if existing:
-            best[hit.chunk_id] = RetrievalHit(
-                **{
-                    **existing.__dict__,
-                    "lexical_score": max(existing.lexical_score, hit.lexical_score),
-                    "semantic_score": max(existing.semantic_score, hit.semantic_score),
-                    "vector_score": max(existing.vector_score, hit.vector_score),
-                }
-            )
+def _rrf_fuse(
+    vector_candidates: ScoredCandidates,
+    lexical_candidates: ScoredCandidates,
+    knowledge: KnowledgeBase,
+    *,
+    semantic: bool = False,
+    rrf_k: int | None = None,
+    lexical_weight: float = LEXICAL_RRF_WEIGHT,
+) -> FusedCandidates:
+    # Candidates are fused by chunk id, so records that share an id pool their RRF score.
+    rrf_k = RRF_K if rrf_k is None else rrf_k
+    chunks = knowledge.chunks
+    positions: dict[str, int] = {}
+    chunk_indices: list[int] = []
+    rrf_scores: list[float] = []
+    vector_scores: list[float] = []
+    lexical_scores: list[float] = []
+
+    for rank, (chunk_index, score) in enumerate(
+        zip(vector_candidates.chunk_indices, vector_candidates.scores),
+        start=1,
+    ):
+        chunk_id = chunks[chunk_index].chunk_id
+        position = positions.get(chunk_id)
+        if position is None:
+            positions[chunk_id] = len(chunk_indices)
+            chunk_indices.append(chunk_index)
+            rrf_scores.append(1.0 / (rrf_k + rank))
+            vector_scores.append(score)
+            lexical_scores.append(0.0)
         else:
-            best[hit.chunk_id] = hit
-
-    fused = []
-    for chunk_id, score in scores.items():
-        hit = best[chunk_id]
-        fused.append(RetrievalHit(**{**hit.__dict__, "score": score}))
-
-    fused.sort(key=lambda hit: hit.score, reverse=True)
-    return fused
+            chunk_indices[position] = chunk_index
+            rrf_scores[position] += 1.0 / (rrf_k + rank)
+            vector_scores[position] = score
+
+    for rank, (chunk_index, score) in enumerate(
+        zip(lexical_candidates.chunk_indices, lexical_candidates.scores),
+        start=1,
+    ):
+        chunk_id = chunks[chunk_index].chunk_id
+        position = positions.get(chunk_id)
+        if position is None:
+            positions[chunk_id] = len(chunk_indices)
+            chunk_indices.append(chunk_index)
+            rrf_scores.append(lexical_weight / (rrf_k + rank))
+            vector_scores.append(0.0)
+            lexical_scores.append(score)
+        else:
+            rrf_scores[position] += lexical_weight / (rrf_k + rank)
+            lexical_scores[position] = max(lexical_scores[position], score)
+
+    order = sorted(range(len(chunk_indices)), key=rrf_scores.__getitem__, reverse=True)
+    return FusedCandidates(
+        chunk_indices=[chunk_indices[position] for position in order],
+        rrf_scores=[rrf_scores[position] for position in order],
+        vector_scores=[vector_scores[position] for position in order],
+        lexical_scores=[lexical_scores[position] for position in order],
+        semantic=semantic,
+    )
 
 
 def _classify_question_type(question: str) -> str:
@@ -524,42 +2105,59 @@ def _normalized_phrase_text(text: str) -> str:
     return re.sub(r"\s+", " ", text.lower()).strip()
 
 
-def _rerank(question: str, hits: Sequence[RetrievalHit], k: int) -> list[RetrievalHit]:
-    terms = _extract_terms(question)
-    desired_question_type = _classify_question_type(question)
-    normalized_question = _normalized_phrase_text(question)
-    requested_phrases = [phrase for phrase in IMPORTANT_PHRASES if phrase in normalized_question]
-    reranked = []
-
-    for hit in hits:
-        focus_terms = _extract_terms(hit.question_focus)
-        question_type_bonus = 0.08 if desired_question_type and desired_question_type in hit.question_type else 0.0
-        topic_terms = terms - TOPIC_STOP_TERMS
-        topic_overlap = len(topic_terms & focus_terms)
-        topic_bonus = min(0.3, topic_overlap * 0.15)
-        observed_terms = _extract_terms(f"{hit.question_focus} {hit.question} {hit.text}")
-        observed_text = _normalized_phrase_text(f"{hit.question_focus} {hit.question} {hit.text}")
-        exact_phrase_bonus = min(0.28, 0.14 * sum(1 for phrase in requested_phrases if phrase in observed_text))
+def _rerank(
+    query: QueryAnalysis,
+    candidates: FusedCandidates,
+    k: int,
+    knowledge: KnowledgeBase,
+    weights: RerankWeights = DEFAULT_RERANK_WEIGHTS,
+) -> list[RetrievalHit]:
+    """Rerank fused candidates and build hits for the ``k`` best only."""
+    terms = query.terms
+    topic_term_ids = knowledge.vocabulary.encode(terms - TOPIC_STOP_TERMS)
+    query_term_ids = knowledge.vocabulary.encode(terms)
+    desired_question_type = query.question_type
+    requested_phrase_mask = query.phrase_mask
+    penalize_broad_diabetes = "type 2 diabetes" in query.normalized_text
+    rerank_scores = []
+    observed_lexical_scores = []
+
+    for chunk_index, rrf_score, lexical_score in zip(
+        candidates.chunk_indices,
+        candidates.rrf_scores,
+        candidates.lexical_scores,
+    ):
+        chunk = knowledge.chunks[chunk_index]
+        features = chunk.rerank_features
+        question_type_bonus = (
+            weights.question_type_bonus
+            if desired_question_type and desired_question_type in chunk.question_type
+            else 0.0
+        )
+        topic_overlap = _count_members(features.focus_term_ids, topic_term_ids)
+        topic_bonus = min(weights.topic_bonus_cap, topic_overlap * weights.topic_bonus_per_term)
+        exact_phrase_bonus = min(
+            weights.phrase_bonus_cap,
+            weights.phrase_bonus_per_match * (requested_phrase_mask & features.phrase_mask).bit_count(),
+        )
         prevention_phrase_bonus = (
-            0.12
-            if desired_question_type == "prevention"
-            and re.search(r"\b(prevent|prevention|delay|lower your risk|reduce.*risk)\b", observed_text)
+            weights.prevention_bonus
+            if desired_question_type == "prevention" and features.mentions_prevention
             else 0.0
         )
         broad_diabetes_penalty = (
-            0.12
-            if "type 2 diabetes" in normalized_question
-            and "diabetes problems" in _normalized_phrase_text(hit.question_focus)
-            and "type 2 diabetes" not in _normalized_phrase_text(f"{hit.question_focus} {hit.question}")
+            weights.broad_diabetes_penalty
+            if penalize_broad_diabetes and features.broad_diabetes_focus
             else 0.0
         )
         observed_lexical_score = max(
-            hit.lexical_score,
-            len(terms & observed_terms) / max(1, len(terms)),
+            lexical_score,
+            _count_members(features.observed_term_ids, query_term_ids) / max(1, len(terms)),
         )
-        support_bonus = min(0.18, observed_lexical_score * 0.18)
-        rerank_score = (
-            hit.score
+        support_bonus = min(weights.support_bonus_scale, observed_lexical_score * weights.support_bonus_scale)
+        observed_lexical_scores.append(observed_lexical_score)
+        rerank_scores.append(
+            rrf_score
             + topic_bonus
             + question_type_bonus
             + support_bonus
@@ -567,18 +2165,20 @@ def _rerank(question: str, hits: Sequence[RetrievalHit], k: int) -> list[Retriev
             + prevention_phrase_bonus
             - broad_diabetes_penalty
         )
-        reranked.append(
-            RetrievalHit(
-                **{
-                    **hit.__dict__,
-                    "lexical_score": observed_lexical_score,
-                    "rerank_score": rerank_score,
-                }
-            )
-        )
 
-    reranked.sort(key=lambda hit: hit.rerank_score, reverse=True)
-    return reranked[:k]
+    order = sorted(range(len(rerank_scores)), key=rerank_scores.__getitem__, reverse=True)
+    return [
+        _hit_from_chunk(
+            knowledge,
+            candidates.chunk_indices[position],
+            score=candidates.rrf_scores[position],
+            semantic_score=candidates.vector_scores[position] if candidates.semantic else 0.0,
+            vector_score=candidates.vector_scores[position],
+            lexical_score=observed_lexical_scores[position],
+            rerank_score=rerank_scores[position],
+        )
+        for position in order[:k]
+    ]
 
 
 def retrieve(
@@ -588,19 +2188,103 @@ def retrieve(
     retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
     query_embedding: Sequence[float] | None = None,
 ) -> list[RetrievalHit]:
+    return retrieve_many(
+        [question],
+        top_k=top_k,
+        retrieval_mode=retrieval_mode,
+        query_embeddings=[query_embedding],
+    )[0]
+
+
+def retrieve_many(
+    questions: Sequence[str],
+    *,
+    top_k: int = TOP_K,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+    query_embeddings: Sequence[Sequence[float] | None] | None = None,
+    timings: Sequence[StageTimings] | None = None,
+    batch_timings: StageTimings | None = None,
+) -> list[list[RetrievalHit]]:
+    """Retrieve for several questions at once with shared vector and lexical passes.
+
+    Each result list is identical to what ``retrieve`` returns for that question alone.
+    Pass one ``StageTimings`` per question to collect per-stage latency, and
+    ``batch_timings`` to collect the shared passes' totals.
+    """
     knowledge = load_knowledge_base()
+    timings = timings or [StageTimings() for _question in questions]
+    queries = []
+    for question, question_timings in zip(questions, timings):
+        started = time.perf_counter()
+        queries.append(analyze_query(question))
+        question_timings.record("scope", started)
+
+    batch_timings = StageTimings() if batch_timings is None else batch_timings
+    started = time.perf_counter()
+    lexical_candidates = _lexical_candidates(queries, knowledge, retrieval_mode)
+    started = batch_timings.record("lexical", started)
     if retrieval_mode == BEDROCK_RETRIEVAL_MODE:
-        vector_hits = _semantic_retrieval(
-            query_embedding or [],
-            knowledge.chunks,
+        vector_candidates = _semantic_retrieval_many(
+            query_embeddings or [None] * len(questions),
+            knowledge,
             VECTOR_CANDIDATE_K,
         )
-        lexical_hits = _bm25_retrieval(question, knowledge, LEXICAL_CANDIDATE_K)
     else:
-        vector_hits = _vector_retrieval(question, knowledge.chunks, VECTOR_CANDIDATE_K)
-        lexical_hits = _lexical_retrieval(question, knowledge.chunks, LEXICAL_CANDIDATE_K)
-    fused_hits = _rrf_fuse(vector_hits, lexical_hits)
-    return _rerank(question, fused_hits, top_k)
+        vector_candidates = _vector_retrieval_many(queries, knowledge, VECTOR_CANDIDATE_K)
+    batch_timings.record("vector", started)
+    if len(timings) == 1:
+        timings[0].merge(batch_timings)
+    return _fuse_candidates(
+        queries,
+        vector_candidates,
+        lexical_candidates,
+        knowledge,
+        top_k,
+        semantic=retrieval_mode == BEDROCK_RETRIEVAL_MODE,
+        timings=timings,
+    )
+
+
+def _lexical_candidates(
+    queries: Sequence[QueryAnalysis],
+    knowledge: KnowledgeBase,
+    retrieval_mode: str,
+    k: int | None = None,
+) -> list[ScoredCandidates]:
+    k = LEXICAL_CANDIDATE_K if k is None else k
+    if retrieval_mode == BEDROCK_RETRIEVAL_MODE:
+        return _bm25_retrieval_many(queries, knowledge, k)
+    return _lexical_retrieval_many(queries, knowledge, k)
+
+
+def _fuse_candidates(
+    queries: Sequence[QueryAnalysis],
+    vector_candidates: list[ScoredCandidates],
+    lexical_candidates: list[ScoredCandidates],
+    knowledge: KnowledgeBase,
+    top_k: int,
+    *,
+    semantic: bool,
+    timings: Sequence[StageTimings] | None = None,
+) -> list[list[RetrievalHit]]:
+    hits = []
+    for query, question_vector_candidates, question_lexical_candidates, question_timings in zip(
+        queries,
+        vector_candidates,
+        lexical_candidates,
+        timings or [StageTimings() for _query in queries],
+    ):
+        started = time.perf_counter()
+        candidates = _rrf_fuse(
+            question_vector_candidates,
+            question_lexical_candidates,
+            knowledge,
+            semantic=semantic,
+        )
+        started = question_timings.record("fusion", started)
+        hits.append(_rerank(query, candidates, top_k, knowledge))
+        question_timings.record("rerank", started)
+    return hits
 
 
 def _clip_answer(text: str, max_words: int = 90, max_sentences: int = 2) -> str:
@@ -656,12 +2340,61 @@ def _get_bedrock_client():
     if _BEDROCK_CLIENT is not _UNINITIALIZED:
         return _BEDROCK_CLIENT
     if boto3 is None:
-        _BEDROCK_CLIENT = None
+        _BEDROCK_CLIENT = BedrockRuntimeHttpClient(TITAN_EMBEDDING_REGION)
     else:
         _BEDROCK_CLIENT = boto3.client("bedrock-runtime", region_name=TITAN_EMBEDDING_REGION)
     return _BEDROCK_CLIENT
 
 
+def _query_embedding_store():
+    if CACHE_TABLE_NAME:
+        return DynamoDBCacheStore(CACHE_TABLE_NAME)
+    if QUERY_EMBEDDING_CACHE_PATH:
+        return SQLiteCacheStore(Path(QUERY_EMBEDDING_CACHE_PATH))
+    return None
+
+
+QUERY_EMBEDDING_CACHE = QueryResultCache(
+    max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+    ttl_seconds=QUERY_EMBEDDING_CACHE_TTL_DAYS * 86400,
+    shared_store=_query_embedding_store(),
+)
+
+
+def _embedding_input_text(question: str) -> str:
+    # Only whitespace is normalized: case can change the Titan vector.
+    return " ".join(question.split())
+
+
+def query_embedding_cache_key(question: str) -> str:
+    payload = json.dumps(
+        ["titan-query-embedding", _embedding_input_text(question), TITAN_EMBEDDING_MODEL, TITAN_DIMS],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_titan_embedding(question: str) -> tuple[list[float], int, bool]:
+    """Titan embedding for ``question``, served from the two-level cache when possible.
+
+    The whitespace-normalized text is what gets embedded, so a cached vector is exactly
+    what a fresh call would return for any question mapping to the same key. Cache hits
+    report zero embedding tokens.
+    """
+    if not QUERY_EMBEDDING_CACHE.enabled:
+        embedding, tokens = _titan_embedding(_embedding_input_text(question))
+        return embedding, tokens, False
+
+    key = query_embedding_cache_key(question)
+    cached, _tier = QUERY_EMBEDDING_CACHE.get(key)
+    if cached is not None and len(cached.get("embedding", [])) == TITAN_DIMS:
+        return cached["embedding"], 0, True
+
+    embedding, tokens = _titan_embedding(_embedding_input_text(question))
+    QUERY_EMBEDDING_CACHE.put(key, {"embedding": embedding})
+    return embedding, tokens, False
+
+
 def _titan_embedding(text: str) -> tuple[list[float], int]:
     body = json.dumps(
         {
@@ -670,17 +2403,13 @@ def _titan_embedding(text: str) -> tuple[list[float], int]:
             "normalize": True,
         }
     )
-    client = _get_bedrock_client()
-    if client is None:
-        payload = _invoke_titan_embedding_with_aws_cli(body)
-    else:
-        response = client.invoke_model(
-            modelId=TITAN_EMBEDDING_MODEL,
-            body=body,
-            accept="application/json",
-            contentType="application/json",
-        )
-        payload = json.loads(response["body"].read())
+    response = _get_bedrock_client().invoke_model(
+        modelId=TITAN_EMBEDDING_MODEL,
+        body=body,
+        accept="application/json",
+        contentType="application/json",
+    )
+    payload = json.loads(response["body"].read())
     embedding = payload.get("embedding")
     if not isinstance(embedding, list) or len(embedding) != TITAN_DIMS:
         raise RuntimeError("Bedrock returned an invalid embedding response.")
@@ -688,36 +2417,6 @@ def _titan_embedding(text: str) -> tuple[list[float], int]:
     return [float(value) for value in embedding], tokens
 
 
-def _invoke_titan_embedding_with_aws_cli(body: str) -> dict:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        body_path = temp_path / "body.json"
-        output_path = temp_path / "response.json"
-        body_path.write_text(body, encoding="utf-8")
-        subprocess.run(
-            [
-                "aws",
-                "bedrock-runtime",
-                "invoke-model",
-                "--region",
-                TITAN_EMBEDDING_REGION,
-                "--model-id",
-                TITAN_EMBEDDING_MODEL,
-                "--content-type",
-                "application/json",
-                "--accept",
-                "application/json",
-                "--body",
-                f"fileb://{body_path}",
-                str(output_path),
-            ],
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-        return json.loads(output_path.read_text(encoding="utf-8"))
-
-
 def _usage(
     prompt_tokens: int = 0,
     completion_tokens: int = 0,
@@ -741,13 +2440,19 @@ def _usage(
     }
 
 
-def _generate_answer(question: str, hits: Sequence[RetrievalHit]) -> tuple[str, dict]:
+def _has_support(hits: Sequence[RetrievalHit], min_support_score: float | None = None) -> bool:
+    """Whether the best hit is strong enough to answer from rather than reporting not found."""
     if not hits:
+        return False
+    min_support_score = MIN_SUPPORT_SCORE if min_support_score is None else min_support_score
+    return hits[0].rerank_score >= min_support_score and hits[0].lexical_score >= MIN_LEXICAL_SUPPORT
+
+
+def _generate_answer(question: str, hits: Sequence[RetrievalHit]) -> tuple[str, dict]:
+    if not _has_support(hits):
         return NOT_FOUND_MESSAGE, _usage()
 
     best_hit = hits[0]
-    if best_hit.rerank_score < MIN_SUPPORT_SCORE or best_hit.lexical_score < MIN_LEXICAL_SUPPORT:
-        return NOT_FOUND_MESSAGE, _usage()
 
     client = _get_client()
     if USE_LLM and client is not None:
@@ -783,14 +2488,6 @@ def _generate_answer(question: str, hits: Sequence[RetrievalHit]) -> tuple[str,
     return answer or NOT_FOUND_MESSAGE, _usage()
 
 
-def _is_in_clinical_scope(question: str) -> bool:
-    terms = _extract_terms(question)
-    normalized_question = _normalized_phrase_text(question)
-    return bool(terms & CLINICAL_SCOPE_TERMS) or any(
-        phrase in normalized_question for phrase in IMPORTANT_PHRASES
-    )
-
-
 def _archive_url(source_url: str) -> str:
     normalized = source_url.strip()
     if not normalized:
@@ -850,43 +2547,200 @@ def answer_question(
     *,
     retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
 ) -> tuple[dict, dict]:
+    return answer_questions([question], retrieval_mode=retrieval_mode)[0]
+
+
+def answer_questions(
+    questions: Sequence[str],
+    *,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+) -> list[tuple[dict, dict]]:
+    """Answer a batch of questions, sharing one retrieval pass across the in-scope ones.
+
+    Each ``(result, usage)`` pair matches what ``answer_question`` returns for that
+    question on its own. When several questions share the retrieval pass, their usage
+    carries the pass's totals as ``batchStages`` instead of per-question lexical and
+    vector stages. A blocked question's usage names the rule that fired as ``safetyPattern``,
+    for audit logs only; the result itself never includes it.
+    """
     if retrieval_mode not in RETRIEVAL_MODES:
         raise ValueError(f"Unsupported retrieval mode: {retrieval_mode}")
 
-    safety_decision = assess_question_safety(question)
-    if safety_decision.blocked:
-        return {
-            "answer": safety_decision.message,
-            "citations": [],
-            "retrieval": {
-                **_retrieval_metadata(retrieval_mode),
-                "strategy": "blocked_before_retrieval",
-                "topK": TOP_K,
-                "vectorCandidateK": VECTOR_CANDIDATE_K,
-                "lexicalCandidateK": LEXICAL_CANDIDATE_K,
-                "hits": [],
-            },
-            "safety": {
-                "answerMode": safety_decision.answer_mode,
-                "validationPassed": True,
-                "blockedReason": safety_decision.blocked_reason,
-            },
-        }, _usage()
-
-    query_embedding = None
-    embedding_tokens = 0
-    if _is_in_clinical_scope(question) and retrieval_mode == BEDROCK_RETRIEVAL_MODE:
-        query_embedding, embedding_tokens = _titan_embedding(question)
-
-    hits = (
-        retrieve(question, retrieval_mode=retrieval_mode, query_embedding=query_embedding)
-        if _is_in_clinical_scope(question)
-        else []
-    )
+    timings = [StageTimings() for _question in questions]
+    queries = []
+    for question, question_timings in zip(questions, timings):
+        started = time.perf_counter()
+        safety = assess_question_safety(question)
+        started = question_timings.record("safety", started)
+        queries.append(analyze_query(question, safety=safety))
+        question_timings.record("scope", started)
+
+    responses: list[tuple[dict, dict] | None] = [None] * len(questions)
+    retrieval_positions = []
+    for position, query in enumerate(queries):
+        if query.safety.blocked:
+            responses[position] = (
+                _blocked_response(query.safety, retrieval_mode),
+                {**_usage(), "safetyPattern": query.safety.matched_pattern},
+            )
+        elif query.in_scope:
+            retrieval_positions.append(position)
+
+    hits_by_position: dict[int, list[RetrievalHit]] = {}
+    embeddings_by_position: dict[int, tuple[list[float] | None, int, bool]] = {}
+    batch_stages = None
+    if retrieval_positions:
+        knowledge = load_knowledge_base()
+        retrieval_queries = [queries[position] for position in retrieval_positions]
+        batch_timings = StageTimings()
+        if retrieval_mode == BEDROCK_RETRIEVAL_MODE:
+            # Titan calls are network-bound; run them while BM25 uses the CPU.
+            executor = _get_embedding_executor()
+            submitted = time.perf_counter()
+            embedding_calls = [_EmbeddingCall(executor, query.question) for query in retrieval_queries]
+            embedded_at: dict[int, float] = {}
+            for position, call in zip(retrieval_positions, embedding_calls):
+                call.future.add_done_callback(
+                    lambda _future, position=position: embedded_at.setdefault(position, time.perf_counter())
+                )
+            started = time.perf_counter()
+            lexical_candidates = _lexical_candidates(retrieval_queries, knowledge, retrieval_mode)
+            batch_timings.record("lexical", started)
+            for position, call in zip(retrieval_positions, embedding_calls):
+                embeddings_by_position[position] = _embedding_before_deadline(call)
+                # A timed-out call counts until the request stopped waiting for it.
+                embedded_at.setdefault(position, time.perf_counter())
+                timings[position].seconds["embedding"] = embedded_at[position] - submitted
+            started = time.perf_counter()
+            vector_candidates = _semantic_retrieval_many(
+                [embeddings_by_position[position][0] for position in retrieval_positions],
+                knowledge,
+                VECTOR_CANDIDATE_K,
+            )
+            batch_timings.record("vector", started)
+        else:
+            started = time.perf_counter()
+            lexical_candidates = _lexical_candidates(retrieval_queries, knowledge, retrieval_mode)
+            started = batch_timings.record("lexical", started)
+            vector_candidates = _vector_retrieval_many(retrieval_queries, knowledge, VECTOR_CANDIDATE_K)
+            batch_timings.record("vector", started)
+        if len(retrieval_positions) == 1:
+            timings[retrieval_positions[0]].merge(batch_timings)
+        else:
+            batch_stages = {"questions": len(retrieval_positions), **batch_timings.milliseconds()}
+        batch_hits = _fuse_candidates(
+            retrieval_queries,
+            vector_candidates,
+            lexical_candidates,
+            knowledge,
+            TOP_K,
+            semantic=retrieval_mode == BEDROCK_RETRIEVAL_MODE,
+            timings=[timings[position] for position in retrieval_positions],
+        )
+        hits_by_position = dict(zip(retrieval_positions, batch_hits))
+
+    for position, question in enumerate(questions):
+        if responses[position] is None:
+            query_embedding, embedding_tokens, embedding_cache_hit = embeddings_by_position.get(
+                position,
+                ([], 0, False),
+            )
+            started = time.perf_counter()
+            responses[position] = _grounded_response(
+                question,
+                hits_by_position.get(position, []),
+                retrieval_mode=retrieval_mode,
+                embedding_tokens=embedding_tokens,
+                embedding_cache_hit=embedding_cache_hit,
+                degraded_to_lexical=query_embedding is None,
+            )
+            timings[position].record("generation", started)
+        responses[position][1]["stages"] = timings[position].milliseconds()
+        if batch_stages is not None and position in hits_by_position:
+            responses[position][1]["batchStages"] = dict(batch_stages)
+    return responses
+
+
+def _get_embedding_executor() -> ThreadPoolExecutor:
+    global _EMBEDDING_EXECUTOR
+    if _EMBEDDING_EXECUTOR is None:
+        _EMBEDDING_EXECUTOR = ThreadPoolExecutor(
+            max_workers=EMBEDDING_WORKERS,
+            thread_name_prefix="clinical-rag-embedding",
+        )
+    return _EMBEDDING_EXECUTOR
+
+
+class _EmbeddingCall:
+    """A Titan query-embedding call on the shared executor, timed from when it was submitted.
+
+    Late calls keep running in the background and can occupy every worker, so the deadline
+    covers time spent queued as well; a call no worker has picked up by then is cancelled.
+    """
+
+    __slots__ = ("future", "deadline")
+
+    def __init__(self, executor: ThreadPoolExecutor, question: str) -> None:
+        self.deadline = time.monotonic() + EMBEDDING_DEADLINE_SECONDS
+        self.future = executor.submit(_cached_titan_embedding, question)
+
+
+def _embedding_before_deadline(call: _EmbeddingCall) -> tuple[list[float] | None, int, bool]:
+    """Wait for a Titan embedding until its deadline; on timeout or error retrieval goes lexical-only.
+
+    A late call keeps running in the background and still fills the query embedding cache.
+    """
+    try:
+        return call.future.result(timeout=max(0.0, call.deadline - time.monotonic()))
+    except FutureTimeoutError:
+        call.future.cancel()
+        logger.warning(
+            "clinical_rag_embedding_degraded reason=deadline deadline_seconds=%s",
+            EMBEDDING_DEADLINE_SECONDS,
+        )
+    except Exception as error:  # noqa: BLE001
+        logger.warning(
+            "clinical_rag_embedding_degraded reason=error error_type=%s error_message=%s",
+            type(error).__name__,
+            str(error),
+        )
+    return None, 0, False
+
+
+def _blocked_response(safety_decision, retrieval_mode: str) -> dict:
+    return {
+        "answer": safety_decision.message,
+        "citations": [],
+        "retrieval": {
+            **_retrieval_metadata(retrieval_mode),
+            "strategy": "blocked_before_retrieval",
+            "topK": TOP_K,
+            "vectorCandidateK": VECTOR_CANDIDATE_K,
+            "lexicalCandidateK": LEXICAL_CANDIDATE_K,
+            "hits": [],
+        },
+        "safety": {
+            "answerMode": safety_decision.answer_mode,
+            "validationPassed": True,
+            "blockedReason": safety_decision.blocked_reason,
+        },
+    }
+
+
+def _grounded_response(
+    question: str,
+    hits: list[RetrievalHit],
+    *,
+    retrieval_mode: str,
+    embedding_tokens: int,
+    embedding_cache_hit: bool = False,
+    degraded_to_lexical: bool = False,
+) -> tuple[dict, dict]:
     answer, answer_usage = _generate_answer(question, hits)
     usage = {
         **answer_usage,
         "embeddingTokens": embedding_tokens,
+        "embeddingCacheHit": embedding_cache_hit,
         "embeddingCostUsd": _usage(embedding_tokens=embedding_tokens)["embeddingCostUsd"],
         "totalTokens": int(answer_usage.get("promptTokens", 0))
         + int(answer_usage.get("completionTokens", 0))
@@ -914,6 +2768,7 @@ def answer_question(
             "topK": TOP_K,
             "vectorCandidateK": VECTOR_CANDIDATE_K,
             "lexicalCandidateK": LEXICAL_CANDIDATE_K,
+            "degradedToLexical": degraded_to_lexical,
             "hits": [_serialize_hit(hit) for hit in hits],
         },
         "safety": {
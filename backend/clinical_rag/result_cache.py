@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - Lambda includes boto3
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+RESULT_CACHE_SIZE = max(0, int(os.getenv("CLINICAL_RAG_RESULT_CACHE_SIZE", "256")))
+RESULT_CACHE_TTL_SECONDS = max(1, int(os.getenv("CLINICAL_RAG_RESULT_CACHE_TTL_SECONDS", "900")))
+CACHE_TABLE_NAME = os.getenv("CLINICAL_RAG_CACHE_TABLE_NAME", "").strip()
+RESULT_CACHE_DIR = os.getenv("CLINICAL_RAG_RESULT_CACHE_DIR", "").strip()
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", question.lower()).strip()
+
+
+def result_cache_key(question: str, retrieval_mode: str, fingerprint: str) -> str:
+    payload = json.dumps(
+        [normalize_question(question), retrieval_mode, fingerprint],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DynamoDBCacheStore:
+    """Shared cache tier backed by a DynamoDB table keyed on ``cacheKey`` with a ``ttl`` attribute."""
+
+    def __init__(self, table_name: str, *, client=None) -> None:
+        self.table_name = table_name
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 is required for DynamoDB access.")
+            self._client = boto3.client("dynamodb")
+        return self._client
+
+    def get(self, key: str, now: float) -> dict | None:
+        response = self._get_client().get_item(
+            TableName=self.table_name,
+            Key={"cacheKey": {"S": key}},
+            ConsistentRead=False,
+        )
+        item = response.get("Item")
+        if not isinstance(item, dict):
+            return None
+        # DynamoDB deletes expired items lazily, so check the TTL on read as well.
+        if float(item.get("ttl", {}).get("N", 0)) <= now:
+            return None
+        return json.loads(item.get("payload", {}).get("S", "null"))
+
+    def put(self, key: str, value: dict, expires_at: float) -> None:
+        self._get_client().put_item(
+            TableName=self.table_name,
+            Item={
+                "cacheKey": {"S": key},
+                "payload": {"S": json.dumps(value, separators=(",", ":"))},
+                "ttl": {"N": str(int(expires_at))},
+            },
+        )
+
+
+class FileCacheStore:
+    """Local stand-in for the shared tier: one JSON file per key under ``directory``."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str, now: float) -> dict | None:
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if float(entry.get("expiresAt", 0)) <= now:
+            return None
+        return entry.get("payload")
+
+    def put(self, key: str, value: dict, expires_at: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.name}.tmp")
+        temp_path.write_text(
+            json.dumps({"expiresAt": expires_at, "payload": value}, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        temp_path.replace(path)
+
+
+class SQLiteCacheStore:
+    """Local stand-in for the shared tier backed by a single SQLite file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(cache_key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+        return self._connection
+
+    def get(self, key: str, now: float) -> dict | None:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT payload FROM cache WHERE cache_key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: dict, expires_at: float) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (cache_key, expires_at, payload) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value, separators=(",", ":"))),
+            )
+            connection.commit()
+
+
+class QueryResultCache:
+    """Bounded in-process LRU with TTL, optionally backed by a shared store.
+
+    ``get`` checks memory first, then the shared store; shared hits are promoted into
+    memory. Shared-store failures are logged and treated as misses so the cache never
+    fails a request.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = RESULT_CACHE_SIZE,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        shared_store=None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_store = shared_store
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.shared_store is not None
+
+    def get(self, key: str) -> tuple[dict | None, str]:
+        """Return ``(value, tier)`` where tier is ``memory``, ``shared`` or ``miss``."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], "memory"
+            if entry is not None:
+                del self._entries[key]
+
+        value = None
+        if self.shared_store is not None:
+            try:
+                value = self.shared_store.get(key, now)
+            except Exception as error:  # noqa: BLE001
+                logger.warning(
+                    "clinical_rag_cache_read_failed error_type=%s error_message=%s",
+                    type(error).__name__,
+                    str(error),
+                )
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None, "miss"
+            self.hits += 1
+            self._remember(key, value, now + self.ttl_seconds)
+        return value, "shared"
+
+    def put(self, key: str, value: dict) -> None:
+        expires_at = self.clock() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        if self.shared_store is not None:
+            try:
+                self.shared_store.put(key, value, expires_at)
+            except Exception as error:  # noqa: BLE001
+                logger.warning(
+                    "clinical_rag_cache_write_failed error_type=%s error_message=%s",
+                    type(error).__name__,
+                    str(error),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, value: dict, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def default_shared_store():
+    if CACHE_TABLE_NAME:
+        return DynamoDBCacheStore(CACHE_TABLE_NAME)
+    if RESULT_CACHE_DIR:
+        return FileCacheStore(Path(RESULT_CACHE_DIR))
+    return None
@@ -14,39 +14,35 @@ CLINICIAN_MESSAGE = (
     "your situation with a licensed clinician who can consider your full health history."
 )
 
-_EMERGENCY_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in [
-        r"\b(chest pain|crushing chest|shortness of breath)\b",
-        r"\b(face droop|slurred speech|stroke symptoms)\b",
-        r"\b(suicidal|kill myself|self[- ]harm)\b",
-        r"\b(overdose|anaphylaxis|severe allergic)\b",
-        r"\b(emergency|urgent|right now)\b",
-    ]
-]
-
-_PATIENT_SPECIFIC_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in [
-        r"\b(should|can|may)\s+i\s+(start|stop|take|increase|decrease|switch|combine)\b",
-        r"\bwhat\s+dose\b",
-        r"\bhow\s+much\s+(ozempic|wegovy|mounjaro|zepbound|insulin|metformin|medication)\b",
-        r"\b(do i have|am i diabetic|diagnose me|what is my diagnosis)\b",
-        r"\b(my labs|my blood pressure|my a1c|my symptoms|my medication)\b",
-        r"\b(prescribe|prescription|refill)\b",
-    ]
-]
-
-_PROMPT_INJECTION_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in [
-        r"ignore (all )?(previous|above|system) instructions",
-        r"developer message",
-        r"system prompt",
-        r"reveal.*instructions",
-        r"do not cite",
-    ]
-]
+_EMERGENCY_PATTERNS = (
+    r"\b(chest pain|crushing chest|shortness of breath)\b",
+    r"\b(face droop|slurred speech|stroke symptoms)\b",
+    r"\b(suicidal|kill myself|self[- ]harm)\b",
+    r"\b(overdose|anaphylaxis|severe allergic)\b",
+    r"\b(emergency|urgent|right now)\b",
+)
+
+_PATIENT_SPECIFIC_PATTERNS = (
+    r"\b(should|can|may)\s+i\s+(start|stop|take|increase|decrease|switch|combine)\b",
+    r"\bwhat\s+dose\b",
+    r"\bhow\s+much\s+(ozempic|wegovy|mounjaro|zepbound|insulin|metformin|medication)\b",
+    r"\b(do i have|am i diabetic|diagnose me|what is my diagnosis)\b",
+    r"\b(my labs|my blood pressure|my a1c|my symptoms|my medication)\b",
+    r"\b(prescribe|prescription|refill)\b",
+)
+
+_PROMPT_INJECTION_PATTERNS = (
+    r"ignore (all )?(previous|above|system) instructions",
+    r"developer message",
+    r"system prompt",
+    r"reveal.*instructions",
+    r"do not cite",
+)
+
+PROMPT_INJECTION_MESSAGE = (
+    "I can't follow instructions that try to bypass grounding or citation rules. "
+    "Ask a general medical information question and I'll answer from the approved sources."
+)
 
 
 @dataclass(frozen=True)
@@ -55,40 +51,51 @@ class SafetyDecision:
     answer_mode: str
     blocked_reason: str
     message: str
+    matched_pattern: str = ""
+
+
+class _CategoryScanner:
+    """All of a category's patterns compiled into one non-capturing alternation.
+
+    Most questions match nothing, so they cost one search per category. When the
+    alternation does match, the rule it took is the first pattern that also matches at
+    the same offset, which is what gets reported for the audit log.
+    """
+
+    def __init__(self, blocked_reason: str, message: str, patterns: tuple[str, ...]) -> None:
+        self.blocked_reason = blocked_reason
+        self.message = message
+        self.patterns = patterns
+        self._rules = tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+    def scan(self, normalized: str) -> str | None:
+        match = self._regex.search(normalized)
+        if match is None:
+            return None
+        return next(rule.pattern for rule in self._rules if rule.match(normalized, match.start()))
+
+
+# Checked in order: the first category with a match decides the response.
+SAFETY_SCANNERS = (
+    _CategoryScanner("urgent_or_emergency", EMERGENCY_MESSAGE, _EMERGENCY_PATTERNS),
+    _CategoryScanner("patient_specific_medical_advice", CLINICIAN_MESSAGE, _PATIENT_SPECIFIC_PATTERNS),
+    _CategoryScanner("prompt_injection", PROMPT_INJECTION_MESSAGE, _PROMPT_INJECTION_PATTERNS),
+)
+
+_ALLOWED = SafetyDecision(blocked=False, answer_mode="grounded", blocked_reason="", message="")
 
 
 def assess_question_safety(question: str) -> SafetyDecision:
     normalized = " ".join(question.split())
-    if any(pattern.search(normalized) for pattern in _EMERGENCY_PATTERNS):
-        return SafetyDecision(
-            blocked=True,
-            answer_mode="blocked",
-            blocked_reason="urgent_or_emergency",
-            message=EMERGENCY_MESSAGE,
-        )
-
-    if any(pattern.search(normalized) for pattern in _PATIENT_SPECIFIC_PATTERNS):
-        return SafetyDecision(
-            blocked=True,
-            answer_mode="blocked",
-            blocked_reason="patient_specific_medical_advice",
-            message=CLINICIAN_MESSAGE,
-        )
-
-    if any(pattern.search(normalized) for pattern in _PROMPT_INJECTION_PATTERNS):
-        return SafetyDecision(
-            blocked=True,
-            answer_mode="blocked",
-            blocked_reason="prompt_injection",
-            message=(
-                "I can't follow instructions that try to bypass grounding or citation rules. "
-                "Ask a general medical information question and I'll answer from the approved sources."
-            ),
-        )
-
-    return SafetyDecision(
-        blocked=False,
-        answer_mode="grounded",
-        blocked_reason="",
-        message="",
-    )
+    for scanner in SAFETY_SCANNERS:
+        matched_pattern = scanner.scan(normalized)
+        if matched_pattern is not None:
+            return SafetyDecision(
+                blocked=True,
+                answer_mode="blocked",
+                blocked_reason=scanner.blocked_reason,
+                message=scanner.message,
+                matched_pattern=matched_pattern,
+            )
+    return _ALLOWED
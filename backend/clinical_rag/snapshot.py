@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Mapping, Sequence
+
+SNAPSHOT_MAGIC = b"CRAGSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 64
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _aligned(offset: int) -> int:
+    return (offset + BLOCK_ALIGNMENT - 1) // BLOCK_ALIGNMENT * BLOCK_ALIGNMENT
+
+
+def write_snapshot(
+    path: Path,
+    header: Mapping,
+    blocks: Mapping[str, tuple[str, Sequence[float] | Sequence[int]]],
+) -> None:
+    """Write a JSON header followed by 64-byte aligned typed array blocks.
+
+    Layout: magic, little-endian uint64 header length, UTF-8 JSON header, then the
+    raw blocks. ``blocks`` maps a name to an ``array`` typecode and its values; the
+    header records each block's typecode, offset and length so readers can map them
+    without parsing the numeric data.
+    """
+    encoded_blocks = {
+        name: (typecode, array(typecode, values).tobytes())
+        for name, (typecode, values) in blocks.items()
+    }
+    block_table: dict[str, dict] = {}
+    header_payload = {
+        **header,
+        "formatVersion": SNAPSHOT_FORMAT_VERSION,
+        "byteOrder": sys.byteorder,
+        "blocks": block_table,
+    }
+
+    # Offsets depend on the header length, which depends on the offsets; iterate
+    # until the encoded header is stable.
+    header_bytes = b""
+    while True:
+        offset = _aligned(len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size + len(header_bytes))
+        for name, (typecode, data) in encoded_blocks.items():
+            block_table[name] = {
+                "typecode": typecode,
+                "offset": offset,
+                "count": len(data) // array(typecode).itemsize,
+            }
+            offset = _aligned(offset + len(data))
+        encoded_header = json.dumps(header_payload, separators=(",", ":")).encode("utf-8")
+        if encoded_header == header_bytes:
+            break
+        header_bytes = encoded_header
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(SNAPSHOT_MAGIC)
+        handle.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        handle.write(header_bytes)
+        for name, (_typecode, data) in encoded_blocks.items():
+            handle.write(b"\0" * (block_table[name]["offset"] - handle.tell()))
+            handle.write(data)
+    temp_path.replace(path)
+
+
+def open_snapshot(path: Path) -> tuple[dict, dict[str, memoryview]]:
+    """Memory-map a snapshot and return its header plus typed zero-copy views of each block."""
+    with path.open("rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    prefix_length = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+    if len(mapped) < prefix_length or mapped[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a clinical RAG snapshot.")
+    (header_length,) = _HEADER_LENGTH.unpack_from(mapped, len(SNAPSHOT_MAGIC))
+    header = json.loads(bytes(mapped[prefix_length : prefix_length + header_length]))
+    if header.get("formatVersion") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version: {header.get('formatVersion')}")
+    if header.get("byteOrder") != sys.byteorder:
+        raise SnapshotError("Snapshot byte order does not match this platform.")
+
+    view = memoryview(mapped)
+    blocks = {}
+    for name, block in header.get("blocks", {}).items():
+        typecode = str(block["typecode"])
+        start = int(block["offset"])
+        end = start + int(block["count"]) * array(typecode).itemsize
+        if end > len(mapped):
+            raise SnapshotError(f"Snapshot block {name} is truncated.")
+        blocks[name] = view[start:end].cast(typecode)
+    return header, blocks
+
+
+def parse_args():
+    import argparse
+
+    from . import rag_engine
+
+    parser = argparse.ArgumentParser(description="Build the clinical RAG knowledge base snapshot.")
+    parser.add_argument("--data-path", default=str(rag_engine.DATA_PATH))
+    parser.add_argument("--embedding-cache-path", default=str(rag_engine.EMBEDDING_CACHE_PATH))
+    parser.add_argument(
+        "--titan-embedding-cache-path",
+        default=str(rag_engine.TITAN_EMBEDDING_CACHE_PATH),
+    )
+    parser.add_argument("--output", default="")
+    return parser.parse_args()
+
+
+def main() -> None:
+    from . import rag_engine
+
+    args = parse_args()
+    data_path = Path(args.data_path)
+    output_path = Path(args.output) if args.output else rag_engine.default_snapshot_path(data_path)
+    source_paths = rag_engine.SnapshotSources(
+        data_path=data_path,
+        embedding_cache_path=Path(args.embedding_cache_path),
+        titan_embedding_cache_path=Path(args.titan_embedding_cache_path),
+    )
+    knowledge = rag_engine.build_knowledge_base(source_paths)
+    rag_engine.write_knowledge_base_snapshot(knowledge, output_path, source_paths)
+    print(json.dumps({"chunks": len(knowledge.chunks), "snapshotOutput": str(output_path)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
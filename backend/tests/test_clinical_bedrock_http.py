@@ -0,0 +1,142 @@
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import clinical_rag.ingestion as ingestion
+from clinical_rag.bedrock_http import (
+    AwsCredentials,
+    BedrockHttpError,
+    BedrockRuntimeHttpClient,
+    sign_request,
+)
+
+CREDENTIALS = AwsCredentials("AKIDEXAMPLE", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY")
+
+
+@pytest.fixture
+def bedrock_stub():
+    state = {"requests": [], "statuses": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):  # noqa: N802
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["requests"].append(
+                {
+                    "path": self.path,
+                    "client": self.client_address,
+                    "authorization": self.headers.get("Authorization", ""),
+                    "body": body,
+                }
+            )
+            status = state["statuses"].pop(0) if state["statuses"] else 200
+            payload = (
+                {"embedding": [0.25] * body["dimensions"], "inputTextTokenCount": 4}
+                if status == 200
+                else {"message": "slow down"}
+            )
+            encoded = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):  # noqa: A002
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _client(bedrock_stub, **kwargs):
+    return BedrockRuntimeHttpClient(
+        "us-east-2",
+        endpoint_url=bedrock_stub["url"],
+        credentials=CREDENTIALS,
+        backoff_seconds=0,
+        **kwargs,
+    )
+
+
+def test_sign_request_matches_aws_sigv4_reference_vector():
+    headers = sign_request(
+        method="GET",
+        host="example.amazonaws.com",
+        path="/",
+        body=b"",
+        headers={},
+        region="us-east-1",
+        credentials=CREDENTIALS,
+        service="service",
+        now=datetime(2015, 8, 30, 12, 36, tzinfo=timezone.utc),
+    )
+
+    assert headers["X-Amz-Date"] == "20150830T123600Z"
+    assert headers["Authorization"].endswith(
+        "Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31"
+    )
+
+
+def test_http_client_invokes_model_over_one_kept_alive_connection(bedrock_stub):
+    client = _client(bedrock_stub)
+    body = json.dumps({"inputText": "What is diabetes?", "dimensions": 4, "normalize": True})
+
+    payloads = [
+        json.loads(client.invoke_model(modelId="amazon.titan-embed-text-v2:0", body=body)["body"].read())
+        for _ in range(3)
+    ]
+
+    assert payloads[0] == {"embedding": [0.25] * 4, "inputTextTokenCount": 4}
+    requests = bedrock_stub["requests"]
+    assert requests[0]["path"] == "/model/amazon.titan-embed-text-v2%3A0/invoke"
+    assert requests[0]["authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/")
+    assert "/us-east-2/bedrock/aws4_request" in requests[0]["authorization"]
+    assert len({request["client"] for request in requests}) == 1
+    client.close()
+
+
+def test_http_client_retries_throttling_then_raises_after_budget(bedrock_stub):
+    client = _client(bedrock_stub, max_retries=1)
+    body = json.dumps({"inputText": "x", "dimensions": 2})
+
+    bedrock_stub["statuses"] = [429]
+    assert json.loads(client.invoke_model(modelId="m", body=body)["body"].read())["embedding"] == [0.25, 0.25]
+
+    bedrock_stub["statuses"] = [503, 503]
+    with pytest.raises(BedrockHttpError) as error:
+        client.invoke_model(modelId="m", body=body)
+    assert error.value.status == 503
+    assert len(bedrock_stub["requests"]) == 4
+
+
+def test_ingestion_titan_embedding_reuses_one_pooled_client(bedrock_stub, monkeypatch):
+    monkeypatch.setattr(ingestion, "boto3", None)
+    monkeypatch.setattr(ingestion, "_BEDROCK_CLIENTS", {})
+    monkeypatch.setattr(
+        ingestion,
+        "BedrockRuntimeHttpClient",
+        lambda region: _client(bedrock_stub),
+    )
+
+    for text in ("first", "second"):
+        embedding, tokens = ingestion.titan_embedding(
+            text,
+            region="us-east-2",
+            model_id="amazon.titan-embed-text-v2:0",
+            dimensions=3,
+        )
+        assert embedding == [0.25, 0.25, 0.25]
+        assert tokens == 4
+
+    assert list(ingestion._BEDROCK_CLIENTS) == ["us-east-2"]
+    assert len({request["client"] for request in bedrock_stub["requests"]}) == 1
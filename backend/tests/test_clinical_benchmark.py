@@ -0,0 +1,40 @@
+from clinical_rag import benchmark, rag_engine
+
+
+def test_synthetic_corpus_loads_in_both_modes(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    seed_records = rag_engine._load_jsonl(rag_engine.DATA_PATH)[:5]
+
+    sources, queries = benchmark.write_synthetic_corpus(tmp_path, 24, seed_records, query_count=4)
+    result = benchmark._scale_worker(sources, queries, "jsonl", tmp_path / "knowledge.snapshot")
+
+    assert len(queries) == 4
+    assert result["chunks"] == 24
+    assert rag_engine._KNOWLEDGE_BASE.semantic_matrix is not None
+    assert set(result["modes"]) == rag_engine.RETRIEVAL_MODES
+    for mode_result in result["modes"].values():
+        assert {"lexical", "vector", "fusion", "rerank"} <= set(mode_result["stagesMs"])
+        assert mode_result["totalMs"]["p50"] <= mode_result["totalMs"]["p99"]
+    assert (tmp_path / "knowledge.snapshot").exists()
+
+
+def test_safety_benchmark_agrees_with_sequential_scan():
+    questions = benchmark.safety_benchmark_questions(["What is diabetes?", "How is gout treated?"], 40)
+
+    result = benchmark.run_safety_benchmark(questions, repeat=1)
+
+    assert result["questions"] == 40
+    assert result["decisionMismatches"] == 0
+    assert result["blocked"] == 16
+
+
+def test_scope_benchmark_agrees_with_single_alternation():
+    records = rag_engine._load_jsonl(rag_engine.DATA_PATH)[:10] + [
+        {"question": "Is prediabetes reversible?", "answer": "Overweight management and exercise help."},
+        {"questionFocus": "Overweight", "answer": "Weight management lowers blood pressure and glucose."},
+    ]
+
+    result = benchmark.run_scope_benchmark(records, repeat=1)
+
+    assert result["records"] == 12
+    assert result["hitMismatches"] == 0
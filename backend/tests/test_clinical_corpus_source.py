@@ -0,0 +1,92 @@
+import io
+import json
+
+import pytest
+
+from clinical_rag.corpus_source import (
+    LocalCorpusSource,
+    S3CorpusSource,
+    corpus_source_from_uri,
+    parse_manifest,
+)
+
+
+class _ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class _FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.get_requests = []
+        self.downloads = []
+
+    def get_object(self, **request):
+        self.get_requests.append(request)
+        body, etag = self.objects[request["Key"]]
+        if request.get("IfNoneMatch") == etag:
+            raise _ClientError("304")
+        return {"Body": io.BytesIO(body), "ETag": etag}
+
+    def download_file(self, bucket, key, filename):
+        self.downloads.append(key)
+        with open(filename, "wb") as handle:
+            handle.write(self.objects[key][0])
+
+
+def test_parse_manifest_requires_version_and_data():
+    manifest = parse_manifest({"version": "v2", "data": "v2/corpus.jsonl", "titanEmbeddings": "v2/titan.jsonl"})
+
+    assert manifest.version == "v2"
+    assert manifest.titan_embeddings == "v2/titan.jsonl"
+    assert manifest.embeddings == ""
+    with pytest.raises(ValueError):
+        parse_manifest({"version": "v2"})
+
+
+def test_local_source_resolves_files_and_treats_missing_caches_as_empty(tmp_path):
+    source = LocalCorpusSource(tmp_path)
+    assert source.current_version() is None
+
+    (tmp_path / "current.json").write_text(json.dumps({"version": "v1", "data": "v1/corpus.jsonl"}))
+    files = source.fetch(source.current_version())
+
+    assert files.data_path == tmp_path / "v1" / "corpus.jsonl"
+    assert files.embedding_cache_path.read_bytes() == b""
+
+
+def test_s3_source_uses_conditional_manifest_reads_and_prunes_only_when_asked(tmp_path):
+    manifest = json.dumps({"version": "2026/10/17", "data": "v2/corpus.jsonl"}).encode("utf-8")
+    client = _FakeS3(
+        {
+            "clinical/current.json": (manifest, '"etag-1"'),
+            "clinical/v2/corpus.jsonl": (b'{"question": "q"}\n', '"etag-2"'),
+        }
+    )
+    (tmp_path / "old-version").mkdir()
+    source = S3CorpusSource("bucket", "/clinical/", client=client, download_dir=tmp_path)
+
+    first = source.current_version()
+    second = source.current_version()
+    files = source.fetch(first)
+    source.fetch(first)
+
+    assert second == first
+    assert client.get_requests[1]["IfNoneMatch"] == '"etag-1"'
+    assert files.data_path == tmp_path / "2026_10_17" / "corpus.jsonl"
+    assert files.data_path.read_bytes() == b'{"question": "q"}\n'
+    assert client.downloads == ["clinical/v2/corpus.jsonl"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["2026_10_17", "old-version"]
+
+    source.prune(first)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["2026_10_17"]
+
+
+def test_corpus_source_from_uri():
+    assert corpus_source_from_uri("") is None
+    s3_source = corpus_source_from_uri("s3://bucket/releases/clinical")
+    assert (s3_source.bucket, s3_source.prefix) == ("bucket", "releases/clinical/")
+    assert isinstance(corpus_source_from_uri("/tmp/corpus"), LocalCorpusSource)
@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from clinical_rag.download_cache import DownloadCache, DownloadError
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    payload = b""
+    etag = ""
+    truncate_after = None
+    requests = []
+    body_bytes = 0
+
+    def do_GET(self):  # noqa: N802 - http.server naming
+        upstream = type(self)
+        upstream.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == upstream.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range") == upstream.etag:
+            start = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+        body = upstream.payload[start:]
+        self.send_response(206 if start else 200)
+        if start:
+            total = len(upstream.payload)
+            self.send_header("Content-Range", f"bytes {start}-{total - 1}/{total}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", upstream.etag)
+        self.end_headers()
+        if upstream.truncate_after is not None:
+            body = body[: upstream.truncate_after]
+            self.close_connection = True
+        self.wfile.write(body)
+        upstream.body_bytes += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    _Upstream.payload = bytes(range(256)) * 400
+    _Upstream.etag = '"v1"'
+    _Upstream.truncate_after = None
+    _Upstream.requests = []
+    _Upstream.body_bytes = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield _Upstream, f"http://127.0.0.1:{server.server_port}/medquad.parquet"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_resumes_revalidates_and_serves_fresh_copies_without_requests(tmp_path, upstream):
+    server, url = upstream
+    cache = DownloadCache(tmp_path)
+    server.truncate_after = 30_000
+
+    with pytest.raises(DownloadError):
+        cache.fetch(url)
+    server.truncate_after = None
+    resumed = cache.fetch(url)
+
+    assert resumed.status == "resumed"
+    assert resumed.bytes_downloaded == len(server.payload) - 30_000
+    assert resumed.path.read_bytes() == server.payload
+    assert resumed.sha256 == hashlib.sha256(server.payload).hexdigest()
+
+    body_bytes = server.body_bytes
+    assert cache.fetch(url).status == "not-modified"
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    request_count = len(server.requests)
+    assert DownloadCache(tmp_path, max_age_seconds=3600).fetch(url).status == "fresh"
+    assert len(server.requests) == request_count
+    assert server.body_bytes == body_bytes
+
+
+def test_changed_upstream_replaces_blob_and_checksum_mismatch_is_rejected(tmp_path, upstream):
+    server, url = upstream
+    cache = DownloadCache(tmp_path)
+    first = cache.fetch(url)
+    server.payload = b"updated parquet bytes"
+    server.etag = '"v2"'
+
+    second = cache.fetch(url, expected_sha256=hashlib.sha256(server.payload).hexdigest())
+
+    assert second.status == "downloaded"
+    assert second.path.read_bytes() == server.payload
+    assert not first.path.exists()
+    with pytest.raises(DownloadError):
+        DownloadCache(tmp_path / "other").fetch(url, expected_sha256="0" * 64)
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from clinical_rag import evaluate, rag_engine
+
+
+def test_eval_reuses_unchanged_results_and_reports_percentiles(tmp_path, monkeypatch):
+    eval_path = tmp_path / "eval.jsonl"
+    eval_path.write_text(
+        "\n".join(
+            json.dumps({"question": question, "questionId": str(index), "expectedDocumentId": "0000044"})
+            for index, question in enumerate(["What is prediabetes?", "What causes insulin resistance?"])
+        ),
+        encoding="utf-8",
+    )
+    answered = []
+    real_answer_questions = evaluate.answer_questions
+
+    def counting_answer_questions(questions, *, retrieval_mode):
+        answered.extend(questions)
+        return real_answer_questions(questions, retrieval_mode=retrieval_mode)
+
+    monkeypatch.setattr(evaluate, "answer_questions", counting_answer_questions)
+
+    first = evaluate.run_eval(eval_path, result_cache=evaluate.eval_result_cache(tmp_path))
+    answered_first = len(answered)
+    second = evaluate.run_eval(eval_path, result_cache=evaluate.eval_result_cache(tmp_path))
+
+    assert answered_first == 2 + len(evaluate.SAFETY_CASES) + len(evaluate.NOT_FOUND_CASES)
+    assert len(answered) == answered_first
+    assert second["summary"]["reusedResults"] == 2
+    assert [row["reused"] for row in first["retrievalResults"]] == [False, False]
+    assert [row["reused"] for row in second["retrievalResults"]] == [True, True]
+    assert [{**row, "reused": False} for row in second["retrievalResults"]] == first["retrievalResults"]
+    assert second["summary"]["latencyMs"] == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    assert second["summary"]["averageLatencyMs"] == 0.0
+
+    monkeypatch.setattr(rag_engine, "TOP_K", rag_engine.TOP_K + 1)
+    evaluate.run_eval(eval_path, result_cache=evaluate.eval_result_cache(tmp_path))
+
+    assert len(answered) == 2 * answered_first
+
+
+def test_eval_fingerprint_changes_with_package_sources(tmp_path, monkeypatch):
+    source = tmp_path / "rerank.py"
+    source.write_text("BONUS = 1.0\n", encoding="utf-8")
+    monkeypatch.setattr(evaluate, "PACKAGE_DIR", tmp_path)
+    before = evaluate.eval_fingerprint()
+
+    source.write_text("BONUS = 2.0\n", encoding="utf-8")
+
+    assert evaluate.eval_fingerprint() != before
+
+
+def test_local_eval_matches_across_worker_processes(monkeypatch):
+    monkeypatch.setattr(evaluate, "MIN_QUESTIONS_PER_PROCESS", 1)
+    questions = ["What is prediabetes?", "How is gout treated?", "What are symptoms of diabetes?"]
+
+    inline = evaluate.answer_eval_questions(questions, retrieval_mode=rag_engine.LOCAL_RETRIEVAL_MODE, workers=1)
+    parallel = evaluate.answer_eval_questions(questions, retrieval_mode=rag_engine.LOCAL_RETRIEVAL_MODE, workers=2)
+
+    assert [result for result, *_rest in parallel] == [result for result, *_rest in inline]
+
+
+def test_sweep_at_current_settings_matches_full_eval():
+    summary = evaluate.run_eval(evaluate.DEFAULT_EVAL_PATH)["summary"]
+
+    sweep = evaluate.run_sweep(
+        evaluate.DEFAULT_EVAL_PATH,
+        {"rrfK": [rag_engine.RRF_K, 20], "topicBonusCap": [0.3]},
+    )
+
+    assert sweep["configurations"] == 2
+    current = next(
+        item["metrics"] for item in sweep["results"] if item["parameters"]["rrfK"] == rag_engine.RRF_K
+    )
+    assert current["hitAt3"] == round(summary["retrievalHitAt3"], 4)
+    assert current["notFoundAccuracy"] == summary["notFoundAccuracy"]
+    assert 0 <= current["ndcgAt5"] <= 1
+    with pytest.raises(ValueError):
+        evaluate.run_sweep(evaluate.DEFAULT_EVAL_PATH, {"topK": [3]})
+
+
+def test_precision_check_preserves_hit_at_3_with_int8_embeddings():
+    check = evaluate.run_precision_check(evaluate.DEFAULT_EVAL_PATH, precisions=("float32", "int8"))
+
+    float32, int8 = check["precisions"]["float32"], check["precisions"]["int8"]
+    assert int8["metrics"]["hitAt3"] == float32["metrics"]["hitAt3"]
+    assert float32["top3Agreement"] == 1.0
+    assert int8["embeddingBytesPerChunk"] * 3 < float32["embeddingBytesPerChunk"]
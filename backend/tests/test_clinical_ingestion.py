@@ -1,8 +1,23 @@
+import hashlib
+import json
+import math
+
+from clinical_rag import ingestion
+from clinical_rag.bedrock_http import BedrockHttpError
 from clinical_rag.ingestion import (
+    HASH_DIMS,
+    AdaptiveConcurrency,
+    build_embedding_cache,
     build_titan_embedding_cache,
     curate_records,
+    embed_titan_records,
+    embedding_content_hash,
+    extract_terms,
     normalize_medquad_row,
+    curation_sort_key,
     record_matches_metabolic_scope,
+    relevance_score,
+    select_top_records,
     source_allowed,
 )
 
@@ -50,6 +65,23 @@ def test_metabolic_scope_filter_prefers_metabolic_topics():
     )
 
 
+def test_scope_matcher_counts_overlapping_terms_within_fields_only():
+    hits = ingestion.SCOPE_MATCHER.hits(
+        {
+            "questionFocus": "Prediabetes",
+            "questionType": "information",
+            "question": "What is high blood",
+            "synonyms": "pressure",
+            "category": "",
+            "answer": "Insulin resistance raises glucose; a healthy diet helps.",
+        }
+    )
+
+    # "prediabetes" also contains "diabetes"; "blood" + "pressure" span two fields and do not count.
+    assert hits == ingestion.ScopeHits(primary_narrow=2, secondary_narrow=0, primary_broad=4)
+    assert ingestion.scope_hits_relevance(hits) == 2 * 8 + 4
+
+
 def test_curate_records_filters_sources_and_builds_eval_set():
     rows = [
         {
@@ -81,6 +113,30 @@ def test_curate_records_filters_sources_and_builds_eval_set():
     assert eval_records[0]["expectedDocumentId"] == "doc-1"
 
 
+def test_select_top_records_matches_sort_dedupe_and_slice():
+    records = [
+        {
+            "documentId": f"doc-{index}",
+            "questionId": f"q-{index}",
+            "source": ["CDC", "NIDDK"][index % 2],
+            "questionFocus": ["Diabetes", "Obesity", "Gout"][index % 3],
+            "questionType": "information",
+            "question": f"What is topic {index % 7}?" if index % 4 else f"WHAT IS TOPIC {index % 7}?",
+            "answer": "Diabetes and insulin. " * (index % 5),
+            "synonyms": "",
+            "category": "",
+        }
+        for index in range(60)
+    ]
+    expected = []
+    for record in sorted(records, key=curation_sort_key):
+        if record["question"].lower() not in {item["question"].lower() for item in expected}:
+            expected.append(record)
+
+    for limit in (1, 3, 7, 20):
+        assert select_top_records(((relevance_score(record), record) for record in records), limit) == expected[:limit]
+
+
 def test_build_titan_embedding_cache_records_model_metadata(monkeypatch):
     monkeypatch.setattr(
         "clinical_rag.ingestion.titan_embedding",
@@ -107,3 +163,151 @@ def test_build_titan_embedding_cache_records_model_metadata(monkeypatch):
     assert cache[0]["embeddingModel"] == "amazon.titan-embed-text-v2:0"
     assert cache[0]["dimensions"] == 2
     assert cache[0]["inputTextTokenCount"] == 7
+
+
+def _reference_hash_embedding(text):
+    vector = [0.0] * HASH_DIMS
+    for term in extract_terms(text):
+        vector[int(hashlib.sha256(term.encode("utf-8")).hexdigest(), 16) % HASH_DIMS] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    return vector if norm == 0 else [round(value / norm, 8) for value in vector]
+
+
+def test_batch_hash_embeddings_are_bit_identical_with_and_without_numpy(monkeypatch):
+    records = [
+        {"questionFocus": "Type 2 Diabetes", "question": "What is type 2 diabetes?", "answer": "Diabetes " * 3},
+        {"questionFocus": "High Blood Pressure", "question": "How is it treated?", "answer": "Medicines help."},
+        {"questionFocus": "", "question": "", "answer": ""},
+    ]
+    expected = [_reference_hash_embedding(ingestion.record_to_retrieval_text(record)) for record in records]
+
+    batched = [entry["embedding"] for entry in build_embedding_cache(records)]
+    monkeypatch.setattr(ingestion, "np", None)
+    unbatched = [entry["embedding"] for entry in build_embedding_cache(records)]
+
+    assert batched == expected
+    assert unbatched == expected
+
+
+def test_build_embedding_cache_reuses_entries_by_content_hash():
+    records = [
+        {"documentId": "doc-1", "questionId": "q", "question": "What is diabetes?", "answer": "A."},
+        {"documentId": "doc-2", "questionId": "q", "question": "What is obesity?", "answer": "B."},
+    ]
+    previous = {entry["contentHash"]: entry for entry in build_embedding_cache(records)}
+    for entry in previous.values():
+        entry["embedding"] = [0.5] * HASH_DIMS
+    records[1] = {**records[1], "answer": "Updated answer."}
+
+    cache = build_embedding_cache(records, previous=previous)
+
+    assert cache[0]["embedding"] == [0.5] * HASH_DIMS
+    assert cache[1]["embedding"] == _reference_hash_embedding(ingestion.record_to_retrieval_text(records[1]))
+    assert cache[1]["contentHash"] not in previous
+
+
+def test_embed_titan_records_retries_throttling_and_resumes_from_checkpoint(monkeypatch, tmp_path):
+    records = [
+        {"documentId": f"doc-{index}", "questionId": "q", "question": f"What is topic {index}?", "answer": "A."}
+        for index in range(6)
+    ]
+    checkpoint = tmp_path / "titan.jsonl"
+    content_hash = embedding_content_hash(
+        ingestion.record_to_retrieval_text(records[0]), model_id="titan", dimensions=2
+    )
+    stale_hash = embedding_content_hash("A record that left the corpus.", model_id="titan", dimensions=2)
+    checkpoint.write_text(
+        json.dumps({"chunkId": "doc-0-q", "contentHash": content_hash, "embedding": [0.0, 1.0]})
+        + "\n"
+        + json.dumps({"chunkId": "doc-9-q", "contentHash": stale_hash, "embedding": [1.0, 1.0]})
+        + "\n"
+        + '{"chunkId": "doc-1-q", "embed'
+    )
+    calls = []
+    throttled_once = set()
+
+    def fake_titan(text, *, region, model_id, dimensions):
+        calls.append(text)
+        if "topic 3" in text and text not in throttled_once:
+            throttled_once.add(text)
+            raise BedrockHttpError(429, "Too many requests")
+        return [1.0, 0.0], 3
+
+    monkeypatch.setattr("clinical_rag.ingestion.titan_embedding", fake_titan)
+    monkeypatch.setattr("clinical_rag.ingestion.TITAN_BACKOFF_SECONDS", 0.0)
+
+    cache, stats = embed_titan_records(
+        records, region="us-east-2", model_id="titan", dimensions=2, checkpoint_path=checkpoint, concurrency=4
+    )
+
+    assert [entry["chunkId"] for entry in cache] == [f"doc-{index}-q" for index in range(6)]
+    assert cache[0]["embedding"] == [0.0, 1.0]
+    assert not any("topic 0" in text for text in calls)
+    assert (stats.reused, stats.pruned, stats.embedded, stats.throttled) == (1, 1, 5, 1)
+    assert [json.loads(line)["chunkId"] for line in checkpoint.read_text().splitlines()] == [
+        entry["chunkId"] for entry in cache
+    ]
+
+
+def test_read_embedding_cache_leaves_file_alone_and_backfills_legacy_content_hashes(monkeypatch, tmp_path):
+    records = [
+        {"documentId": f"doc-{index}", "questionId": "q", "question": f"What is topic {index}?", "answer": "A."}
+        for index in range(3)
+    ]
+    checkpoint = tmp_path / "titan.jsonl"
+    contents = (
+        json.dumps({"chunkId": "doc-0-q", "embeddingModel": "titan", "dimensions": 2, "embedding": [0.0, 1.0]})
+        + "\n"
+        + json.dumps({"chunkId": "doc-1-q", "embeddingModel": "other", "dimensions": 2, "embedding": [1.0, 1.0]})
+        + "\n"
+        + '{"chunkId": "doc-2-q", "embed'
+    )
+    checkpoint.write_text(contents)
+
+    assert ingestion.read_embedding_cache(checkpoint) == {}
+    assert checkpoint.read_text() == contents
+
+    calls = []
+
+    def fake_titan(text, *, region, model_id, dimensions):
+        calls.append(text)
+        return [1.0, 0.0], 3
+
+    monkeypatch.setattr("clinical_rag.ingestion.titan_embedding", fake_titan)
+    cache, stats = embed_titan_records(
+        records, region="us-east-2", model_id="titan", dimensions=2, checkpoint_path=checkpoint
+    )
+
+    assert cache[0]["embedding"] == [0.0, 1.0]
+    assert cache[0]["contentHash"] == embedding_content_hash(
+        ingestion.record_to_retrieval_text(records[0]), model_id="titan", dimensions=2
+    )
+    assert sorted(calls) == [ingestion.record_to_retrieval_text(record) for record in records[1:]]
+    assert (stats.reused, stats.embedded) == (1, 2)
+
+
+def test_trim_torn_tail_cuts_only_an_unterminated_last_line(tmp_path):
+    checkpoint = tmp_path / "titan.jsonl"
+    checkpoint.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c"')
+
+    ingestion._trim_torn_tail(checkpoint)
+    assert checkpoint.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+    ingestion._trim_torn_tail(checkpoint)
+    assert checkpoint.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+
+    checkpoint.write_bytes(b'{"torn')
+    ingestion._trim_torn_tail(checkpoint)
+    assert checkpoint.read_bytes() == b""
+
+
+def test_adaptive_concurrency_halves_once_per_burst_and_recovers():
+    limit = AdaptiveConcurrency(8)
+    burst_generation = limit.generation
+
+    limit.on_throttle(burst_generation)
+    limit.on_throttle(burst_generation)
+    assert limit.limit == 4
+
+    for _ in range(4 + 5 + 6 + 7):
+        limit.on_success()
+    assert limit.limit == 8
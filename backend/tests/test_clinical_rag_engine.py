@@ -1,6 +1,15 @@
+import hashlib
 import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 
 import clinical_rag.rag_engine as rag_engine
+from clinical_rag.corpus_source import LocalCorpusSource
+from clinical_rag.result_cache import QueryResultCache, SQLiteCacheStore
 
 
 def _write_records(path, records):
@@ -81,7 +90,7 @@ def test_load_knowledge_base_uses_cached_embedding(tmp_path, monkeypatch):
 
     knowledge = rag_engine.load_knowledge_base()
 
-    assert knowledge.chunks[0].embedding == cached_embedding
+    assert list(knowledge.chunks[0].embedding) == cached_embedding
 
 
 def test_load_knowledge_base_uses_cached_titan_embedding(tmp_path, monkeypatch):
@@ -122,7 +131,7 @@ def test_load_knowledge_base_uses_cached_titan_embedding(tmp_path, monkeypatch):
 
     knowledge = rag_engine.load_knowledge_base()
 
-    assert knowledge.chunks[0].semantic_embedding == cached_embedding
+    assert list(knowledge.chunks[0].semantic_embedding) == cached_embedding
 
 
 def test_answer_returns_not_found_when_support_is_weak(tmp_path, monkeypatch):
@@ -255,6 +264,7 @@ def test_bedrock_mode_uses_cached_semantic_embeddings_and_bm25(tmp_path, monkeyp
         "_titan_embedding",
         lambda question: (diabetes_embedding, 8),
     )
+    monkeypatch.setattr(rag_engine, "QUERY_EMBEDDING_CACHE", QueryResultCache(max_entries=0))
 
     result, usage = rag_engine.answer_question(
         "What treatments help type 2 diabetes?",
@@ -267,12 +277,751 @@ def test_bedrock_mode_uses_cached_semantic_embeddings_and_bm25(tmp_path, monkeyp
     assert result["retrieval"]["hits"][0]["documentId"] == "diabetes-doc"
     assert result["retrieval"]["hits"][0]["semanticScore"] > 0
     assert usage["embeddingTokens"] == 8
+    assert list(usage["stages"]) == [
+        "safety",
+        "scope",
+        "embedding",
+        "lexical",
+        "vector",
+        "fusion",
+        "rerank",
+        "generation",
+    ]
+    assert all(milliseconds >= 0 for milliseconds in usage["stages"].values())
+
+
+def test_batch_answers_report_shared_passes_as_batch_totals(monkeypatch):
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+
+    responses = rag_engine.answer_questions(
+        ["What is type 2 diabetes?", "How can I lower blood pressure?", "Should I stop taking insulin?"]
+    )
+
+    answered = [usage for _result, usage in responses[:2]]
+    for usage in answered:
+        assert list(usage["stages"]) == ["safety", "scope", "fusion", "rerank", "generation"]
+    assert answered[0]["batchStages"] == answered[1]["batchStages"]
+    assert list(answered[0]["batchStages"]) == ["questions", "lexical", "vector"]
+    assert answered[0]["batchStages"]["questions"] == 2
+    assert "batchStages" not in responses[2][1]
 
 
 def test_answer_blocks_unsafe_question_before_retrieval(monkeypatch):
     monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
 
-    result, _usage = rag_engine.answer_question("Should I stop taking insulin?")
+    result, usage = rag_engine.answer_question("Should I stop taking insulin?")
 
     assert result["safety"]["answerMode"] == "blocked"
+    assert list(usage["stages"]) == ["safety", "scope"]
     assert result["retrieval"]["strategy"] == "blocked_before_retrieval"
+
+
+def test_matrix_vector_retrieval_matches_python_scoring(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    data_path = tmp_path / "clinical.jsonl"
+    _write_records(
+        data_path,
+        [
+            {
+                "documentId": f"doc-{index}",
+                "questionId": f"q-{index}",
+                "source": "NIDDK",
+                "questionFocus": focus,
+                "questionType": "information",
+                "question": f"What is {focus.lower()}?",
+                "answer": f"{focus} affects blood glucose, blood pressure, and heart health.",
+            }
+            for index, focus in enumerate(
+                ["Type 2 Diabetes", "High Blood Pressure", "Prediabetes", "Metabolic Syndrome"]
+            )
+        ],
+    )
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    knowledge = rag_engine.load_knowledge_base()
+    question = "What is type 2 diabetes and blood pressure?"
+
+    matrix_hits = rag_engine._vector_retrieval(question, knowledge, 3)
+    monkeypatch.setattr(rag_engine, "np", None)
+    python_hits = rag_engine._vector_retrieval(
+        question,
+        rag_engine.KnowledgeBase(
+            chunks=knowledge.chunks,
+            document_frequency=knowledge.document_frequency,
+            average_term_count=knowledge.average_term_count,
+        ),
+        3,
+    )
+
+    assert knowledge.embedding_matrix.dtype.name == "float32"
+    assert [hit.chunk_id for hit in matrix_hits] == [hit.chunk_id for hit in python_hits]
+    assert [round(hit.vector_score, 5) for hit in matrix_hits] == [
+        round(hit.vector_score, 5) for hit in python_hits
+    ]
+
+
+def test_matrix_top_k_keeps_weak_positive_scores_like_python_scoring():
+    np = pytest.importorskip("numpy")
+    rows = [[0.6, 0.8], [3e-5, 1.0], [0.0, 1.0], [-3e-5, 1.0]]
+    query = [1.0, 0.0]
+
+    matrix_scores = rag_engine._matrix_top_k(
+        np.asarray(rows, dtype=np.float32),
+        np.asarray([query], dtype=np.float32),
+        4,
+    )[0]
+    python_scores = [
+        (score, index)
+        for index, row in enumerate(rows)
+        if (score := rag_engine._cosine(query, row)) > 0
+    ]
+
+    assert [index for _score, index in matrix_scores] == [index for _score, index in python_scores] == [0, 1]
+
+
+def test_inverted_index_matches_full_scan_for_lexical_and_bm25(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    _write_records(
+        data_path,
+        [
+            {
+                "documentId": f"doc-{index}",
+                "questionId": f"q-{index}",
+                "source": "NIDDK",
+                "questionFocus": focus,
+                "questionType": "information",
+                "question": f"What is {focus.lower()}?",
+                "answer": answer,
+            }
+            for index, (focus, answer) in enumerate(
+                [
+                    ("Type 2 Diabetes", "Diabetes raises blood glucose. Diabetes care includes activity."),
+                    ("High Blood Pressure", "Blood pressure readings above normal strain the heart."),
+                    ("Prediabetes", "Prediabetes means blood glucose is higher than normal."),
+                    ("Cholesterol", "Cholesterol is a waxy substance found in blood."),
+                ]
+            )
+        ],
+    )
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    knowledge = rag_engine.load_knowledge_base()
+    full_scan = rag_engine.KnowledgeBase(
+        chunks=knowledge.chunks,
+        document_frequency=knowledge.document_frequency,
+        average_term_count=knowledge.average_term_count,
+        vocabulary=knowledge.vocabulary,
+    )
+    question = "blood glucose in diabetes and cholesterol"
+
+    def ranked(hits):
+        return [(hit.chunk_id, round(hit.lexical_score, 9)) for hit in hits]
+
+    assert "blood" in knowledge.inverted_index
+    for k in (1, 2, 4):
+        assert ranked(rag_engine._lexical_retrieval(question, knowledge, k)) == ranked(
+            rag_engine._lexical_retrieval(question, full_scan, k)
+        )
+        assert ranked(rag_engine._bm25_retrieval(question, knowledge, k)) == ranked(
+            rag_engine._bm25_retrieval(question, full_scan, k)
+        )
+    assert ranked(rag_engine._bm25_retrieval(question, knowledge, 2, k1=1.2, b=0.5)) == ranked(
+        rag_engine._bm25_retrieval(question, full_scan, 2, k1=1.2, b=0.5)
+    )
+
+
+def test_snapshot_round_trip_matches_jsonl_knowledge_base(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    local_embedding_path = tmp_path / "local_embeddings.jsonl"
+    titan_embedding_path = tmp_path / "titan_embeddings.jsonl"
+    _write_records(
+        data_path,
+        [
+            {
+                "documentId": "diabetes-doc",
+                "questionId": "diabetes-treatment",
+                "source": "NIDDK",
+                "sourceUrl": "https://example.com/diabetes",
+                "questionFocus": "Type 2 Diabetes",
+                "questionType": "treatment",
+                "question": "What are treatments for type 2 diabetes?",
+                "answer": "Treatment may include nutrition support, physical activity, and medicines.",
+            },
+            {
+                "documentId": "blood-pressure-doc",
+                "questionId": "blood-pressure-info",
+                "source": "NHLBI",
+                "sourceUrl": "https://example.com/bp",
+                "questionFocus": "High Blood Pressure",
+                "questionType": "information",
+                "question": "What is high blood pressure?",
+                "answer": "High blood pressure is a condition that affects blood vessels.",
+            },
+        ],
+    )
+    _write_records(local_embedding_path, [])
+    titan_embedding = [0.0] * rag_engine.TITAN_DIMS
+    titan_embedding[2] = 1.0
+    _write_records(
+        titan_embedding_path,
+        [{"chunkId": "diabetes-doc-diabetes-treatment", "embedding": titan_embedding}],
+    )
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "EMBEDDING_CACHE_PATH", local_embedding_path)
+    monkeypatch.setattr(rag_engine, "TITAN_EMBEDDING_CACHE_PATH", titan_embedding_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    jsonl_knowledge = rag_engine.build_knowledge_base()
+    jsonl_hits = rag_engine.retrieve("What treatments help type 2 diabetes?", top_k=2)
+
+    snapshot_path = rag_engine.default_snapshot_path(data_path)
+    rag_engine.write_knowledge_base_snapshot(jsonl_knowledge, snapshot_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "build_knowledge_base", lambda sources=None: None)
+    snapshot_knowledge = rag_engine.load_knowledge_base()
+    snapshot_hits = rag_engine.retrieve("What treatments help type 2 diabetes?", top_k=2)
+
+    assert [chunk.chunk_id for chunk in snapshot_knowledge.chunks] == [
+        chunk.chunk_id for chunk in jsonl_knowledge.chunks
+    ]
+    assert snapshot_knowledge.document_frequency == jsonl_knowledge.document_frequency
+    assert list(snapshot_knowledge.chunks[0].semantic_embedding) == titan_embedding
+    assert len(snapshot_knowledge.chunks[1].semantic_embedding) == 0
+    assert [(hit.chunk_id, round(hit.rerank_score, 6)) for hit in snapshot_hits] == [
+        (hit.chunk_id, round(hit.rerank_score, 6)) for hit in jsonl_hits
+    ]
+    for snapshot_chunk, jsonl_chunk in zip(snapshot_knowledge.chunks, jsonl_knowledge.chunks):
+        assert snapshot_chunk.answer == jsonl_chunk.answer
+        assert snapshot_knowledge.vocabulary.decode(snapshot_chunk.term_ids) == (
+            jsonl_knowledge.vocabulary.decode(jsonl_chunk.term_ids)
+        )
+
+
+def test_chunks_store_interned_term_ids_and_text_offsets(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    _write_records(
+        data_path,
+        [
+            {
+                "documentId": "diabetes-doc",
+                "questionId": "diabetes-info",
+                "source": "NIDDK",
+                "questionFocus": "Type 2 Diabetes",
+                "questionType": "Information",
+                "question": "What is type 2 diabetes?",
+                "answer": "  Type 2 diabetes raises blood glucose. Diabetes can be managed.",
+            }
+        ],
+    )
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+
+    knowledge = rag_engine.load_knowledge_base()
+    chunk = knowledge.chunks[0]
+
+    assert chunk.question_focus == "Type 2 Diabetes"
+    assert chunk.question == "What is type 2 diabetes?"
+    assert chunk.answer == "Type 2 diabetes raises blood glucose. Diabetes can be managed."
+    assert chunk.question_type == "information"
+    assert list(chunk.term_ids) == sorted(chunk.term_ids)
+    assert chunk.term_frequency(knowledge.vocabulary.ids["diabetes"]) == 4
+    assert chunk.term_frequency(len(knowledge.vocabulary)) == 0
+    assert not hasattr(chunk, "__dict__")
+
+
+def _corpus_record(name, answer, question_type="information"):
+    return {
+        "documentId": f"{name}-doc",
+        "questionId": f"{name}-q",
+        "source": "NIDDK",
+        "questionFocus": name.replace("-", " ").title(),
+        "questionType": question_type,
+        "question": f"What is {name.replace('-', ' ')}?",
+        "answer": answer,
+    }
+
+
+def test_incremental_corpus_update_matches_full_rebuild(tmp_path, monkeypatch):
+    old_records = [
+        _corpus_record("type-2-diabetes", "Type 2 diabetes raises blood glucose over time."),
+        _corpus_record("high-blood-pressure", "High blood pressure strains the heart and kidneys."),
+        _corpus_record("prediabetes", "Prediabetes means blood glucose is above normal."),
+    ]
+    new_records = [
+        old_records[0],
+        _corpus_record("prediabetes", "Prediabetes can often be reversed with activity."),
+        _corpus_record("cholesterol", "Cholesterol is a waxy substance found in blood.", "treatment"),
+    ]
+    old_path = tmp_path / "old.jsonl"
+    new_path = tmp_path / "new.jsonl"
+    _write_records(old_path, old_records)
+    _write_records(new_path, new_records)
+    missing = tmp_path / "missing.jsonl"
+    old_sources = rag_engine.SnapshotSources(old_path, missing, missing)
+    new_sources = rag_engine.SnapshotSources(new_path, missing, missing)
+    old_knowledge = rag_engine.build_knowledge_base(old_sources, version="v1")
+
+    updated, changes = rag_engine.apply_corpus_update(old_knowledge, new_sources, version="v2")
+    rebuilt = rag_engine.build_knowledge_base(new_sources, version="v2")
+
+    assert changes == {"added": 2, "removed": 2, "reused": 1}
+    assert updated.chunks[0].text is old_knowledge.chunks[0].text
+    assert "kidneys" in old_knowledge.vocabulary.ids
+    assert sorted(updated.vocabulary.terms) == sorted(rebuilt.vocabulary.terms)
+    assert updated.vocabulary.decode(updated.chunks[0].term_ids) == old_knowledge.vocabulary.decode(
+        old_knowledge.chunks[0].term_ids
+    )
+    assert updated.version == "v2"
+    assert len(old_knowledge.chunks) == 3
+    assert updated.document_frequency == rebuilt.document_frequency
+    assert updated.average_term_count == rebuilt.average_term_count
+    assert [chunk.answer for chunk in updated.chunks] == [chunk.answer for chunk in rebuilt.chunks]
+    for question in ["What lowers blood glucose?", "cholesterol in blood", "heart and kidneys"]:
+        for retriever in (rag_engine._lexical_retrieval, rag_engine._bm25_retrieval, rag_engine._vector_retrieval):
+            assert [(hit.chunk_id, hit.lexical_score, hit.vector_score) for hit in retriever(question, updated, 3)] == [
+                (hit.chunk_id, hit.lexical_score, hit.vector_score) for hit in retriever(question, rebuilt, 3)
+            ]
+
+
+def test_corpus_update_applies_metadata_only_changes(tmp_path):
+    record = _corpus_record("type-2-diabetes", "Type 2 diabetes raises blood glucose over time.")
+    old_path = tmp_path / "old.jsonl"
+    new_path = tmp_path / "new.jsonl"
+    _write_records(old_path, [{**record, "sourceUrl": "http://example.com/broken"}])
+    _write_records(new_path, [{**record, "sourceUrl": "https://example.com/fixed", "source": "NLM"}])
+    missing = tmp_path / "missing.jsonl"
+    old_knowledge = rag_engine.build_knowledge_base(rag_engine.SnapshotSources(old_path, missing, missing))
+
+    updated, changes = rag_engine.apply_corpus_update(
+        old_knowledge,
+        rag_engine.SnapshotSources(new_path, missing, missing),
+        version="v2",
+    )
+
+    assert changes == {"added": 1, "removed": 1, "reused": 0}
+    assert (updated.chunks[0].source_url, updated.chunks[0].source) == ("https://example.com/fixed", "NLM")
+
+
+def test_refresh_hot_swaps_knowledge_base_when_corpus_version_changes(tmp_path, monkeypatch):
+    corpus_dir = tmp_path / "corpus"
+    (corpus_dir / "v1").mkdir(parents=True)
+    (corpus_dir / "v2").mkdir()
+    _write_records(
+        corpus_dir / "v1" / "corpus.jsonl",
+        [_corpus_record("type-2-diabetes", "Type 2 diabetes raises blood glucose over time.")],
+    )
+    _write_records(
+        corpus_dir / "v2" / "corpus.jsonl",
+        [
+            _corpus_record("type-2-diabetes", "Type 2 diabetes raises blood glucose over time."),
+            _corpus_record("cholesterol", "Cholesterol is a waxy substance found in blood."),
+        ],
+    )
+
+    def publish(version):
+        (corpus_dir / "current.json").write_text(
+            json.dumps({"version": version, "data": f"{version}/corpus.jsonl"}),
+            encoding="utf-8",
+        )
+
+    pruned = []
+
+    class RecordingSource(LocalCorpusSource):
+        def prune(self, live):
+            pruned.append(live.version)
+
+    monkeypatch.setattr(rag_engine, "_CORPUS_SOURCE", RecordingSource(corpus_dir))
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "_LIVE_SOURCES", None)
+    monkeypatch.setattr(rag_engine, "_NEXT_CORPUS_CHECK", 0.0)
+    publish("v1")
+
+    first = rag_engine.load_knowledge_base()
+    first_fingerprint = rag_engine.corpus_fingerprint()
+    assert (first.version, len(first.chunks)) == ("v1", 1)
+    assert rag_engine.refresh_knowledge_base(force=True) is False
+
+    publish("v2")
+    with monkeypatch.context() as failing:
+        failing.setattr(rag_engine, "apply_corpus_update", lambda *args, **kwargs: 1 / 0)
+        assert rag_engine.refresh_knowledge_base(force=True) is False
+    assert rag_engine.load_knowledge_base() is first
+    assert rag_engine.corpus_fingerprint() == first_fingerprint
+    assert pruned == ["v1"]
+
+    assert rag_engine.refresh_knowledge_base(force=True) is True
+
+    second = rag_engine.load_knowledge_base()
+    assert (second.version, len(second.chunks)) == ("v2", 2)
+    assert len(first.chunks) == 1
+    assert rag_engine.corpus_fingerprint() != first_fingerprint
+    assert rag_engine.retrieve("What is cholesterol?")[0].chunk_id == "cholesterol-doc-cholesterol-q"
+    assert pruned == ["v1", "v2"]
+
+
+def test_stale_snapshot_falls_back_to_jsonl(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    record = {
+        "documentId": "diabetes-doc",
+        "questionId": "diabetes-info",
+        "source": "NIDDK",
+        "questionFocus": "Type 2 Diabetes",
+        "questionType": "information",
+        "question": "What is type 2 diabetes?",
+        "answer": "Type 2 diabetes affects how the body uses glucose.",
+    }
+    _write_records(data_path, [record])
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    rag_engine.write_knowledge_base_snapshot(
+        rag_engine.build_knowledge_base(),
+        rag_engine.default_snapshot_path(data_path),
+    )
+    _write_records(data_path, [record, {**record, "questionId": "diabetes-extra"}])
+
+    knowledge = rag_engine.load_knowledge_base()
+
+    assert len(knowledge.chunks) == 2
+
+
+def test_snapshot_with_same_size_sources_but_edited_content_is_stale(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    record = {
+        "documentId": "diabetes-doc",
+        "questionId": "diabetes-info",
+        "source": "NIDDK",
+        "questionFocus": "Type 2 Diabetes",
+        "questionType": "information",
+        "question": "What is type 2 diabetes?",
+        "answer": "Type 2 diabetes affects how the body uses glucose.",
+    }
+    _write_records(data_path, [record])
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    snapshot_path = rag_engine.default_snapshot_path(data_path)
+    rag_engine.write_knowledge_base_snapshot(rag_engine.build_knowledge_base(), snapshot_path)
+    original_size = data_path.stat().st_size
+    _write_records(data_path, [{**record, "answer": "Type 2 diabetes affects how the body uses insulin."}])
+
+    assert data_path.stat().st_size == original_size
+    assert rag_engine._load_snapshot_knowledge_base(snapshot_path, rag_engine._current_sources()) is None
+    assert rag_engine.load_knowledge_base().chunks[0].answer.endswith("uses insulin.")
+
+
+def test_rerank_features_are_precomputed_per_chunk(tmp_path, monkeypatch):
+    data_path = tmp_path / "clinical.jsonl"
+    _write_records(
+        data_path,
+        [
+            {
+                "documentId": "diabetes-problems-doc",
+                "questionId": "diabetes-problems-prevention",
+                "source": "NIDDK",
+                "questionFocus": "Prevent Diabetes Problems: Keep Your Kidneys Healthy",
+                "questionType": "prevention",
+                "question": "How can I keep my kidneys healthy?",
+                "answer": "Managing blood pressure can help prevent or delay kidney disease.",
+            }
+        ],
+    )
+    monkeypatch.setattr(rag_engine, "DATA_PATH", data_path)
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+
+    knowledge = rag_engine.load_knowledge_base()
+    features = knowledge.chunks[0].rerank_features
+
+    assert knowledge.vocabulary.decode(features.focus_term_ids) == {
+        "prevent",
+        "diabetes",
+        "problems",
+        "keep",
+        "kidneys",
+        "healthy",
+    }
+    assert {"kidney", "disease", "blood", "pressure"} <= knowledge.vocabulary.decode(
+        features.observed_term_ids
+    )
+    assert features.phrase_mask == 1 << rag_engine.IMPORTANT_PHRASES.index("blood pressure")
+    assert features.mentions_prevention is True
+    assert features.broad_diabetes_focus is True
+
+
+def test_retrieve_many_matches_single_question_retrieval(monkeypatch):
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    knowledge = rag_engine.load_knowledge_base()
+    questions = [
+        "What treatments help type 2 diabetes?",
+        "How can someone prevent high blood pressure?",
+        "What are the symptoms of prediabetes?",
+        "What is the warranty policy for a laptop battery?",
+        "What treatments help type 2 diabetes?",
+    ]
+    semantic_queries = [list(chunk.semantic_embedding) for chunk in knowledge.chunks[:4]] + [None]
+
+    def ranked(hits):
+        return [(hit.chunk_index, hit.score, hit.rerank_score) for hit in hits]
+
+    local_batch = rag_engine.retrieve_many(questions)
+    bedrock_batch = rag_engine.retrieve_many(
+        questions,
+        retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+        query_embeddings=semantic_queries,
+    )
+
+    for index, question in enumerate(questions):
+        assert ranked(local_batch[index]) == ranked(rag_engine.retrieve(question))
+        assert ranked(bedrock_batch[index]) == ranked(
+            rag_engine.retrieve(
+                question,
+                retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+                query_embedding=semantic_queries[index],
+            )
+        )
+    assert local_batch[0]
+
+
+def test_analyze_query_computes_every_stage_input_once():
+    query = rag_engine.analyze_query("How can I prevent  Type 2 Diabetes and diabetes problems?")
+
+    assert query.terms == frozenset(query.term_counts)
+    assert query.term_counts["diabetes"] == 2
+    assert query.normalized_text == "how can i prevent type 2 diabetes and diabetes problems?"
+    assert query.phrase_mask & (1 << rag_engine.IMPORTANT_PHRASES.index("type 2 diabetes"))
+    assert query.question_type == "prevention"
+    assert query.hash_embedding == rag_engine._hash_embedding(query.question)
+    assert query.in_scope is True
+    assert query.safety.blocked is False
+
+    assert rag_engine.analyze_query("What is the warranty on a laptop?").in_scope is False
+    assert rag_engine.analyze_query("I have chest pain right now").safety.blocked is True
+
+
+def test_retrieval_only_paths_skip_the_safety_scan(monkeypatch):
+    scans = []
+
+    def counting_assess(question):
+        scans.append(question)
+        return rag_engine.SafetyDecision(False, "grounded", "", "")
+
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "assess_question_safety", counting_assess)
+
+    rag_engine.retrieve_many(["What is type 2 diabetes?", "How can I lower blood pressure?"])
+    query = rag_engine.analyze_query("What is prediabetes?")
+
+    assert scans == []
+    assert query.safety.blocked is False
+    assert query.safety is query.safety
+    assert scans == ["What is prediabetes?"]
+
+
+def test_hash_embedding_bucket_table_matches_sha256_buckets(monkeypatch):
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    knowledge = rag_engine.load_knowledge_base()
+
+    def reference(text):
+        vector = [0.0] * rag_engine.HASH_DIMS
+        for term in rag_engine._extract_terms(text):
+            vector[int(hashlib.sha256(term.encode("utf-8")).hexdigest(), 16) % rag_engine.HASH_DIMS] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        return vector if norm == 0 else [value / norm for value in vector]
+
+    assert all(term in rag_engine._TERM_BUCKETS for term in knowledge.vocabulary.terms)
+    for text in ["What treats type 2 diabetes and diabetes?", "zzyzx unseenterm", "", knowledge.chunks[0].text]:
+        assert rag_engine._hash_embedding(text) == reference(text)
+
+
+def test_rrf_fuse_merges_stage_scores_in_parallel_arrays(monkeypatch):
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    knowledge = rag_engine.load_knowledge_base()
+    first_index_by_id = {}
+    for index, chunk in enumerate(knowledge.chunks):
+        first_index_by_id.setdefault(chunk.chunk_id, index)
+    first, second, third = list(first_index_by_id.values())[:3]
+
+    fused = rag_engine._rrf_fuse(
+        rag_engine.ScoredCandidates([first, second], [0.9, 0.4]),
+        rag_engine.ScoredCandidates([third, second], [1.0, 0.5]),
+        knowledge,
+        semantic=True,
+    )
+
+    assert fused.chunk_indices == [second, first, third]
+    assert fused.vector_scores == [0.4, 0.9, 0.0]
+    assert fused.lexical_scores == [0.5, 0.0, 1.0]
+    hits = rag_engine._rerank(rag_engine.analyze_query("What is diabetes?"), fused, 2, knowledge)
+    assert len(hits) == 2
+    assert {hit.chunk_index for hit in hits} <= {first, second, third}
+    assert all(hit.semantic_score == hit.vector_score for hit in hits)
+
+
+def test_query_embedding_cache_serves_repeats_from_memory_then_persistent_store(tmp_path, monkeypatch):
+    calls = []
+    embedding = [0.5] * rag_engine.TITAN_DIMS
+
+    def fake_titan_embedding(text):
+        calls.append(text)
+        return embedding, 9
+
+    store = SQLiteCacheStore(tmp_path / "query_embeddings.sqlite3")
+    monkeypatch.setattr(rag_engine, "_titan_embedding", fake_titan_embedding)
+    monkeypatch.setattr(
+        rag_engine,
+        "QUERY_EMBEDDING_CACHE",
+        QueryResultCache(max_entries=4, ttl_seconds=60, shared_store=store),
+    )
+
+    assert rag_engine._cached_titan_embedding("What is  prediabetes?") == (embedding, 9, False)
+    assert rag_engine._cached_titan_embedding("What is prediabetes? ") == (embedding, 0, True)
+    assert calls == ["What is prediabetes?"]
+
+    monkeypatch.setattr(
+        rag_engine,
+        "QUERY_EMBEDDING_CACHE",
+        QueryResultCache(max_entries=4, ttl_seconds=60, shared_store=store),
+    )
+    assert rag_engine._cached_titan_embedding("What is prediabetes?") == (embedding, 0, True)
+    assert rag_engine._cached_titan_embedding("What is Prediabetes?")[2] is False
+    assert len(calls) == 2
+
+    monkeypatch.setattr(rag_engine, "TITAN_EMBEDDING_MODEL", "other-model")
+    assert rag_engine._cached_titan_embedding("What is prediabetes?")[2] is False
+
+
+def test_bedrock_mode_degrades_to_lexical_when_embedding_misses_deadline(monkeypatch):
+    release = threading.Event()
+
+    def slow_titan_embedding(text):
+        release.wait(5)
+        return [0.0] * rag_engine.TITAN_DIMS, 8
+
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "_titan_embedding", slow_titan_embedding)
+    monkeypatch.setattr(rag_engine, "QUERY_EMBEDDING_CACHE", QueryResultCache(max_entries=0))
+    monkeypatch.setattr(rag_engine, "EMBEDDING_DEADLINE_SECONDS", 0.05)
+
+    try:
+        result, usage = rag_engine.answer_question(
+            "What treatments help type 2 diabetes?",
+            retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+        )
+    finally:
+        release.set()
+
+    assert result["retrieval"]["degradedToLexical"] is True
+    assert result["retrieval"]["hits"]
+    assert all(hit["semanticScore"] == 0 for hit in result["retrieval"]["hits"])
+    assert usage["embeddingTokens"] == 0
+
+
+def test_batch_embedding_calls_share_the_pool_within_the_deadline(monkeypatch):
+    def titan_embedding(text):
+        time.sleep(0.1)
+        return [1.0] + [0.0] * (rag_engine.TITAN_DIMS - 1), 8
+
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "_titan_embedding", titan_embedding)
+    monkeypatch.setattr(rag_engine, "QUERY_EMBEDDING_CACHE", QueryResultCache(max_entries=0))
+    monkeypatch.setattr(rag_engine, "EMBEDDING_DEADLINE_SECONDS", 0.3)
+    executor = ThreadPoolExecutor(max_workers=5)
+    monkeypatch.setattr(rag_engine, "_EMBEDDING_EXECUTOR", executor)
+
+    try:
+        responses = rag_engine.answer_questions(
+            [f"What treatments help type 2 diabetes number {index}?" for index in range(5)],
+            retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+        )
+    finally:
+        executor.shutdown()
+
+    assert [result["retrieval"]["degradedToLexical"] for result, _usage in responses] == [False] * 5
+    assert all(usage["embeddingTokens"] == 8 for _result, usage in responses)
+
+
+def test_embedding_deadline_holds_while_late_calls_fill_the_pool(monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def slow_titan_embedding(text):
+        started.append(text)
+        release.wait(5)
+        return [0.0] * rag_engine.TITAN_DIMS, 8
+
+    monkeypatch.setattr(rag_engine, "_KNOWLEDGE_BASE", None)
+    monkeypatch.setattr(rag_engine, "_titan_embedding", slow_titan_embedding)
+    monkeypatch.setattr(rag_engine, "QUERY_EMBEDDING_CACHE", QueryResultCache(max_entries=0))
+    monkeypatch.setattr(rag_engine, "EMBEDDING_DEADLINE_SECONDS", 0.2)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(rag_engine, "_EMBEDDING_EXECUTOR", executor)
+
+    try:
+        first, _usage = rag_engine.answer_question(
+            "What treatments help type 2 diabetes?",
+            retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+        )
+        begun = time.monotonic()
+        second, _usage = rag_engine.answer_question(
+            "What causes insulin resistance?",
+            retrieval_mode=rag_engine.BEDROCK_RETRIEVAL_MODE,
+        )
+        elapsed = time.monotonic() - begun
+    finally:
+        release.set()
+        executor.shutdown()
+
+    assert first["retrieval"]["degradedToLexical"] is True
+    assert second["retrieval"]["degradedToLexical"] is True
+    assert elapsed < 1.0
+    assert started == ["What treatments help type 2 diabetes?"]
+
+
+def test_int8_quantization_error_is_within_half_a_step():
+    row = [math.sin(index * 0.7) / 8 for index in range(rag_engine.TITAN_DIMS)]
+
+    vector = rag_engine._quantize_int8(row)
+
+    assert max(abs(code) for code in vector.codes) == 127
+    assert all(abs(value - original) <= vector.scale / 2 + 1e-12 for value, original in zip(vector, row))
+    assert len(rag_engine._quantize_int8([0.0, 0.0]).codes) == 2
+
+
+def test_corpus_fingerprint_changes_with_embedding_precision(monkeypatch):
+    float32_fingerprint = rag_engine.corpus_fingerprint()
+
+    monkeypatch.setattr(rag_engine, "EMBEDDING_PRECISION", "int8")
+
+    assert rag_engine.corpus_fingerprint() != float32_fingerprint
+
+
+def test_int8_knowledge_base_round_trips_through_snapshot_and_python_scoring(tmp_path, monkeypatch):
+    sources = rag_engine.SnapshotSources(
+        data_path=rag_engine.DEFAULT_DATA_PATH,
+        embedding_cache_path=rag_engine.DEFAULT_EMBEDDING_CACHE_PATH,
+        titan_embedding_cache_path=rag_engine.DEFAULT_TITAN_EMBEDDING_CACHE_PATH,
+    )
+    knowledge = rag_engine.build_knowledge_base(sources, precision="int8")
+    snapshot_path = tmp_path / "int8.snapshot"
+    rag_engine.write_knowledge_base_snapshot(knowledge, snapshot_path, sources)
+
+    loaded = rag_engine._load_snapshot_knowledge_base(snapshot_path, sources, precision="int8")
+    question = "What are treatments for type 2 diabetes?"
+    matrix_hits = rag_engine._vector_retrieval(question, loaded, 5)
+    monkeypatch.setattr(rag_engine, "np", None)
+    python_hits = rag_engine._vector_retrieval(
+        question,
+        rag_engine.KnowledgeBase(
+            chunks=loaded.chunks,
+            document_frequency=loaded.document_frequency,
+            average_term_count=loaded.average_term_count,
+        ),
+        5,
+    )
+
+    assert loaded.embedding_precision == "int8"
+    assert [list(chunk.embedding) for chunk in loaded.chunks] == [
+        list(chunk.embedding) for chunk in knowledge.chunks
+    ]
+    assert rag_engine._load_snapshot_knowledge_base(snapshot_path, sources, precision="float32") is None
+    assert [hit.chunk_id for hit in matrix_hits] == [hit.chunk_id for hit in python_hits]
+    assert [round(hit.vector_score, 5) for hit in matrix_hits] == [
+        round(hit.vector_score, 5) for hit in python_hits
+    ]
@@ -0,0 +1,50 @@
+from clinical_rag.result_cache import FileCacheStore, QueryResultCache, result_cache_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_result_cache_key_normalizes_question_and_varies_by_mode_and_fingerprint():
+    key = result_cache_key("What is  Diabetes? ", "local", "corpus-a")
+
+    assert key == result_cache_key("what is diabetes?", "local", "corpus-a")
+    assert key != result_cache_key("what is diabetes?", "bedrock", "corpus-a")
+    assert key != result_cache_key("what is diabetes?", "local", "corpus-b")
+
+
+def test_result_cache_evicts_least_recently_used_and_expires_entries():
+    clock = _Clock()
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    assert cache.get("a") == ({"value": 1}, "memory")
+
+    cache.put("c", {"value": 3})
+    assert cache.get("b") == (None, "miss")
+    assert cache.get("a")[1] == "memory"
+
+    clock.now += 61
+    assert cache.get("a") == (None, "miss")
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_result_cache_shared_tier_survives_new_process_cache(tmp_path):
+    clock = _Clock()
+    store = FileCacheStore(tmp_path / "cache")
+    QueryResultCache(max_entries=4, ttl_seconds=60, shared_store=store, clock=clock).put(
+        "key",
+        {"value": 1},
+    )
+
+    cold_cache = QueryResultCache(max_entries=4, ttl_seconds=60, shared_store=store, clock=clock)
+    assert cold_cache.get("key") == ({"value": 1}, "shared")
+    assert cold_cache.get("key") == ({"value": 1}, "memory")
+
+    clock.now += 61
+    expired_cache = QueryResultCache(max_entries=4, ttl_seconds=60, shared_store=store, clock=clock)
+    assert expired_cache.get("key") == (None, "miss")